@@ -0,0 +1,68 @@
+"""
+Peak RSS and time of a run hitting endpoints that return a big blob, with and without a body size cap
+(fuzz_engine.max_body_size), the length analysis being the same in both modes
+
+Each mode runs in its own process so that the peak RSS measurements don't leak into each other, the server too (a
+process started by the one holding the blob would inherit its peak RSS).
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.body_cap_bench [blob_mb] [requests] [max_body_kb]
+"""
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+
+def serve(blob_mb, urls, stop):
+    blob = b"blob data " * (blob_mb * 1024 * 1024 // 10)
+    with StandInServer(handler=lambda method, path, headers, body: (200, {}, blob)) as server:
+        urls.put(server.url)
+        stop.wait()
+
+
+def run_mode(mode, requests, max_body_kb, url, results):
+    config = {'fuzz_engine': {'max_body_size': max_body_kb * 1024}} if mode == 'capped' else None
+    response_analysis = {'analysis_parameters': ['length-in-bytes', 'length-in-words']}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module = FuzzBaseModule(num_workers=2, wordlists={'$path$': [f"blob{i}" for i in range(requests)]},
+                                config=config, response_analysis=response_analysis)
+        start = time.perf_counter()
+        asyncio.run(module.run_fuzz({'method': 'GET', 'url': url + '/$path$'}, 'product'))
+        total = time.perf_counter() - start
+
+    fuzz_results = list(module.base_fuzz_results(response=True))
+    results[mode] = {'total_time': total, 'analysis': fuzz_results[0][1],
+                     'kept_mb': sum(len(response.content) for response, _ in fuzz_results) / 1024 / 1024,
+                     'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+if __name__ == '__main__':
+    blob_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    max_body_kb = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+
+    ctx = multiprocessing.get_context('spawn')
+    manager = ctx.Manager()
+    results = manager.dict()
+    urls, stop = ctx.Queue(), ctx.Event()
+    server = ctx.Process(target=serve, args=(blob_mb, urls, stop))
+    server.start()
+    url = urls.get()
+    for mode in ('buffered', 'capped'):
+        process = ctx.Process(target=run_mode, args=(mode, requests, max_body_kb, url, results))
+        process.start()
+        process.join()
+    stop.set()
+    server.join()
+
+    print(f"{requests} responses of {blob_mb} MB, cap {max_body_kb} KB")
+    for mode in ('buffered', 'capped'):
+        result = results[mode]
+        print(f"{mode:<10} kept {result['kept_mb']:>8.1f} MB  total {result['total_time']:>6.2f} s  "
+              f"peak RSS {result['peak_rss_mb']:>7.1f} MB  analysis {result['analysis']}")
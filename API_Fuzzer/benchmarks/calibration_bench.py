@@ -0,0 +1,57 @@
+"""
+Results emitted by a run where most paths answer the same error page (echoing the path, with a request id), without
+any match / hide rule against a calibrated run (fuzz_engine.calibrate): number of results, size of the JSON rows the
+webapp would send and total time (calibration included)
+
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.calibration_bench [requests] [found_every]
+"""
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+NOT_FOUND = (b"<html><head><title>404 Not Found</title></head><body><h1>Not Found</h1><p>The requested URL %s was "
+             b"not found on this server.</p><p>Request id %d</p><hr><address>Apache/2.4.41 (Ubuntu) Server at "
+             b"example.com Port 80</address></body></html>")
+
+
+def make_handler(found_every):
+    def handler(method, path, headers, body):
+        number = path.rsplit('p', 1)[-1]
+        if number.isdigit() and int(number) % found_every == 0:
+            return 200, {}, b'{"resource": "%s", "owner": "admin", "items": []}' % path.encode()
+        return 404, {}, NOT_FOUND % (path.encode(), random.getrandbits(32))
+    return handler
+
+
+def run(mode, requests, url):
+    wordlists = {'$path$': [f"p{i}" for i in range(1, requests + 1)]}
+    config = {'fuzz_engine': {'result_records': True, 'calibrate': mode == 'calibrated'}}
+    response_analysis = {'analysis_parameters': ['response-code', 'length-in-bytes', 'length-in-words']}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module = FuzzBaseModule(num_workers=10, wordlists=wordlists, config=config,
+                                response_analysis=response_analysis)
+        start = time.perf_counter()
+        asyncio.run(module.run_fuzz({'method': 'GET', 'url': url + '/$path$'}, 'product'))
+        total = time.perf_counter() - start
+    rows = [{'fuzz_index': result.fuzz_index, 'url': result.url, **analysis}
+            for result, analysis in module.base_fuzz_results(response=True)]
+    return total, len(rows), len(json.dumps(rows, default=str))
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    found_every = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with StandInServer(handler=make_handler(found_every)) as server:
+        print(f"{requests} requests, a real page every {found_every}")
+        for mode in ('unfiltered', 'calibrated'):
+            total, results, emitted = run(mode, requests, server.url)
+            print(f"{mode:<11} {results:>6} results  {emitted / 1024:>8.1f} KB emitted  total {total:>6.2f} s")
@@ -0,0 +1,50 @@
+"""
+Rendering ops/sec of the compiled fuzz templates against the previous implementation
+(str(dict), one str.replace per fuzz point, then ast.literal_eval for every request)
+
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.fuzz_template_bench [renders]
+"""
+import ast
+import re
+import sys
+import time
+
+from fuzzer_core.engine.fuzz_template import FuzzTemplate
+
+REQUESTS = {
+    'dict': {'method': 'POST', 'url': 'http://127.0.0.1:8000/api/$path$',
+             'headers': {'User-Agent': 'bench', 'Authorization': 'Bearer $token$'},
+             'params': {'page': '1', 'sort': 'asc'},
+             'json': {'user': {'id': '$id$', 'roles': ['admin', 'user']}, 'comment': 'text'}},
+    'string': 'POST /api/$path$ HTTP/1.1\r\nAuthorization: Bearer $token$\r\n\r\n{"id": "$id$"}',
+}
+
+
+def legacy_render(input_param, words):
+    input_var = str(input_param) if isinstance(input_param, dict) else input_param
+    matches = re.findall(r'\$\w+\$', input_var)
+    replaced_string = input_var
+    for i, match in enumerate(matches):
+        if match in replaced_string:
+            replaced_string = replaced_string.replace(match, str(words[i]), 1)
+    return ast.literal_eval(replaced_string) if isinstance(input_param, dict) else replaced_string
+
+
+def ops_per_second(render, count):
+    words = [(f"users{i}", f"tok{i}", i) for i in range(count)]
+    start = time.perf_counter()
+    for tuple_words in words:
+        render(tuple_words)
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print(f"{'request':<10}{'legacy (ops/s)':>18}{'compiled (ops/s)':>20}{'speedup':>10}")
+    for name, request in REQUESTS.items():
+        template = FuzzTemplate(request)
+        legacy = ops_per_second(lambda words: legacy_render(request, words), renders)
+        compiled = ops_per_second(template.render, renders)
+        print(f"{name:<10}{legacy:>18,.0f}{compiled:>20,.0f}{compiled / legacy:>9.1f}x")
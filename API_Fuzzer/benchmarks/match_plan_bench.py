@@ -0,0 +1,59 @@
+"""
+Time to match / hide and analyse synthetic responses (mostly 404s with a body), through the legacy invoke_match /
+invoke_analysis path (rules in configuration order, every rule decodes what it needs) against the compiled plan
+(ResponseAnalyser.evaluate: cheap rules first, short-circuit on the first failed rule)
+
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.match_plan_bench [responses] [found_every]
+"""
+import sys
+import time
+
+import httpx
+
+from fuzzer_core.engine.response_analyser import ResponseAnalyser, ResponseNotMatchedExc
+
+# the body rule comes first in the configuration: the legacy path runs it on every response
+MATCH_HIDE = ['match', {'length-in-words': {'min': 5}, 'response-header': {'headers': {'content-type': None}},
+                        'response-code': {'code': [200, 301]}}]
+ANALYSIS = ['response-code', 'length-in-words', 'length-in-bytes']
+
+
+def make_responses(count, found_every):
+    not_found = b"<html><body><h1>Not Found</h1><p>" + b"The requested URL was not found. " * 30 + b"</p></body></html>"
+    found = b"<html><body><ul>" + b"<li>user 42 - secret entry</li>" * 50 + b"</ul></body></html>"
+    headers = {'Content-Type': 'text/html; charset=utf-8'}
+    return [httpx.Response(200, headers=headers, content=found) if i % found_every == 0
+            else httpx.Response(404, headers=headers, content=not_found) for i in range(count)]
+
+
+def legacy(analyser, response):
+    try:
+        return analyser.invoke_analysis(response, analyser.invoke_match(response, ANALYSIS))
+    except ResponseNotMatchedExc:
+        return None
+
+
+def plan(analyser, response):
+    return analyser.evaluate(response)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    found_every = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print(f"{count} responses, 1 in {found_every} matched")
+    results, kept = {}, {}
+    for name, func in (('legacy', legacy), ('plan', plan)):
+        # fresh responses: the metrics cached on a response would be reused by the second run
+        responses = make_responses(count, found_every)
+        analyser = ResponseAnalyser(match_hide=MATCH_HIDE, analysis=ANALYSIS)
+        start = time.perf_counter()
+        kept[name] = [result for result in (func(analyser, response) for response in responses) if result is not None]
+        results[name] = time.perf_counter() - start
+        print(f"{name:<8}{results[name]:>8.2f} s {results[name] / count * 1e6:>8.2f} us / response")
+        if name == 'plan':
+            for rule in analyser.rule_stats()['rules']:
+                print(f"    {rule}")
+    assert kept['legacy'] == kept['plan'], "both paths must keep the same responses"
+    print(f"speedup: {results['legacy'] / results['plan']:.1f}x")
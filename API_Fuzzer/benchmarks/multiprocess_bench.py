@@ -0,0 +1,68 @@
+"""
+Requests per second of an analysis heavy fuzz run (hash, lengths and sensitive info of ~20 KB bodies) in one process
+against the same run sharded over N processes, on a local stand-in server
+
+Each run is driven from its own process, the stand-in server runs in the parent process.
+The speedup is bounded by the number of cores left to the shard processes once the stand-in server has its own.
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.multiprocess_bench [requests] [processes] [num_workers]
+"""
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import sys
+import time
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+BODY = b"".join(b"<li>user %d - contact: user%d@example.com</li>\n" % (i, i) for i in range(400))
+
+RESPONSE_ANALYSIS = {'matching_requirements': ['match', {'response-code': {'code': [200]}}],
+                     'analysis_parameters': ["response-hash", "length-in-lines", "length-in-bytes",
+                                             "length-in-chars", "length-in-words", "sensitive-info"]}
+
+
+def handler(method, path, headers, body):
+    return 200, {"Content-Type": "text/html"}, BODY
+
+
+def run_mode(processes, count, num_workers, url, results):
+    wordlists = {'$id$': [str(i) for i in range(count)]}
+    req_details = {'method': 'GET', 'url': url + '/users/$id$'}
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module = FuzzBaseModule(num_workers=num_workers, wordlists=wordlists, response_analysis=RESPONSE_ANALYSIS)
+        start = time.perf_counter()
+        if processes == 1:
+            asyncio.run(module.run_fuzz(req_details, None))
+        else:
+            asyncio.run(module.run_fuzz_processes(req_details, None, processes=processes))
+        elapsed = time.perf_counter() - start
+
+    received = sum(1 for response, _ in module.base_fuzz_results(response=True) if response is not None)
+    results[processes] = {'requests': received, 'elapsed': elapsed, 'requests_per_second': received / elapsed}
+
+
+if __name__ == '__main__':
+    requests_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    process_count = int(sys.argv[2]) if len(sys.argv) > 2 else max((os.cpu_count() or 2) - 1, 2)
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    ctx = multiprocessing.get_context('spawn')
+    manager = ctx.Manager()
+    bench_results = manager.dict()
+
+    with StandInServer(handler=handler) as server:
+        for run in (1, process_count):
+            process = ctx.Process(target=run_mode, args=(run, requests_count, workers, server.url, bench_results))
+            process.start()
+            process.join()
+
+    print(f"\n{requests_count} requests, {workers} workers per process, {os.cpu_count()} CPUs")
+    print(f"{'processes':<10}{'responses':>12}{'time (s)':>12}{'requests/s':>14}")
+    for run, res in sorted(bench_results.items()):
+        print(f"{run:<10}{res['requests']:>12}{res['elapsed']:>12.2f}{res['requests_per_second']:>14,.0f}")
+    if len(bench_results) == 2:
+        print(f"speedup: {bench_results[process_count]['requests_per_second'] / bench_results[1]['requests_per_second']:.1f}x")
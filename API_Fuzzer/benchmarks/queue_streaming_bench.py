@@ -0,0 +1,75 @@
+"""
+Time-to-first-request and peak RSS of a fuzz run: eager loading (whole product built and queued before the workers
+start) against the bounded streaming request queue (producer running alongside the workers)
+
+Each mode runs in its own process so that the peak RSS measurements don't leak into each other.
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.queue_streaming_bench [words_per_list] [num_workers]
+"""
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.requester.requester import Requester
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule, load_fuzzwords
+
+
+class TimedRequester(Requester):
+    first_sent_at = None
+
+    async def send_request(self, req, auth):
+        if self.first_sent_at is None:
+            self.first_sent_at = time.perf_counter()
+        return await super().send_request(req, auth)
+
+
+async def eager_run(module, req_details):
+    # the pre-streaming flow: materialise every request, queue them all, then start the workers
+    loaded_contents = load_fuzzwords(input_param=req_details, wordlists_dict=module.wordlists, iterator='product')
+    await module.populate_req_queue(req_list=loaded_contents)
+    await module.run_workers()
+
+
+def run_mode(mode, words, num_workers, url, results):
+    wordlists = {'$path$': [f"p{i}" for i in range(words)], '$param$': [f"v{i}" for i in range(words)]}
+    config = {'fuzz_engine': {'queue_size': 0 if mode == 'eager' else 1000}}
+    module = FuzzBaseModule(num_workers=num_workers, wordlists=wordlists, config=config)
+    module.requester_client = TimedRequester()
+
+    req_details = {'method': 'GET', 'url': url + '/$path$?q=$param$'}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        if mode == 'eager':
+            asyncio.run(eager_run(module, req_details))
+        else:
+            asyncio.run(module.run_fuzz(req_details, 'product'))
+        total = time.perf_counter() - start
+
+    results[mode] = {'time_to_first_request': module.requester_client.first_sent_at - start,
+                     'total_time': total,
+                     'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+if __name__ == '__main__':
+    words_per_list = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    ctx = multiprocessing.get_context('spawn')
+    manager = ctx.Manager()
+    bench_results = manager.dict()
+
+    with StandInServer() as server:
+        for run in ('eager', 'streaming'):
+            process = ctx.Process(target=run_mode, args=(run, words_per_list, workers, server.url, bench_results))
+            process.start()
+            process.join()
+
+    print(f"\n{words_per_list ** 2} requests, {workers} workers")
+    print(f"{'mode':<12}{'first request (s)':>20}{'total (s)':>12}{'peak RSS (MB)':>16}")
+    for run, res in bench_results.items():
+        print(f"{run:<12}{res['time_to_first_request']:>20.4f}{res['total_time']:>12.2f}{res['peak_rss_mb']:>16.1f}")
@@ -0,0 +1,62 @@
+"""
+Achieved requests per second against the target rate of the RateLimiter, from 1 to 10k RPS
+
+- limiter only: acquisitions with no I/O, shows the scheduling accuracy of the limiter itself
+- fuzz run: full FuzzBaseModule run against a local stand-in server, bounded by what the client can send
+
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.ratelimiter_bench [duration_in_seconds] [num_workers]
+"""
+import asyncio
+import contextlib
+import os
+import sys
+import time
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.ratelimiter import RateLimiter
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+TARGET_RATES = (1, 10, 100, 1000, 2500, 5000, 10000)
+
+
+async def limiter_only(rate, count, concurrency):
+    limiter = RateLimiter(rate_limit=rate)
+
+    async def acquire(n):
+        for _ in range(n):
+            async with limiter.throttle():
+                pass
+
+    start = time.perf_counter()
+    await asyncio.gather(*(acquire(count // concurrency) for _ in range(concurrency)))
+    # the first request goes out at t=0, the rate is measured over the intervals between requests
+    return (limiter.acquired - 1) / (time.perf_counter() - start)
+
+
+def fuzz_run(rate, count, num_workers, url):
+    wordlists = {'$path$': [f"p{i}" for i in range(count)]}
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module = FuzzBaseModule(num_workers=num_workers, wordlists=wordlists, rate_limiting={'rate_limit': rate})
+        start = time.perf_counter()
+        asyncio.run(module.run_fuzz({'method': 'GET', 'url': url + '/$path$'}, None))
+        elapsed = time.perf_counter() - start
+
+    return (count - 1) / elapsed
+
+
+if __name__ == '__main__':
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print(f"{'target RPS':>10}{'limiter only':>16}{'fuzz run':>12}")
+    with StandInServer() as server:
+        for target in TARGET_RATES:
+            requests_count = max(int(target * duration), 3)
+            concurrency = min(workers, requests_count)
+            requests_count -= requests_count % concurrency
+
+            achieved_limiter = asyncio.run(limiter_only(target, requests_count, concurrency))
+            achieved_fuzz = fuzz_run(target, requests_count, concurrency, server.url)
+            print(f"{target:>10}{achieved_limiter:>16.1f}{achieved_fuzz:>12.1f}")
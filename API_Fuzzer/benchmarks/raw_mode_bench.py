@@ -0,0 +1,59 @@
+"""
+Requests per second of a fuzz run in raw mode (compiled byte template written to pooled sockets) against the httpx
+path (request dict rendered, httpx.Request built and sent for every request), on a local stand-in server
+
+Each mode runs in its own process, the stand-in server runs in the parent process.
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.raw_mode_bench [requests] [num_workers]
+"""
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import sys
+import time
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+RAW_REQUEST = "GET /items/$id$ HTTP/1.1\nHost: 127.0.0.1\nUser-Agent: bench\nAccept: */*\n\n"
+
+
+def run_mode(mode, count, num_workers, url, results):
+    wordlists = {'$id$': [str(i) for i in range(count)]}
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module = FuzzBaseModule(num_workers=num_workers, wordlists=wordlists)
+        start = time.perf_counter()
+        if mode == 'raw':
+            asyncio.run(module.run_raw_fuzz(RAW_REQUEST, url, None))
+        else:
+            req_details = {'method': 'GET', 'url': url + '/items/$id$',
+                           'headers': {'User-Agent': 'bench', 'Accept': '*/*'}}
+            asyncio.run(module.run_fuzz(req_details, None))
+        elapsed = time.perf_counter() - start
+
+    received = sum(1 for response, _ in module.base_fuzz_results(response=True) if response is not None)
+    results[mode] = {'requests': received, 'elapsed': elapsed, 'requests_per_second': received / elapsed}
+
+
+if __name__ == '__main__':
+    requests_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    ctx = multiprocessing.get_context('spawn')
+    manager = ctx.Manager()
+    bench_results = manager.dict()
+
+    with StandInServer() as server:
+        for run in ('httpx', 'raw'):
+            process = ctx.Process(target=run_mode, args=(run, requests_count, workers, server.url, bench_results))
+            process.start()
+            process.join()
+
+    print(f"\n{requests_count} requests, {workers} workers")
+    print(f"{'mode':<8}{'responses':>12}{'time (s)':>12}{'requests/s':>14}")
+    for run, res in bench_results.items():
+        print(f"{run:<8}{res['requests']:>12}{res['elapsed']:>12.2f}{res['requests_per_second']:>14,.0f}")
+    if len(bench_results) == 2:
+        print(f"speedup: {bench_results['raw']['requests_per_second'] / bench_results['httpx']['requests_per_second']:.1f}x")
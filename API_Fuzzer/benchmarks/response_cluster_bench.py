@@ -0,0 +1,63 @@
+"""
+Near duplicate clustering of synthetic fuzzing responses: a few error pages echoing the fuzzed value (with request ids
+and times), and a few real pages among them. Counts the distinct response-hash values against the response-cluster
+clusters, and the time each option takes per response
+
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.response_cluster_bench [responses] [found_every]
+"""
+import random
+import sys
+import time
+
+import httpx
+
+from fuzzer_core.engine.response_analyser import ResponseAnalyser
+
+TEMPLATES = [
+    (404, b"<html><head><title>404 Not Found</title></head><body><h1>Not Found</h1><p>The requested URL /%s was not "
+          b"found on this server.</p><p>Request %d</p><hr><address>Apache/2.4.41 (Ubuntu) Server at example.com "
+          b"Port 80</address></body></html>"),
+    (400, b'{"error": "invalid parameter", "detail": "value %s is not a valid identifier", "request_id": %d, '
+          b'"documentation": "https://example.com/docs/errors#invalid-parameter"}'),
+    (403, b"<html><body><h1>Forbidden</h1><p>You don't have permission to access /%s on this server. Incident "
+          b"%d was logged, contact the administrator with this reference if you think it is an error.</p>"
+          b"</body></html>"),
+]
+
+
+def make_responses(count, found_every):
+    random.seed(0)
+    request = httpx.Request('GET', 'http://127.0.0.1/')
+    responses = []
+    for i in range(count):
+        payload = bytes(random.choice(b"abcdefghijklmnopqrstuvwxyz") for _ in range(random.randint(3, 14)))
+        if i % found_every == 0:
+            content = b'{"resource": "%s", "items": [%s], "owner": "user%d"}' % (
+                payload, b", ".join(b'"%s"' % payload[:k] for k in range(1, len(payload))), i)
+            responses.append(httpx.Response(200, content=content, request=request))
+        else:
+            status, template = TEMPLATES[i % len(TEMPLATES)]
+            responses.append(httpx.Response(status, content=template % (payload, random.getrandbits(40)),
+                                            request=request))
+    return responses
+
+
+def measure(option, responses):
+    analyser = ResponseAnalyser(match_hide=None, analysis=[option])
+    start = time.perf_counter()
+    values = [analyser.evaluate(response)[option] for response in responses]
+    return time.perf_counter() - start, len(set(values)), analyser
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    found_every = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    responses = make_responses(count, found_every)
+    print(f"{count} responses, a real page every {found_every}")
+    for option in ('response-hash', 'response-cluster'):
+        total, distinct, analyser = measure(option, responses)
+        print(f"{option:<18} {total:>7.2f} s  {total / count * 1e6:>6.1f} us / response  {distinct:>7} distinct")
+    counts = sorted((cluster['count'] for cluster in analyser.clusters.summary()), reverse=True)
+    print(f"biggest clusters: {counts[:5]}, clusters of one response: {counts.count(1)}")
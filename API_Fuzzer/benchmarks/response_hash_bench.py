@@ -0,0 +1,50 @@
+"""
+Time to hash synthetic responses with the legacy hash_response_md5 (response rebuilt as a string with the decoded body,
+encoded again, md5) against ResponseHasher (raw bytes fed to the hash) for each available algorithm, and the number
+of distinct hashes of responses that only differ by their volatile headers
+
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.response_hash_bench [responses] [body_kb]
+"""
+import hashlib
+import sys
+import time
+
+import httpx
+
+from fuzzer_core.engine.requester.requester import Requester
+from fuzzer_core.engine.response_hasher import ResponseHasher, HASH_ALGORITHMS
+
+
+def make_responses(count, body_kb):
+    body = ("<tr><td>entrée</td><td>42</td></tr>" * (body_kb * 1024 // 36)).encode('utf-8')
+    return [httpx.Response(200, content=body, headers={'Content-Type': 'text/html; charset=utf-8', 'Server': 'nginx',
+                                                       'Date': f"Mon, 01 Jan 2024 00:{i // 60 % 60:02d}:{i % 60:02d} GMT",
+                                                       'Set-Cookie': f"session={i}", 'X-Request-Id': f"{i:016x}"})
+            for i in range(count)]
+
+
+def legacy(response):
+    return hashlib.md5(Requester.reconstruct_response(response).encode('utf-8')).hexdigest()
+
+
+def measure(hash_function, responses):
+    start = time.perf_counter()
+    hashes = {hash_function(response) for response in responses}
+    return time.perf_counter() - start, len(hashes)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    body_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    responses = make_responses(count, body_kb)
+    # text decoding is cached by httpx after the first call: the legacy path is measured on fresh responses
+    fresh = make_responses(count, body_kb)
+
+    print(f"{count} responses, {body_kb} KB bodies, same page with changing volatile headers")
+    total, distinct = measure(legacy, fresh)
+    print(f"{'legacy md5':<22} {total:>7.3f} s  {count / total:>9.0f} responses / s  {distinct:>6} distinct")
+    for algorithm in HASH_ALGORITHMS:
+        total, distinct = measure(ResponseHasher(algorithm).hexdigest, responses)
+        print(f"{algorithm:<22} {total:>7.3f} s  {count / total:>9.0f} responses / s  {distinct:>6} distinct")
@@ -0,0 +1,46 @@
+"""
+Time to compute the length metrics (bytes, lines, words, chars) of a response, each one from response.text as the
+analyser used to, against the single pass ResponseMetrics over the raw bytes
+
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.response_metrics_bench [size_in_kb] [repeat]
+"""
+import sys
+import timeit
+
+import httpx
+
+from fuzzer_core.engine.response_analyser import ResponseAnalyser
+from fuzzer_core.engine.response_metrics import ResponseMetrics
+
+
+def text_metrics(response):
+    # the text is decoded by httpx on each new response, then every metric scans it again
+    text = response.text
+    return (ResponseAnalyser.calculate_length_in_bytes(text), ResponseAnalyser.calculate_length_in_lines(text),
+            ResponseAnalyser.calculate_length_in_words(text), ResponseAnalyser.calculate_length_in_chars(text),
+            ResponseAnalyser.value_in_response(text, 'not in there'))
+
+
+def bytes_metrics(response):
+    metrics = ResponseMetrics.of_response(response)
+    return (metrics.bytes, metrics.length_in_lines, metrics.words, metrics.chars,
+            ResponseAnalyser.value_in_response(response.content, 'not in there'))
+
+
+if __name__ == '__main__':
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    line = "<tr><td>user 42</td><td>José Müller</td><td>ünïcödé content</td></tr>\n".encode('utf-8')
+    content = line * (size_kb * 1024 // len(line))
+
+    print(f"{len(content) / 1024:.0f} KB response, {repeat} responses")
+    results = {}
+    for name, func in (('text', text_metrics), ('bytes', bytes_metrics)):
+        # a new response each time: nothing is cached between responses
+        elapsed = timeit.timeit(lambda: func(httpx.Response(200, content=content)), number=repeat)
+        results[name] = elapsed / repeat
+        print(f"{name:<8}{results[name] * 1000:>10.2f} ms / response")
+    assert text_metrics(httpx.Response(200, content=content)) == bytes_metrics(httpx.Response(200, content=content))
+    print(f"speedup: {results['text'] / results['bytes']:.1f}x")
@@ -0,0 +1,62 @@
+"""
+Memory kept per result in the response queue at the end of a run: httpx.Response objects (headers, request, body)
+against compact FuzzResult records (fuzz_engine.result_records)
+
+Each mode runs in its own process, the memory held by the results is measured with tracemalloc.
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.result_records_bench [requests] [body_bytes]
+"""
+import asyncio
+import contextlib
+import gc
+import multiprocessing
+import os
+import sys
+import tracemalloc
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+HEADERS = {'Content-Type': 'text/html; charset=utf-8', 'Server': 'stand-in', 'Cache-Control': 'no-cache',
+           'X-Request-Id': '0123456789abcdef'}
+
+
+def run_mode(mode, requests, url, results):
+    wordlists = {'$path$': [f"p{i}" for i in range(requests)]}
+    config = {'fuzz_engine': {'result_records': mode == 'records'}}
+    response_analysis = {'analysis_parameters': ['response-code', 'length-in-bytes']}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module = FuzzBaseModule(num_workers=10, wordlists=wordlists, config=config,
+                                response_analysis=response_analysis)
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        asyncio.run(module.run_fuzz({'method': 'GET', 'url': url + '/$path$'}, 'product'))
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+    results[mode] = {'results': module.response_queue.qsize(), 'held_mb': held / 1024 / 1024,
+                     'bytes_per_result': held / requests}
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    body_bytes = int(sys.argv[2]) if len(sys.argv) > 2 else 2048
+
+    body = (b"<p>item</p>" * body_bytes)[:body_bytes]
+
+    with StandInServer(handler=lambda method, path, headers, _: (200, HEADERS, body)) as server:
+        manager = multiprocessing.Manager()
+        results = manager.dict()
+        ctx = multiprocessing.get_context('spawn')
+        for mode in ('responses', 'records'):
+            process = ctx.Process(target=run_mode, args=(mode, requests, server.url, results))
+            process.start()
+            process.join()
+
+    print(f"{requests} results, {body_bytes} bytes bodies")
+    for mode in ('responses', 'records'):
+        result = results[mode]
+        print(f"{mode:<10} held {result['held_mb']:>8.2f} MB  {result['bytes_per_result']:>8.0f} bytes / result")
+    print(f"ratio: {results['responses']['bytes_per_result'] / results['records']['bytes_per_result']:.1f}x")
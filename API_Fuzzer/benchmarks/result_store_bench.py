@@ -0,0 +1,81 @@
+"""
+Memory held by the results of a run kept in the response queue (FuzzResult records) against results written through to
+an on-disk store (fuzz_engine.result_store), and the write throughput of the store for each batch size
+
+Each run mode runs in its own process, the memory held by the results is measured with tracemalloc (which slows the
+runs down: their time isn't measured).
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.result_store_bench [requests] [store_writes]
+"""
+import asyncio
+import contextlib
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.fuzz_result import FuzzResult
+from fuzzer_core.engine.queues.result_store import ResultStore
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+
+def run_mode(mode, requests, url, directory, results):
+    wordlists = {'$path$': [f"p{i}" for i in range(requests)]}
+    config = {'fuzz_engine': {'result_records': True}}
+    if mode == 'store':
+        config['fuzz_engine']['result_store'] = os.path.join(directory, 'run.db')
+    response_analysis = {'analysis_parameters': ['response-code', 'length-in-bytes']}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module = FuzzBaseModule(num_workers=10, wordlists=wordlists, config=config,
+                                response_analysis=response_analysis)
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        asyncio.run(module.run_fuzz({'method': 'GET', 'url': url + '/$path$'}, 'product'))
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+    results[mode] = {'results': sum(1 for _ in module.base_fuzz_results()), 'held_mb': held / 1024 / 1024}
+
+
+def write_throughput(writes, batch_size, directory):
+    result = FuzzResult(0, 'GET', 'http://127.0.0.1:8000/some/path', 200, 0.012, 2048, 40, 300, 2048,
+                        b"\x00" * 16)
+    analysis = {'response-code': 200, 'length-in-bytes': 2048}
+    path = os.path.join(directory, f"writes_{batch_size}.db")
+    start = time.perf_counter()
+    with ResultStore(path, batch_size=batch_size) as store:
+        for index in range(writes):
+            result.fuzz_index = index
+            store.add(result, analysis)
+    return writes / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    store_writes = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    with tempfile.TemporaryDirectory() as directory:
+        with StandInServer(handler=lambda method, path, headers, _: (200, {}, b"<p>item</p>" * 100)) as server:
+            manager = multiprocessing.Manager()
+            results = manager.dict()
+            ctx = multiprocessing.get_context('spawn')
+            for mode in ('memory', 'store'):
+                process = ctx.Process(target=run_mode, args=(mode, requests, server.url, directory, results))
+                process.start()
+                process.join()
+
+        print(f"{requests} results")
+        for mode in ('memory', 'store'):
+            result = results[mode]
+            print(f"{mode:<8} results {result['results']:>7}  held {result['held_mb']:>7.2f} MB")
+
+        print(f"{store_writes} store writes")
+        for batch_size in (1, 50, 500, 5000):
+            writes = store_writes if batch_size > 1 else store_writes // 20
+            print(f"batch {batch_size:>5}  {write_throughput(writes, batch_size, directory):>10.0f} results / s")
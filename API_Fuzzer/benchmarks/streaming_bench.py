@@ -0,0 +1,83 @@
+"""
+Bytes downloaded, time and peak RSS of a discovery run (mostly 404s with a big body, filtered on the status code):
+buffered responses against streamed responses (bodies of the filtered responses are discarded, not downloaded)
+
+Each mode runs in its own process so that the peak RSS measurements don't leak into each other.
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.streaming_bench [requests] [not_found_body_kb] [num_workers]
+"""
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.requester.requester import Requester
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+
+class CountingRequester(Requester):
+    downloaded = 0
+
+    async def send_request(self, req, auth, stream: bool = False):
+        response = await super().send_request(req, auth, stream=stream)
+        if response is not None and not stream:
+            self.downloaded += response.num_bytes_downloaded
+        return response
+
+    async def read_body(self, response):
+        await super().read_body(response)
+        self.downloaded += response.num_bytes_downloaded
+
+    async def discard(self, response):
+        await super().discard(response)
+        self.downloaded += response.num_bytes_downloaded
+
+
+def run_mode(mode, requests, num_workers, url, results):
+    wordlists = {'$path$': [f"{'hit' if i % 20 == 0 else 'miss'}{i}" for i in range(requests)]}
+    response_analysis = {'matching_requirements': ['match', {'response-code': {'code': [200]}}],
+                         'analysis_parameters': ['length-in-words']}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module = FuzzBaseModule(num_workers=num_workers, wordlists=wordlists, response_analysis=response_analysis)
+        module.requester_client = CountingRequester(stream_responses=mode == 'streamed')
+        start = time.perf_counter()
+        asyncio.run(module.run_fuzz({'method': 'GET', 'url': url + '/$path$'}, 'product'))
+        total = time.perf_counter() - start
+
+    results[mode] = {'total_time': total, 'kept': len(list(module.base_fuzz_results())),
+                     'downloaded_mb': module.requester_client.downloaded / 1024 / 1024,
+                     'connections': module.requester_client.pool_stats.connections_opened,
+                     'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    body_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    not_found = b"<p>not found</p>" * (body_kb * 1024 // 16)
+
+    def handler(method, path, headers, body):
+        if path.startswith('/hit'):
+            return 200, {}, b"found it"
+        return 404, {}, not_found
+
+    with StandInServer(handler=handler) as server:
+        manager = multiprocessing.Manager()
+        results = manager.dict()
+        ctx = multiprocessing.get_context('spawn')
+        for mode in ('buffered', 'streamed'):
+            process = ctx.Process(target=run_mode, args=(mode, requests, workers, server.url, results))
+            process.start()
+            process.join()
+
+    print(f"{requests} requests (1 in 20 found), {body_kb} KB not found bodies, {workers} workers")
+    for mode in ('buffered', 'streamed'):
+        result = results[mode]
+        print(f"{mode:<10} kept {result['kept']:>5}  downloaded {result['downloaded_mb']:>8.1f} MB  "
+              f"connections {result['connections']:>5}  total {result['total_time']:>6.2f} s  "
+              f"peak RSS {result['peak_rss_mb']:>7.1f} MB")
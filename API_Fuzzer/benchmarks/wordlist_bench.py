@@ -0,0 +1,74 @@
+"""
+Startup time and resident memory of a big wordlist read into a list (what load_wordlist did) against a memory-mapped
+wordlist, with its line index built (first open) and mapped from its cache (next opens), and the time to read random
+words and to iterate over the whole wordlist
+
+Each mode runs in its own process, the memory is the growth of its RSS (the pages of the mapped file read during the
+run are counted, they are shared with the page cache).
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.wordlist_bench [words]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from utils.mapped_wordlist import MappedWordlist
+
+
+def rss() -> int:
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def run_mode(mode, path, results):
+    before = rss()
+    start = time.perf_counter()
+    if mode == 'list':
+        with open(path) as file:
+            wordlist = [line.strip() for line in file]
+    else:
+        wordlist = MappedWordlist(path)
+    startup = time.perf_counter() - start
+    opened = rss() - before
+
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(100_000):
+        wordlist[rng.randrange(len(wordlist))]
+    lookups = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in wordlist:
+        pass
+    iteration = time.perf_counter() - start
+    results.put((len(wordlist), startup, opened, lookups, iteration, rss() - before))
+
+
+def run(mode, path):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run_mode, args=(mode, path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+if __name__ == '__main__':
+    words = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'words.txt')
+        rng = random.Random(0)
+        with open(path, 'w') as file:
+            for number in range(words):
+                file.write(f"{rng.choice(('api', 'admin', 'v1', 'user', 'backup'))}_{number}\n")
+        print(f"{words} words, {os.path.getsize(path) / 2 ** 20:.1f} MB")
+
+        for mode in ('list', 'mmap (index built)', 'mmap (index cached)'):
+            count, startup, opened, lookups, iteration, total = run(mode, path)
+            print(f"{mode:<20} startup {startup:>6.3f} s  RSS after open {opened / 2 ** 20:>7.1f} MB  "
+                  f"100k random words {lookups:>5.2f} s  iteration {iteration:>5.2f} s  "
+                  f"RSS at the end {total / 2 ** 20:>7.1f} MB")
@@ -0,0 +1,49 @@
+"""
+Time to get a wordlist sent by the interface ready for a run: its content split into a list (what
+process_wordlists_dict did for every run), cached the first time it's sent, and sent again (as its content: hashed
+and found in the cache, or as its id: mapped from the cache)
+
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.wordlist_cache_bench [megabytes]
+"""
+import random
+import sys
+import tempfile
+import time
+
+from utils.wordlist_cache import WordlistCache, content_id
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    rng = random.Random(0)
+    words, size = [], 0
+    while size < megabytes * 2 ** 20:
+        words.append(f"{rng.choice(('api', 'admin', 'v1', 'user', 'backup'))}_{rng.getrandbits(40):x}")
+        size += len(words[-1]) + 1
+    content = '\n'.join(words)
+    print(f"{len(words)} words, {len(content) / 2 ** 20:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as directory, WordlistCache(directory) as cache:
+        elapsed, lines = timed(content.splitlines)
+        print(f"{'splitlines':<28} {elapsed * 1000:>9.1f} ms  {len(lines)} words")
+
+        elapsed, wordlist = timed(lambda: cache.load(content, name='words.txt'))
+        print(f"{'first send (cached)':<28} {elapsed * 1000:>9.1f} ms  {len(wordlist)} words")
+        wordlist.close()
+
+        elapsed, wordlist = timed(lambda: cache.load(content, name='words.txt'))
+        print(f"{'sent again (content)':<28} {elapsed * 1000:>9.1f} ms  {len(wordlist)} words")
+        wordlist.close()
+
+        wordlist_id = content_id(content)
+        elapsed, wordlist = timed(lambda: cache.get(wordlist_id))
+        print(f"{'sent again (id)':<28} {elapsed * 1000:>9.1f} ms  {len(wordlist)} words")
+        wordlist.close()
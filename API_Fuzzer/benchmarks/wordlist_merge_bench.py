@@ -0,0 +1,49 @@
+"""
+Product merge of two wordlists: joined into one string (merge_into_wordlist, what the interface received) against
+streamed to a file (merge_wordlists), alone and with an external sort + dedupe. Peak RSS and time of each mode
+
+Each mode runs in its own process (peak RSS of the process).
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.wordlist_merge_bench [words per wordlist] [sort run MB]
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from utils.wordlist_merge import merge_wordlists
+from utils.wordlist_wrapper import Wordlist
+
+
+def run_mode(mode, words, run_megabytes, directory, results):
+    paths = [f"path{i}" for i in range(words)]
+    ids = [str(i) for i in range(words)]
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    output = os.path.join(directory, f"{mode}.txt")
+    if mode == 'joined string':
+        lines = Wordlist.merge_into_wordlist(['\n'.join(paths), '\n'.join(ids)], 'product', '/').count('\n') + 1
+    else:
+        lines = merge_wordlists([paths, ids], 'product', output, separator='/', dedupe=mode != 'streamed',
+                                sort=mode != 'streamed', run_bytes=int(run_megabytes * 2 ** 20),
+                                temporary_directory=directory)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    results.put((lines, elapsed, peak * 1024))
+
+
+if __name__ == '__main__':
+    words = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    run_megabytes = float(sys.argv[2]) if len(sys.argv) > 2 else 64
+    print(f"product of 2 x {words} words ({words * words} lines), sort runs of {run_megabytes} MB")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('joined string', 'streamed', 'sorted + deduped'):
+            results = multiprocessing.Queue()
+            process = multiprocessing.Process(target=run_mode, args=(mode, words, run_megabytes, directory, results))
+            process.start()
+            lines, elapsed, peak = results.get()
+            process.join()
+            print(f"{mode:<18} {lines:>10} lines  {elapsed:>6.2f} s  peak RSS +{peak / 2 ** 20:>7.1f} MB")
@@ -0,0 +1,65 @@
+"""
+Payload variants (hashcat rules, case, numeric suffixes, encodings) pre-built into a new wordlist against a lazy
+TransformedWordlist: time and memory to get the expanded wordlist ready, then to read random variants and to iterate
+
+The pre-built wordlist is limited to the first words (the whole expansion wouldn't fit in memory), the lazy one is
+the whole expansion. Memory measured with tracemalloc (in a second, untimed run).
+usage (from the API_Fuzzer directory):
+    python -m benchmarks.wordlist_transforms_bench [words] [pre-built words]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from utils.wordlist_transforms import TransformedWordlist
+
+RULES = [':', 'l', 'u', 'c', 'C', 't', 'r', 'd', '$1', '$!', '^_', 'c $1', 'c $!', 'sa@', 'se3', 'so0', 'si1',
+         'ss$', 'c sa@ $1', 'T0 T1']
+PIPELINE = [{'rules': RULES}, {'case': ['keep', 'upper']}, {'suffixes': {'range': [0, 100]}},
+            {'encodings': [[], ['urlencode'], ['base64']]}]
+
+
+def measured(function):
+    # timed without tracemalloc (it slows allocations down), then run again to measure the memory
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = function()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, held
+
+
+def access(wordlist, count=100_000):
+    rng = random.Random(1)
+    size = len(wordlist)
+    start = time.perf_counter()
+    for _ in range(count):
+        wordlist[rng.randrange(size)]
+    lookups = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in zip(range(1_000_000), wordlist):
+        pass
+    return lookups, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    words = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    prebuilt_words = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    base = [f"{random.Random(i).choice(('admin', 'api', 'user', 'session', 'backup'))}{i}" for i in range(words)]
+
+    lazy, elapsed, held = measured(lambda: TransformedWordlist(base, PIPELINE))
+    print(f"{len(lazy)} variants ({lazy.variants} per word)")
+    lookups, iteration = access(lazy)
+    print(f"{'lazy (all words)':<26} ready in {elapsed * 1000:>8.2f} ms  {held / 2 ** 20:>8.2f} MB  "
+          f"100k random variants {lookups:>5.2f} s  1M iterated {iteration:>5.2f} s")
+
+    prebuilt, elapsed, held = measured(lambda: list(TransformedWordlist(base[:prebuilt_words], PIPELINE)))
+    lookups, iteration = access(prebuilt)
+    print(f"{f'pre-built ({prebuilt_words} words)':<26} ready in {elapsed * 1000:>8.0f} ms  {held / 2 ** 20:>8.2f} MB  "
+          f"100k random variants {lookups:>5.2f} s  1M iterated {iteration:>5.2f} s")
+    print(f"pre-building all {words} words: ~{elapsed * words / prebuilt_words:.0f} s, "
+          f"~{held * words / prebuilt_words / 2 ** 30:.1f} GB")
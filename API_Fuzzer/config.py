@@ -20,8 +20,28 @@ config_template = {
     'fuzz_engine': {
         'workers': int,
         'timeout': int,
-        'rate_limit': int,
+        'rate_limit': int | float,
         'concurrency_limit': int,
+        'burst': int,
+        'queue_size': int,
+        'keep_alive': bool,
+        'max_connections': int,
+        'max_keepalive_connections': int,
+        'keepalive_expiry': float | int,
+        'per_origin': bool,
+        'workers_per_origin': int,
+        'stream_responses': bool,
+        'keep_body': bool,
+        'max_body_size': int,
+        'result_records': bool,
+        'result_store': str,
+        'store_bodies': bool,
+        'store_batch_size': int,
+        'calibrate': bool,
+        'calibration_requests': int,
+        'anomaly_z_threshold': int | float,
+        'wordlist_cache': str,
+        'wordlist_cache_size': int,
     },
     'fuzz_generator': {
 
@@ -47,6 +67,12 @@ class Config(dict):
         },
         "fuzz_engine": {
             "workers": 4,
+            "queue_size": 1000,
+            "keep_alive": True,
+            "max_connections": 100,
+            "max_keepalive_connections": 20,
+            "keepalive_expiry": 5.0,
+            "result_records": True,
         },
     }
 
@@ -0,0 +1,200 @@
+import math
+import random
+import string
+from collections import Counter
+
+import httpx
+
+from fuzzer_core.engine.response_clusters import SimHasher
+from fuzzer_core.engine.response_metrics import ResponseMetrics
+
+"""
+NOTES:
+
+- calibration: before a run, a few requests are sent with random noise in each fuzz point in turn (the other fuzz
+  points keep the words of the first combination). Noise can't match anything on the target, its responses are what
+  the target answers to "nothing interesting": the baseline profile
+- the profile keeps the status codes, running mean / variance (Welford: one pass, no sample kept) of the length in
+  bytes, words and lines and of the elapsed time, and the SimHash fingerprints of the calibration bodies
+- a response deviates when its status code wasn't seen, a metric is further from its mean than z_threshold standard
+  deviations (and than a minimum delta: a handful of calibration samples can give a std of 0), it's slower than usual,
+  or its fingerprint is more than max_distance bits from every baseline fingerprint
+- the noise has varied lengths, so a body echoing the payload already moves the byte length of the calibration
+  responses. Words and lines don't move with a one word payload, their minimum deltas are small
+- with learn, the responses that don't deviate update the statistics: the mean and variance follow the target
+  while the run goes on (the fingerprints don't, the baseline pages are the calibration ones)
+- the analyser only keeps the responses that deviate (their deviations are the response-anomaly option), failed
+  requests are always kept
+"""
+
+DEFAULT_CALIBRATION_REQUESTS = 3
+DEFAULT_Z_THRESHOLD = 4.0
+# near duplicates of a small page spread over ~12 bits around each other, unrelated pages are ~32 bits apart (the
+# baseline fingerprints are a handful, they're compared one by one: no bands, the distance can be wider than the
+# cluster index one)
+DEFAULT_BASELINE_DISTANCE = 12
+
+# metric: minimum deviation from the mean (whatever the standard deviation)
+MIN_DELTAS = {'bytes': 64, 'words': 3, 'lines': 2}
+# relative part of the minimum deviation of the byte length (bodies of a few KB change by more than 64 bytes)
+BYTES_MIN_RATIO = 0.05
+# a response is only slow if it's at least this much slower than the mean (seconds)
+MIN_ELAPSED_DELTA = 1.0
+
+NOISE_ALPHABET = string.ascii_letters + string.digits
+
+
+def noise_words(count: int, rng: random.Random = None) -> list[str]:
+    """
+    :param count: number of words
+    :param rng: random generator
+    :return: random alphanumeric words of varied lengths (6 to 32 characters)
+    """
+    rng = rng or random.Random()
+    return [''.join(rng.choices(NOISE_ALPHABET, k=rng.randint(6, 32))) for _ in range(count)]
+
+
+def calibration_tuples(first_tuple, requests_per_point: int = DEFAULT_CALIBRATION_REQUESTS,
+                       rng: random.Random = None) -> list[tuple]:
+    """
+    :param first_tuple: fuzz tuple of the first combination (words kept in the other fuzz points)
+    :param requests_per_point: noise requests for each fuzz point
+    :param rng: random generator
+    :return: fuzz tuples, each one with noise in one fuzz point
+    """
+    tuples = []
+    for point in range(len(first_tuple)):
+        for noise in noise_words(requests_per_point, rng):
+            words = list(first_tuple)
+            words[point] = noise
+            tuples.append(tuple(words))
+    return tuples
+
+
+class RunningStats:
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # sum of the squared differences to the mean
+        self.m2 = 0.0
+
+    def update(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def deviates(self, value: float, z_threshold: float, min_delta: float) -> bool:
+        """
+        :return: True if the value is further from the mean than z_threshold standard deviations and min_delta
+        """
+        return self.count > 0 and abs(value - self.mean) > max(z_threshold * self.std, min_delta)
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'mean': self.mean, 'std': self.std}
+
+    def __repr__(self):
+        return f"<RunningStats n={self.count} mean={self.mean:.2f} std={self.std:.2f}>"
+
+
+class BaselineProfile:
+    def __init__(self, z_threshold: float = DEFAULT_Z_THRESHOLD, max_distance: int = DEFAULT_BASELINE_DISTANCE,
+                 learn: bool = True, simhasher: SimHasher = None):
+        """
+        :param z_threshold: standard deviations from the mean a metric must be to deviate
+        :param max_distance: bits a fingerprint can differ by from a baseline fingerprint
+        :param learn: the responses that don't deviate update the statistics
+        :param simhasher: fingerprints the bodies
+        """
+        self.z_threshold = z_threshold
+        self.max_distance = max_distance
+        self.learn = learn
+        self.simhasher = SimHasher() if simhasher is None else simhasher
+
+        self.status_codes = Counter()
+        self.stats = {metric: RunningStats() for metric in (*MIN_DELTAS, 'elapsed')}
+        self.fingerprints = set()
+        self.observed = 0
+        self.deviating = 0
+
+    @staticmethod
+    def measure(response: httpx.Response) -> dict:
+        metrics = ResponseMetrics.of_response(response)
+        measures = {'bytes': metrics.bytes, 'words': metrics.words, 'lines': metrics.length_in_lines}
+        try:
+            measures['elapsed'] = response.elapsed.total_seconds()
+        except RuntimeError:
+            # response never closed
+            pass
+        return measures
+
+    def update(self, measures: dict):
+        for metric, value in measures.items():
+            self.stats[metric].update(value)
+
+    def add(self, response: httpx.Response | None):
+        """
+        Adds a calibration response to the baseline
+        :param response: response to a noise request (None if the request failed: ignored)
+        :return:
+        """
+        if response is None:
+            return
+        self.status_codes[response.status_code] += 1
+        self.update(self.measure(response))
+        self.fingerprints.add(self.simhasher.fingerprint(response.content))
+
+    def deviations(self, response: httpx.Response | None) -> list[str]:
+        """
+        Compares a response to the baseline (and learns from it if it doesn't deviate)
+        :param response: response with its body read (None if the request failed)
+        :return: what deviates from the baseline: 'failed', 'status', 'bytes', 'words', 'lines', 'elapsed', 'content'
+        """
+        self.observed += 1
+        if response is None:
+            self.deviating += 1
+            return ['failed']
+
+        deviations = [] if response.status_code in self.status_codes else ['status']
+        measures = self.measure(response)
+        for metric, stats in self.stats.items():
+            value = measures.get(metric)
+            if value is None:
+                continue
+            if metric == 'elapsed':
+                # only slower than usual is interesting
+                if stats.count and value - stats.mean > max(self.z_threshold * stats.std, MIN_ELAPSED_DELTA):
+                    deviations.append(metric)
+                continue
+            min_delta = MIN_DELTAS[metric]
+            if metric == 'bytes':
+                min_delta = max(min_delta, BYTES_MIN_RATIO * stats.mean)
+            if stats.deviates(value, self.z_threshold, min_delta):
+                deviations.append(metric)
+
+        if self.fingerprints:
+            fingerprint = self.simhasher.fingerprint(response.content)
+            if fingerprint not in self.fingerprints and all((fingerprint ^ known).bit_count() > self.max_distance
+                                                            for known in self.fingerprints):
+                deviations.append('content')
+
+        if deviations:
+            self.deviating += 1
+        elif self.learn:
+            self.update(measures)
+        return deviations
+
+    def as_dict(self) -> dict:
+        return {'status_codes': dict(self.status_codes), 'stats': {metric: stats.as_dict()
+                                                                   for metric, stats in self.stats.items()},
+                'fingerprints': len(self.fingerprints), 'observed': self.observed, 'deviating': self.deviating}
+
+    def __repr__(self):
+        return f"<BaselineProfile statuses={dict(self.status_codes)} observed={self.observed} " \
+               f"deviating={self.deviating}>"
@@ -0,0 +1,103 @@
+import asyncio
+import contextlib
+import io
+import random
+import statistics
+import unittest
+
+import httpx
+
+from fuzzer_core.engine.baseline import RunningStats, BaselineProfile, calibration_tuples
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.response_analyser import ResponseAnalyser
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+from utils.wordlist_transforms import TransformedWordlist
+
+NOT_FOUND = (b"<html><head><title>404 Not Found</title></head><body><h1>Not Found</h1><p>The requested URL %s was "
+             b"not found on this server.</p><p>Request id %d</p><hr><address>Apache/2.4.41 (Ubuntu) Server at "
+             b"example.com Port 80</address></body></html>")
+
+
+def handler(method, path, headers, body):
+    if path == '/api/admin':
+        return 200, {}, b'{"users": [{"id": 1, "name": "alice", "role": "admin"}], "total": 1}'
+    if path == '/api/debug':
+        # same status, much longer body
+        return 404, {}, NOT_FOUND % (path.encode(), 0) + b"\n<pre>Traceback (most recent call last):\n" * 20
+    return 404, {}, NOT_FOUND % (path.encode(), random.getrandbits(32))
+
+
+class TestBaseline(unittest.TestCase):
+
+    def test_running_stats(self):
+        values = [random.gauss(100, 15) for _ in range(500)]
+        stats = RunningStats()
+        for value in values:
+            stats.update(value)
+        self.assertAlmostEqual(stats.mean, statistics.mean(values))
+        self.assertAlmostEqual(stats.std, statistics.stdev(values))
+        self.assertTrue(stats.deviates(stats.mean + 5 * stats.std, z_threshold=4, min_delta=0))
+        self.assertFalse(stats.deviates(stats.mean + 3 * stats.std, z_threshold=4, min_delta=0))
+        self.assertFalse(RunningStats().deviates(1000, z_threshold=4, min_delta=0))
+
+    def test_calibration_tuples(self):
+        tuples = calibration_tuples(('a', 'b'), requests_per_point=3, rng=random.Random(1))
+        self.assertEqual(len(tuples), 6)
+        self.assertTrue(all(words[1] == 'b' and words[0] != 'a' for words in tuples[:3]))
+        self.assertTrue(all(words[0] == 'a' and 6 <= len(words[1]) <= 32 for words in tuples[3:]))
+
+    def test_deviations(self):
+        request = httpx.Request('GET', 'http://127.0.0.1/')
+        profile = BaselineProfile()
+        for i in range(5):
+            profile.add(httpx.Response(404, content=NOT_FOUND % (b"noise%d" % i, i), request=request))
+
+        def deviations(status, content):
+            return profile.deviations(httpx.Response(status, content=content, request=request))
+
+        self.assertEqual(deviations(404, NOT_FOUND % (b"/index.php", 77)), [])
+        self.assertEqual(deviations(200, NOT_FOUND % (b"/index.php", 77)), ['status'])
+        self.assertEqual(deviations(404, b"{}"), ['bytes', 'words', 'content'])
+        self.assertEqual(profile.deviations(None), ['failed'])
+        # the normal response was learnt
+        self.assertEqual(profile.stats['bytes'].count, 6)
+        self.assertEqual((profile.observed, profile.deviating), (4, 3))
+
+        analyser = ResponseAnalyser(match_hide=None, analysis=['response-anomaly'])
+        analyser.baseline = profile
+        self.assertIsNone(analyser.evaluate(httpx.Response(404, content=NOT_FOUND % (b"/a", 1), request=request)))
+        self.assertEqual(analyser.evaluate(httpx.Response(500, content=b"oops", request=request)),
+                         {'response-anomaly': ['status', 'bytes', 'words', 'content']})
+        self.assertEqual(analyser.rule_stats()['baseline']['filtered'], 1)
+
+    def test_calibrated_run_keeps_only_anomalies(self):
+        wordlists = {'$path$': [f"missing{i}" for i in range(40)] + ['admin', 'debug']}
+        config = {'fuzz_engine': {'calibrate': True, 'calibration_requests': 4, 'result_records': True}}
+        with StandInServer(handler=handler) as server, contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=4, wordlists=wordlists, config=config)
+            asyncio.run(module.run_fuzz({'method': 'GET', 'url': server.url + '/api/$path$'}, None))
+
+        kept = sorted((result.url.rsplit('/', 1)[1], analysis['response-anomaly'])
+                      for result, analysis in module.base_fuzz_results(response=True))
+        self.assertEqual([path for path, _ in kept], ['admin', 'debug'])
+        self.assertIn('status', kept[0][1])
+        self.assertIn('lines', kept[1][1])
+
+        stats = module.match_stats()
+        self.assertEqual((stats['evaluated'], stats['kept'], stats['baseline']['filtered']), (42, 2, 40))
+        self.assertEqual(stats['baseline']['status_codes'], {404: 4})
+
+    def test_calibration_of_a_space_bigger_than_len_allows(self):
+        # 10 ** 30 combinations: above sys.maxsize
+        words = TransformedWordlist(['w'], [{'suffixes': {'range': [0, 10 ** 10]}}])
+        config = {'fuzz_engine': {'calibrate': True, 'calibration_requests': 3}}
+        with StandInServer(handler=handler) as server, contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=2, wordlists={'$a$': words, '$b$': words, '$c$': words},
+                                    config=config)
+            profile = asyncio.run(module.calibrate_baseline(
+                {'method': 'GET', 'url': server.url + '/api/$a$/$b$/$c$'}, 'product'))
+        self.assertEqual(set(profile.status_codes), {404})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import contextlib
+import io
+import itertools
+import unittest
+
+from fuzzer_core.modules.fuzz_base_module import create_fuzz_tuples, load_fuzzwords_yields
+from utils.combination_space import ProductSpace, ZipSpace, ChainSpace
+
+
+class TestCombinationSpace(unittest.TestCase):
+
+    def setUp(self):
+        self.lists = [[1, 2, 3], ['a', 'b'], ['x', 'y', 'z', 'w']]
+
+    def test_product_matches_itertools(self):
+        space = ProductSpace(self.lists)
+        expected = list(itertools.product(*self.lists))
+        self.assertEqual(len(space), len(expected))
+        self.assertEqual([space[i] for i in range(len(space))], expected)
+        self.assertEqual(space[-1], expected[-1])
+        with self.assertRaises(IndexError):
+            space[len(expected)]
+
+    def test_slices_are_lazy_views(self):
+        space = ProductSpace(self.lists)
+        expected = list(itertools.product(*self.lists))
+        for sl in (slice(5, 17), slice(None, None, 3), slice(-4, None), slice(20, 2, -2)):
+            self.assertEqual(list(space[sl]), expected[sl])
+        self.assertEqual(list(space[3:20][2:10:3]), expected[3:20][2:10:3])
+
+    def test_shards_cover_space_in_order(self):
+        space = ProductSpace(self.lists)
+        shards = space.shards(5)
+        self.assertEqual([shard.size for shard in shards], [5, 5, 5, 5, 4])
+        self.assertEqual([item for shard in shards for item in shard], list(space))
+
+    def test_huge_product_is_not_materialised(self):
+        words = range(10000)
+        space = ProductSpace([words, words, words])
+        self.assertEqual(space.size, 10 ** 12)
+        self.assertEqual(space[123456789012], (1234, 5678, 9012))
+        self.assertEqual(space[space.size - 1:].size, 1)
+
+    def test_zip_and_chain(self):
+        self.assertEqual(list(ZipSpace(self.lists)), list(zip(*self.lists)))
+        self.assertEqual(ZipSpace(self.lists)[1], (2, 'b', 'y'))
+        chain = ChainSpace(self.lists)
+        self.assertEqual([chain[i] for i in range(len(chain))], list(itertools.chain(*self.lists)))
+
+    def test_load_fuzzwords_from_index(self):
+        wordlists = {'$a$': ['1', '2', '3'], '$b$': ['x', 'y']}
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsInstance(create_fuzz_tuples(list(wordlists.values()), 'product'), ProductSpace)
+            loaded = list(load_fuzzwords_yields('/$a$/$b$', wordlists, 'product', start=2, stop=5))
+        self.assertEqual(loaded, ['/2/x', '/2/y', '/3/x'])
+
+
+if __name__ == "__main__":
+    unittest.main()
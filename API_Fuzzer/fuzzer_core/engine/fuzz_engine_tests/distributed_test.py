@@ -0,0 +1,124 @@
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import unittest
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.modules.distributed import Coordinator, read_message, write_message, run_worker_node
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+
+async def take_lease(port):
+    # node that takes a lease and never sends anything about it
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    write_message(writer, {'type': 'hello', 'worker': 'lost'})
+    await read_message(reader)
+    write_message(writer, {'type': 'lease'})
+    lease = await read_message(reader)
+    return lease, writer
+
+
+class TestDistributedRun(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.context = multiprocessing.get_context('spawn')
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.module = FuzzBaseModule(num_workers=5, wordlists={'$path$': [f"p{i}" for i in range(100)]})
+        self.req_details = {'method': 'GET', 'url': self.server.url + '/$path$'}
+
+    def tearDown(self):
+        self.server.stop()
+
+    def start_nodes(self, port, count):
+        nodes = [self.context.Process(target=run_worker_node, args=('127.0.0.1', port, f"node{i}"), daemon=True)
+                 for i in range(count)]
+        for node in nodes:
+            node.start()
+        return nodes
+
+    async def join_nodes(self, nodes):
+        for node in nodes:
+            await asyncio.to_thread(node.join, 30)
+
+    async def test_ranges_are_spread_over_nodes_and_merged(self):
+        coordinator = await Coordinator.for_fuzz(self.module, self.req_details, None, chunk_size=10).start()
+        nodes = self.start_nodes(coordinator.port, 2)
+        await asyncio.wait_for(coordinator.wait(), 60)
+        await self.join_nodes(nodes)
+
+        urls = [record['url'] for record, _ in coordinator.results(response=True)]
+        self.assertEqual(sorted(urls), sorted(f"{self.server.url}/p{i}" for i in range(100)))
+
+        progress = coordinator.progress()
+        self.assertTrue(progress['done'])
+        self.assertEqual((progress['completed'], progress['pending'], progress['leased']), (100, 0, 0))
+        self.assertEqual(len(progress['workers']), 2)
+        self.assertEqual(sum(worker['leases'] for worker in progress['workers'].values()), 10)
+        self.assertEqual(sum(worker['requests'] for worker in progress['workers'].values()), 100)
+
+    async def test_lost_and_expired_leases_are_leased_again(self):
+        coordinator = await Coordinator.for_fuzz(self.module, self.req_details, None, start=20, chunk_size=20,
+                                                 lease_ttl=0.4).start()
+        # the lease is lost with its connection, leased again, then expires
+        lost, writer = await take_lease(coordinator.port)
+        writer.close()
+        await asyncio.sleep(0.05)
+        expired, _ = await take_lease(coordinator.port)
+        self.assertEqual([(lost['start'], lost['stop']), (expired['start'], expired['stop'])], [(20, 40), (20, 40)])
+
+        await asyncio.sleep(0.6)
+        self.assertEqual(coordinator.progress()['retried'], 2)
+
+        nodes = self.start_nodes(coordinator.port, 1)
+        await asyncio.wait_for(coordinator.wait(), 60)
+        await self.join_nodes(nodes)
+
+        urls = [record['url'] for record, _ in coordinator.results(response=True)]
+        self.assertEqual(sorted(urls), sorted(f"{self.server.url}/p{i}" for i in range(20, 100)))
+        self.assertEqual(coordinator.progress()['completed'], 80)
+
+    async def test_results_are_sent_by_a_coroutine(self):
+        batches = []
+
+        async def send(batch):
+            # a node drains its connection after each batch
+            await asyncio.sleep(0)
+            batches.append(len(batch))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            await self.module.stream_results(self.module.run_fuzz(self.req_details, None, start=0, stop=30), send, 8)
+        self.assertEqual(sum(batches), 30)
+        self.assertLessEqual(max(batches), 8)
+
+    async def test_range_given_up_after_max_attempts(self):
+        coordinator = await Coordinator(self.module.init_kwargs, 'run_fuzz', {}, size=5, lease_ttl=0.2,
+                                        max_attempts=2).start()
+        for _ in range(2):
+            _, writer = await take_lease(coordinator.port)
+            writer.close()
+            await asyncio.sleep(0.05)
+
+        await asyncio.wait_for(coordinator.wait(), 5)
+        progress = coordinator.progress()
+        self.assertEqual((progress['failed'], progress['completed'], progress['retried']), (5, 0, 1))
+
+    async def test_range_bigger_than_len_allows(self):
+        # 10 ** 30 combinations: above sys.maxsize, the chunks are only made when they're leased
+        coordinator = await Coordinator(self.module.init_kwargs, 'run_fuzz', {}, size=10 ** 30, start=5,
+                                        chunk_size=10 ** 20).start()
+        lost, writer = await take_lease(coordinator.port)
+        writer.close()
+        await asyncio.sleep(0.05)
+        leased, writer = await take_lease(coordinator.port)
+        self.assertEqual([(lost['start'], lost['stop']), (leased['start'], leased['stop'])], [(5, 10 ** 20 + 5)] * 2)
+
+        progress = coordinator.progress()
+        self.assertEqual((progress['total'], progress['leased'], progress['pending']),
+                         (10 ** 30 - 5, 10 ** 20, 10 ** 30 - 10 ** 20 - 5))
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import contextlib
+import io
+import pickle
+import unittest
+
+import httpx
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.fuzz_result import FuzzResult
+from fuzzer_core.engine.queues.request_queue import FUZZ_INDEX_EXTENSION
+from fuzzer_core.modules.distributed import result_record
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+
+def handler(method, path, headers, body):
+    if path.endswith('/p3'):
+        return 404, {}, b""
+    return 200, {}, b"body of " + path.encode() + b"\nline two"
+
+
+class TestFuzzResult(unittest.TestCase):
+
+    def run_module(self, response_analysis=None, **kwargs):
+        wordlists = {'$path$': [f"p{i}" for i in range(20)]}
+        config = {'fuzz_engine': {'result_records': True}}
+        with StandInServer(handler=handler) as server, contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=4, wordlists=wordlists, config=config,
+                                    response_analysis=response_analysis or {'analysis_parameters': ['response-code']})
+            asyncio.run(module.run_fuzz({'method': 'GET', 'url': server.url + '/$path$'}, None, **kwargs))
+        return sorted(module.base_fuzz_results(response=True), key=lambda item: item[0].fuzz_index)
+
+    def test_records_of_a_run(self):
+        results = [result for result, _ in self.run_module()]
+        self.assertEqual([result.fuzz_index for result in results], list(range(20)))
+        self.assertTrue(all(isinstance(result, FuzzResult) for result in results))
+
+        first = results[0]
+        body = b"body of /p0\nline two"
+        self.assertEqual((first.method, first.url.rsplit('/', 1)[1], first.status_code), ('GET', 'p0', 200))
+        self.assertEqual((first.length, first.lines, first.words, first.chars), (len(body), 2, 5, len(body)))
+        # default hasher of the analyser: blake2b, 8 bytes
+        self.assertEqual(len(first.body_hash), 8)
+        self.assertGreater(first.elapsed, 0)
+        self.assertEqual((results[3].status_code, results[3].length), (404, 0))
+
+    def test_index_of_a_range(self):
+        results = [result for result, _ in self.run_module(start=5, stop=10)]
+        self.assertEqual([result.fuzz_index for result in results], list(range(5, 10)))
+        self.assertTrue(all(result.url.endswith(f"/p{result.fuzz_index}") for result in results))
+
+    def test_hash_of_the_analyser(self):
+        # the hash of a record is the response-hash analysis, with the configured algorithm
+        results = self.run_module(response_analysis={'analysis_parameters': ['response-hash'],
+                                                     'hash_algorithm': 'md5'})
+        self.assertTrue(all(result.hexdigest == analysis['response-hash'] for result, analysis in results))
+        self.assertEqual({len(result.body_hash) for result, _ in results}, {16})
+
+    def test_failed_and_discarded_responses(self):
+        request = httpx.Request('GET', 'http://127.0.0.1/a', extensions={FUZZ_INDEX_EXTENSION: 7})
+        failed = FuzzResult.from_response(None, request)
+        self.assertEqual((failed.fuzz_index, failed.status_code, failed.length), (7, None, None))
+
+        async def stream():
+            yield b"never read"
+
+        discarded = FuzzResult.from_response(httpx.Response(200, headers={'Content-Length': '10'}, content=stream(),
+                                                            request=request))
+        self.assertEqual((discarded.length, discarded.words, discarded.body_hash), (10, None, None))
+
+        record = FuzzResult.from_response(httpx.Response(200, content=b"abc", request=request))
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+        self.assertEqual(result_record(record, {'response-code': 200}), [record.as_dict(), {'response-code': 200}])
+
+
+if __name__ == "__main__":
+    unittest.main()
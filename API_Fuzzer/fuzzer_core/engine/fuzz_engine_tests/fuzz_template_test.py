@@ -0,0 +1,48 @@
+import contextlib
+import io
+import unittest
+
+from fuzzer_core.engine.fuzz_template import FuzzTemplate
+from fuzzer_core.modules.fuzz_base_module import load_fuzzwords, BadInputException
+
+
+class TestFuzzTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.request = {'method': 'POST', 'url': 'http://127.0.0.1/$path$',
+                        'headers': {'X-$hname$': 'v', 'Accept': '*/*'},
+                        'json': {'ids': [1, '$id$'], 'nested': {'q': 'a {b} $id2$ c'}}, 'timeout': 3}
+
+    def test_fields_follow_order_of_appearance(self):
+        template = FuzzTemplate(self.request)
+        self.assertEqual(template.fields, ['$path$', '$hname$', '$id$', '$id2$'])
+
+    def test_render_fills_every_slot(self):
+        rendered = FuzzTemplate(self.request).render(('users', 'Token', 7, 'x'))
+        self.assertEqual(rendered, {'method': 'POST', 'url': 'http://127.0.0.1/users',
+                                    'headers': {'X-Token': 'v', 'Accept': '*/*'},
+                                    'json': {'ids': [1, '7'], 'nested': {'q': 'a {b} x c'}}, 'timeout': 3})
+
+    def test_payloads_with_quotes_are_loaded_as_they_are(self):
+        payloads = ["' OR '1'='1", '"); DROP TABLE x; --', "\\'}]", '{0}']
+        template = FuzzTemplate({'url': 'http://127.0.0.1/', 'params': {'q': 'pre-$p$'}})
+        for payload in payloads:
+            self.assertEqual(template.render((payload,))['params']['q'], 'pre-' + payload)
+
+    def test_renders_do_not_share_containers(self):
+        template = FuzzTemplate(self.request)
+        first, second = template.render(('a', 'b', 'c', 'd')), template.render(('a', 'b', 'c', 'd'))
+        first['headers']['Accept'] = 'changed'
+        self.assertEqual(second['headers']['Accept'], '*/*')
+
+    def test_matches_legacy_string_loading(self):
+        wordlists = {'$a$': ['1', '2'], '$b$': ['x', 'y']}
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(load_fuzzwords('GET /$a$?q=$b$', wordlists, 'product'),
+                             ['GET /1?q=x', 'GET /1?q=y', 'GET /2?q=x', 'GET /2?q=y'])
+            with self.assertRaises(BadInputException):
+                load_fuzzwords('/$a$/$a$', {'$a$': ['1']}, 'product')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import pickle
+import random
+import tempfile
+import unittest
+
+from utils.combination_space import ProductSpace
+from utils.loaders import load_wordlist
+from utils.mapped_wordlist import MappedWordlist, index_lines
+from utils.wordlist_wrapper import Wordlist
+
+
+class TestMappedWordlist(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'words.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content: bytes):
+        with open(self.path, 'wb') as file:
+            file.write(content)
+
+    def test_index_lines_matches_splitlines(self):
+        random.seed(5)
+        contents = [b'', b'\n', b'a', b'a\n\n', b'admin\nuser\n' + b'x' * 100 + b'\nlast']
+        contents += [bytes(random.choice(b'ab\n') for _ in range(random.randint(0, 60))) for _ in range(300)]
+        for content in contents:
+            expected = content.decode().splitlines()
+            # chunks smaller than a line, and than a word
+            for chunk_size in (1, 3, 16, 1024):
+                starts = index_lines(content, chunk_size)
+                self.assertEqual([content[starts[i]:starts[i + 1] - 1].decode() for i in range(len(starts) - 1)],
+                                 expected, (content, chunk_size))
+
+    def test_words(self):
+        self.write(b'admin\r\nuser\n\n\xff\xfe\nlast')
+        with MappedWordlist(self.path) as wordlist:
+            self.assertEqual(len(wordlist), 5)
+            self.assertEqual(list(wordlist), ['admin', 'user', '', '��', 'last'])
+            self.assertEqual((wordlist[-1], wordlist[1:3]), ('last', ['user', '']))
+            with self.assertRaises(IndexError):
+                wordlist[5]
+
+        self.write(b'')
+        self.assertEqual(len(MappedWordlist(self.path)), 0)
+        with self.assertRaises(FileNotFoundError):
+            MappedWordlist(self.path + '.missing')
+
+    def test_cached_index(self):
+        self.write(b'\n'.join(b'word%d' % i for i in range(1000)) + b'\n')
+        first = MappedWordlist(self.path)
+        self.assertTrue(os.path.exists(first.index_path))
+        second = MappedWordlist(self.path)
+        # mapped from the cache, not rebuilt
+        self.assertIsInstance(second._starts, memoryview)
+        self.assertEqual(list(second), list(first))
+        first.close()
+        second.close()
+
+        # the file changed: the cached index is stale and rebuilt
+        self.write(b'a\nb\n')
+        os.utime(self.path, ns=(1, 1))
+        with MappedWordlist(self.path) as wordlist:
+            self.assertEqual(list(wordlist), ['a', 'b'])
+
+        # sent to another process as its path
+        with MappedWordlist(self.path) as wordlist:
+            copy = pickle.loads(pickle.dumps(wordlist))
+            self.assertEqual((copy.path, list(copy)), (self.path, ['a', 'b']))
+            copy.close()
+
+    def test_loaders(self):
+        self.write(b'admin\nuser:secret\n')
+        words = load_wordlist(self.path)
+        self.assertIsInstance(words, MappedWordlist)
+        self.assertEqual(list(words), ['admin', 'user:secret'])
+        words.close()
+        self.assertEqual(load_wordlist(self.path, separator=':'), ['admin', ('user', 'secret')])
+        with self.assertRaises(FileNotFoundError):
+            load_wordlist(self.path + '.missing')
+
+        wordlist = Wordlist(self.path)
+        self.assertEqual((len(wordlist), wordlist.next(), wordlist[1]), (2, 'admin', 'user:secret'))
+        self.assertEqual(list(ProductSpace([wordlist.wordlist, ['1', '2']]))[-1], ('user:secret', '2'))
+        wordlist.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
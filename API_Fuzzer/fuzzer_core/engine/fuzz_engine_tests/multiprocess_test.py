@@ -0,0 +1,105 @@
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import threading
+import time
+import unittest
+from unittest import mock
+
+from fuzzer_core.engine.fuzz_engine_tests.ratelimiter_test import FakeClock
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.ratelimiter import SharedRateLimiter
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule, shard_bounds
+
+
+class TestSharedRateLimiter(unittest.TestCase):
+
+    def test_limiters_share_the_same_timeline(self):
+        clock = FakeClock()
+        shared_tat = SharedRateLimiter.create_shared_tat()
+        first, second = (SharedRateLimiter(rate_limit=10, shared_tat=shared_tat, clock=clock) for _ in range(2))
+
+        delays = [round(limiter.reserve(), 6) for limiter in (first, second, first, second)]
+        self.assertEqual(delays, [0.0, 0.1, 0.2, 0.3])
+
+        second.pause_until(clock.now + 5)
+        self.assertAlmostEqual(first.reserve(), 5.0)
+
+
+def recording_handler(hits):
+    lock = threading.Lock()
+
+    def handler(method, path, headers, body):
+        with lock:
+            hits.append(time.monotonic())
+        return 200, {"Content-Type": "text/plain"}, b"path " + path.encode()
+
+    return handler
+
+
+class TestMultiProcessRun(unittest.TestCase):
+
+    def run_processes(self, count, processes, rate_limiting=None, **kwargs):
+        hits = []
+        wordlists = {'$path$': [f"p{i}" for i in range(count)]}
+        with StandInServer(handler=recording_handler(hits)) as server, contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=5, wordlists=wordlists, rate_limiting=rate_limiting)
+            asyncio.run(module.run_fuzz_processes({'method': 'GET', 'url': server.url + '/$path$'}, None,
+                                                  processes=processes, **kwargs))
+        return module, hits
+
+    def test_shards_are_merged_into_one_result_stream(self):
+        module, hits = self.run_processes(60, processes=3)
+
+        results = [resp for resp, _ in module.base_fuzz_results(response=True)]
+        self.assertEqual(sorted(resp.text for resp in results), sorted(f"path /p{i}" for i in range(60)))
+        self.assertEqual(len(hits), 60)
+
+        stats = module.process_stats()
+        self.assertEqual([(stats[shard]['start'], stats[shard]['stop']) for shard in range(3)],
+                         [(0, 20), (20, 40), (40, 60)])
+        self.assertEqual(sum(shard['requests'] for shard in stats.values()), 60)
+
+    def test_start_stop_range(self):
+        module, hits = self.run_processes(60, processes=2, start=10, stop=20)
+        results = [resp.text for resp, _ in module.base_fuzz_results(response=True)]
+        self.assertEqual(sorted(results), sorted(f"path /p{i}" for i in range(10, 20)))
+
+    def test_shard_bounds(self):
+        self.assertEqual(shard_bounds(10, 3), [(0, 4), (4, 7), (7, 10)])
+        self.assertEqual(shard_bounds(10, 4, start=8), [(8, 9), (9, 10)])
+        self.assertEqual(shard_bounds(10, 4, start=10), [(10, 10)])
+        # 10 ** 30 combinations: above sys.maxsize
+        self.assertEqual(shard_bounds(10 ** 30, 2, start=1), [(1, 5 * 10 ** 29 + 1), (5 * 10 ** 29 + 1, 10 ** 30)])
+
+    def test_rate_limit_is_global(self):
+        shared_tats = []
+        create_shared_tat = SharedRateLimiter.create_shared_tat
+
+        def recording_create_shared_tat(context=None):
+            shared_tats.append(create_shared_tat(context))
+            return shared_tats[-1]
+
+        started = time.monotonic()
+        with mock.patch.object(SharedRateLimiter, 'create_shared_tat', staticmethod(recording_create_shared_tat)):
+            module, hits = self.run_processes(40, processes=2, rate_limiting={'rate_limit': 100})
+        self.assertEqual(len(hits), 40)
+        self.assertEqual([shard['rate_limiter']['acquired'] for shard in module.process_stats().values()], [20, 20])
+        # every send slot of both processes was reserved on the same timeline: 40 intervals of 10 ms after the first
+        # one (each process on its own would only have pushed it 20 intervals), whatever the load of the machine
+        self.assertEqual(len(shared_tats), 1)
+        self.assertGreaterEqual(shared_tats[0].value - started, 40 * 0.01 - 1e-6)
+
+    def test_adaptive_rate_split_below_the_min_rate(self):
+        # 0.5 rps per process: below the default min rate of the adaptive limiters
+        module, hits = self.run_processes(4, processes=4, rate_limiting={'rate_limit': 2, 'adaptive': True})
+        self.assertEqual(len(hits), 4)
+        stats = module.process_stats()
+        self.assertEqual([shard.get('error') for shard in stats.values()], [None] * 4)
+        self.assertEqual(sum(shard['requests'] for shard in stats.values()), 4)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import contextlib
+import io
+import threading
+import time
+import unittest
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.origin_scheduler import request_origin
+from fuzzer_core.engine.request_builder import RequestBuilder
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+
+def slow_handler(method, path, headers, body):
+    return 200, {}, b"slow", 0.1
+
+
+class TestOriginScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.slow_server = StandInServer(handler=slow_handler).start()
+        self.fast_server = StandInServer().start()
+
+    def tearDown(self):
+        self.slow_server.stop()
+        self.fast_server.stop()
+
+    def run_fuzz(self, config, rate_limiting=None):
+        # every request of the slow origin is generated before the ones of the fast origin
+        wordlists = {'$host$': [self.slow_server.url, self.fast_server.url], '$path$': [f"p{i}" for i in range(20)]}
+        with contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=4, wordlists=wordlists, config=config, rate_limiting=rate_limiting)
+            asyncio.run(module.run_fuzz({'method': 'GET', 'url': '$host$/$path$'}, 'product'))
+        return module
+
+    def test_slow_origin_does_not_stall_fast_origin(self):
+        module = self.run_fuzz({'fuzz_engine': {'per_origin': True}}, rate_limiting={'rate_limit': 1000})
+
+        self.assertEqual(len(list(module.base_fuzz_results(response=True))), 40)
+        stats = module.origin_stats()
+        slow, fast = stats[self.slow_server.url], stats[self.fast_server.url]
+
+        self.assertEqual((slow['requests'], fast['requests']), (20, 20))
+        self.assertTrue(slow['done'] and fast['done'])
+        # 20 requests of 100 ms on 4 workers for the slow origin, the fast one isn't waiting on it
+        self.assertGreaterEqual(slow['elapsed'], 0.5)
+        self.assertLess(fast['elapsed'], 0.3)
+        # each origin has its own connection pool and rate limiter
+        self.assertLessEqual(fast['pool']['connections_opened'], 4)
+        self.assertEqual(fast['rate_limiter']['acquired'], 20)
+        self.assertEqual((self.slow_server.requests, self.fast_server.requests), (20, 20))
+
+    def test_full_lane_does_not_hold_up_other_origins(self):
+        # queues of 2 requests and one worker per origin: the slow lane is full after its first requests
+        hits, lock = [], threading.Lock()
+
+        def recording_handler(method, path, headers, body):
+            with lock:
+                hits.append(time.monotonic())
+            return 200, {}, b"fast"
+
+        with StandInServer(handler=recording_handler) as fast_server:
+            wordlists = {'$host$': [self.slow_server.url, fast_server.url], '$path$': [f"p{i}" for i in range(8)]}
+            config = {'fuzz_engine': {'per_origin': True, 'queue_size': 2, 'workers_per_origin': 1}}
+            with contextlib.redirect_stdout(io.StringIO()):
+                module = FuzzBaseModule(num_workers=1, wordlists=wordlists, config=config)
+                started = time.monotonic()
+                asyncio.run(module.run_fuzz({'method': 'GET', 'url': '$host$/$path$'}, 'product'))
+
+        stats = module.origin_stats()
+        self.assertEqual((stats[self.slow_server.url]['requests'], stats[fast_server.url]['requests']), (8, 8))
+        self.assertIsNone(module.requester_client)
+        # 8 requests of 100 ms one after the other for the slow origin, the fast one is served from the start
+        self.assertGreaterEqual(stats[self.slow_server.url]['elapsed'], 0.8)
+        self.assertLess(max(hits) - started, 0.5)
+
+    def test_shared_run_has_no_origin_stats(self):
+        module = self.run_fuzz(None)
+        self.assertEqual(len(list(module.base_fuzz_results(response=True))), 40)
+        self.assertIsNone(module.origin_stats())
+
+    def test_request_origin(self):
+        builder = RequestBuilder()
+        request, _ = builder.build_request(req_dict={'method': 'GET', 'url': 'https://example.com:8443/a?b=c'})
+        self.assertEqual(request_origin(request), 'https://example.com:8443')
+        request, _ = builder.build_request(req_dict={'method': 'GET', 'url': 'http://example.com/a'})
+        self.assertEqual(request_origin(request), 'http://example.com')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+
+from fuzzer_core.engine.queues.request_queue import RequestQueue, NoMoreItems
+from fuzzer_core.engine.queues.response_queue import ResponseQueue
+from fuzzer_core.engine.request_builder import RequestBuilder
+
+
+def request_dicts(count):
+    for i in range(count):
+        yield {"method": "GET", "url": f"http://127.0.0.1/{i}"}
+
+
+async def consume(queue, taken):
+    while True:
+        try:
+            taken.append(await queue.get())
+        except NoMoreItems:
+            return
+
+
+class TestRequestQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def test_consumers_wait_for_slow_producer_then_all_exit(self):
+        queue = RequestQueue(request_builder=RequestBuilder(), maxsize=2)
+        taken = []
+
+        async def slow_producer():
+            for item in request_dicts(5):
+                await queue.put(item)
+                await asyncio.sleep(0.01)
+            await queue.close()
+
+        consumers = [consume(queue, taken) for _ in range(4)]
+        await asyncio.wait_for(asyncio.gather(slow_producer(), *consumers), timeout=5)
+
+        self.assertEqual(sorted(str(req.url) for req, _ in taken), sorted(d["url"] for d in request_dicts(5)))
+
+    async def test_producer_suspends_when_queue_is_full(self):
+        queue = RequestQueue(request_builder=RequestBuilder(), maxsize=3)
+        producer = asyncio.create_task(queue.populate(request_dicts(10)))
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(queue.qsize(), 3)
+        self.assertFalse(producer.done())
+
+        taken = []
+        await asyncio.wait_for(asyncio.gather(producer, consume(queue, taken)), timeout=5)
+        self.assertEqual(len(taken), 10)
+
+    async def test_queue_can_be_loaded_again_after_close(self):
+        queue = RequestQueue(request_builder=RequestBuilder())
+        for _ in range(2):
+            taken = []
+            await queue.populate(request_dicts(3))
+            await consume(queue, taken)
+            self.assertEqual(len(taken), 3)
+
+    async def test_requeue_into_a_full_queue_right_before_close(self):
+        queue = RequestQueue(request_builder=RequestBuilder(), maxsize=2)
+        for item in request_dicts(2):
+            await queue.put(item)
+        throttled = await queue.get()
+        closing = asyncio.create_task(queue.close())
+        await asyncio.sleep(0)
+        # the queue is full (a request and the end marker): the throttled request waits for room
+        queue.requeue(throttled)
+
+        taken = []
+        await asyncio.wait_for(asyncio.gather(closing, consume(queue, taken)), timeout=5)
+        self.assertEqual(sorted(str(req.url) for req, _ in taken), sorted(d["url"] for d in request_dicts(2)))
+
+
+class TestResponseQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def test_dump_stops_at_close(self):
+        queue = ResponseQueue()
+        await queue.put(("resp1", None), ("resp2", None))
+        queue.close()
+
+        self.assertEqual(list(queue.dump()), [("resp1", None), ("resp2", None)])
+        with self.assertRaises(NoMoreItems):
+            await queue.get()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import asyncio
+import contextlib
+import io
+import time
+import unittest
+
+import httpx
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.ratelimiter import RateLimiter, AdaptiveRateLimiter, parse_retry_after
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    def test_reserve_spaces_requests_at_rate(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate_limit=10, clock=clock)
+        delays = [limiter.reserve() for _ in range(4)]
+        self.assertEqual([round(delay, 6) for delay in delays], [0.0, 0.1, 0.2, 0.3])
+
+    def test_burst_allows_back_to_back_requests_after_idle(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate_limit=10, burst=3, clock=clock)
+        delays = [round(limiter.reserve(), 6) for _ in range(5)]
+        self.assertEqual(delays, [0.0, 0.0, 0.0, 0.1, 0.2])
+
+        # after being idle long enough the whole burst is available again
+        clock.now += 10
+        self.assertEqual([limiter.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+
+    def test_invalid_parameters(self):
+        for kwargs in ({'rate_limit': 0}, {'rate_limit': -1}, {'rate_limit': 5, 'burst': 0},
+                       {'rate_limit': 5, 'concurrency_limit': -2}):
+            with self.assertRaises(ValueError):
+                RateLimiter(**kwargs)
+
+    async def test_throttle_bounds_throughput(self):
+        limiter = RateLimiter(rate_limit=200)
+        sent = []
+
+        async def send():
+            async with limiter.throttle():
+                sent.append(time.monotonic())
+
+        start = time.monotonic()
+        await asyncio.gather(*(send() for _ in range(41)))
+        elapsed = time.monotonic() - start
+
+        # 40 intervals of 5 ms after the first request
+        self.assertGreaterEqual(elapsed, 0.19)
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(limiter.acquired, 41)
+
+    async def test_concurrency_limit(self):
+        limiter = RateLimiter(rate_limit=10000, concurrency_limit=2)
+        in_flight, max_in_flight = 0, 0
+
+        async def send():
+            nonlocal in_flight, max_in_flight
+            async with limiter.throttle():
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+
+        await asyncio.gather(*(send() for _ in range(6)))
+        self.assertEqual(max_in_flight, 2)
+
+
+def response(status_code, headers=None):
+    return httpx.Response(status_code, headers=headers)
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = AdaptiveRateLimiter(rate_limit=100, min_rate=5, clock=self.clock,
+                                           wall_clock=lambda: 1700000000.0)
+
+    def test_throttled_response_halves_rate_once_per_cooldown(self):
+        self.assertTrue(self.limiter.update_from_response(response(429), host='a'))
+        self.assertTrue(self.limiter.update_from_response(response(503), host='a'))
+        self.assertEqual(self.limiter.current_rate('a'), 50)
+
+        self.clock.now += 1
+        self.limiter.update_from_response(response(429), host='a')
+        self.assertEqual(self.limiter.current_rate('a'), 25)
+        self.assertEqual(self.limiter.throttled, 3)
+
+    def test_success_increases_rate_up_to_max(self):
+        limiter = AdaptiveRateLimiter(rate_limit=10, max_rate=11, clock=self.clock)
+        for _ in range(10):
+            self.assertFalse(limiter.update_from_response(response(200)))
+        self.assertAlmostEqual(limiter.current_rate(), 10.96, places=2)
+
+        for _ in range(10):
+            limiter.update_from_response(response(200))
+        self.assertEqual(limiter.current_rate(), 11)
+
+    def test_hosts_are_independent(self):
+        self.limiter.update_from_response(response(429), host='a')
+        self.limiter.update_from_response(response(200), host='b')
+        self.assertEqual(self.limiter.current_rate('a'), 50)
+        self.assertGreater(self.limiter.current_rate('b'), 100)
+        self.assertEqual(set(self.limiter.rates), {'a', 'b'})
+
+    def test_retry_after_pauses_host(self):
+        self.limiter.reserve(host='a')
+        self.limiter.update_from_response(response(429, {'Retry-After': '2'}), host='a')
+        self.assertAlmostEqual(self.limiter.reserve(host='a'), 2.0)
+        self.assertEqual(self.limiter.reserve(host='b'), 0.0)
+
+    def test_rate_limit_headers_cap_rate(self):
+        headers = {'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '20', 'X-RateLimit-Reset': '2'}
+        self.limiter.update_from_response(response(200, headers), host='a')
+        self.assertEqual(self.limiter.current_rate('a'), 10)
+
+        # window exhausted: paused until the reset (epoch timestamp), then sent at the min rate
+        headers = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '1700000003'}
+        self.limiter.update_from_response(response(200, headers), host='a')
+        self.assertEqual(self.limiter.current_rate('a'), 5)
+        self.assertAlmostEqual(self.limiter.reserve(host='a'), 3.0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('3'), 3.0)
+        self.assertEqual(parse_retry_after('Thu, 01 Jan 1970 00:16:50 GMT', wall_clock=lambda: 1000.0), 10.0)
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+def throttling_handler(max_rate):
+    # 429 (with Retry-After) whenever the target is hit faster than max_rate over the last second
+    hits = []
+
+    def handler(method, path, headers, body):
+        now = time.monotonic()
+        hits.append(now)
+        while hits[0] < now - 1:
+            hits.pop(0)
+        if len(hits) > max_rate:
+            return 429, {"Retry-After": "0.2"}, b"slow down"
+        return 200, {}, b"ok"
+
+    return handler
+
+
+class TestAdaptiveFuzzRun(unittest.TestCase):
+
+    def test_throttled_requests_are_sent_again_and_rate_converges(self):
+        wordlists = {'$path$': [f"p{i}" for i in range(120)]}
+        rate_limiting = {'rate_limit': 400, 'adaptive': True, 'min_rate': 10, 'max_retries': 10}
+
+        with StandInServer(handler=throttling_handler(max_rate=100)) as server, \
+                contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=10, wordlists=wordlists, rate_limiting=rate_limiting)
+            asyncio.run(module.run_fuzz({'method': 'GET', 'url': server.url + '/$path$'}, None))
+
+        results = [resp for resp, _ in module.base_fuzz_results(response=True)]
+        self.assertEqual(len(results), 120)
+        self.assertTrue(all(resp.status_code == 200 for resp in results))
+
+        stats = module.rate_stats()
+        self.assertGreater(stats['requeued'], 0)
+        self.assertEqual(stats['requeued'], stats['throttled'])
+        self.assertLess(stats['rates']['127.0.0.1'], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
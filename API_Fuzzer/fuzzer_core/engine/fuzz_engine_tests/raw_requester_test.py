@@ -0,0 +1,133 @@
+import asyncio
+import contextlib
+import io
+import unittest
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.requester.raw_requester import RawTemplate, RawRequester, RawConnection
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+RAW_REQUEST = "POST /items/$id$ HTTP/1.1\nHost: target\nx-Dup: 1\nx-Dup: 2\nbroken header line\n" \
+              "Content-Length: 0\n\n{\"name\": \"$name$\"}"
+
+
+class TestRawTemplate(unittest.TestCase):
+
+    def test_render_injects_bytes_and_keeps_malformed_headers(self):
+        template = RawTemplate(RAW_REQUEST, "http://127.0.0.1:8000")
+        self.assertEqual(template.fields, ['$id$', '$name$'])
+
+        rendered = template.render(('42', "a\"b'c"))
+        self.assertEqual(rendered, b"POST /items/42 HTTP/1.1\r\nHost: target\r\nx-Dup: 1\r\nx-Dup: 2\r\n"
+                                   b"broken header line\r\nContent-Length: 17\r\n\r\n{\"name\": \"a\"b'c\"}")
+
+    def test_raw_bytes_are_kept_as_is(self):
+        raw = b"GET /$p$ HTTP/1.1\nHost: x\nContent-Length: 999\n\nbody"
+        template = RawTemplate(raw, "http://127.0.0.1", crlf=False)
+        self.assertEqual(template.render((b'\x00\xff',)), b"GET /\x00\xff HTTP/1.1\nHost: x\nContent-Length: 999\n\nbody")
+
+    def test_head_without_empty_line_is_terminated(self):
+        for raw in ("GET /$p$ HTTP/1.1\nHost: x", "GET /$p$ HTTP/1.1\nHost: x\n", "GET /$p$ HTTP/1.1\r\nHost: x\r\n"):
+            self.assertEqual(RawTemplate(raw, "http://127.0.0.1").render(('a',)), b"GET /a HTTP/1.1\r\nHost: x\r\n\r\n")
+        template = RawTemplate("GET /$p$ HTTP/1.1\nHost: x\n", "http://127.0.0.1", crlf=False)
+        self.assertEqual(template.render(('a',)), b"GET /a HTTP/1.1\nHost: x\n\n")
+
+    def test_request_equivalent_for_analysis(self):
+        request = RawTemplate(RAW_REQUEST, "http://127.0.0.1:8000").request(('7', 'n'))
+        self.assertEqual(request.method, 'POST')
+        httpx_request = request.to_httpx()
+        self.assertEqual(str(httpx_request.url), "http://127.0.0.1:8000/items/7")
+        self.assertEqual(httpx_request.headers.get_list('x-dup'), ['1', '2'])
+
+
+class TestRawRequester(unittest.IsolatedAsyncioTestCase):
+
+    async def read_response(self, data: bytes, method=b'GET'):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        request = RawTemplate(method + b" / HTTP/1.1\r\n\r\n", "http://127.0.0.1").request(())
+        return await RawRequester()._read_response(RawConnection(reader, None), request)
+
+    async def test_chunked_response(self):
+        response, reusable = await self.read_response(
+            b"HTTP/1.1 100 Continue\r\n\r\nHTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nTrailer: x\r\n\r\n")
+        self.assertEqual((response.status_code, response.content, reusable), (200, b"hello world", True))
+
+    async def test_response_delimited_by_connection_close(self):
+        response, reusable = await self.read_response(b"HTTP/1.0 404 Not Found\r\nServer: x\r\n\r\nmissing")
+        self.assertEqual((response.status_code, response.reason_phrase, response.text), (404, "Not Found", "missing"))
+        self.assertFalse(reusable)
+
+    async def test_head_response_has_no_body(self):
+        response, reusable = await self.read_response(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\n", b"HEAD")
+        self.assertEqual((response.content, reusable), (b"", True))
+
+
+def echo_handler(method, path, headers, body):
+    return 200, {}, f"{method} {path} {body.decode()}".encode()
+
+
+class TestRawFuzzRun(unittest.TestCase):
+
+    def test_raw_fuzz_run_on_pooled_connections(self):
+        wordlists = {'$id$': [str(i) for i in range(30)], '$name$': ['x', 'y']}
+
+        with StandInServer(handler=echo_handler) as server, contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=4, wordlists=wordlists)
+            asyncio.run(module.run_raw_fuzz(RAW_REQUEST, server.url, 'product'))
+
+        responses = [resp for resp, _ in module.base_fuzz_results(response=True)]
+        self.assertEqual(len(responses), 60)
+        self.assertIn('POST /items/29 {"name": "y"}', {resp.text for resp in responses})
+        self.assertEqual(str(responses[0].request.url.host), '127.0.0.1')
+
+        pool = module.raw_requester_client.pool_stats
+        self.assertEqual(pool.requests, 60)
+        self.assertLessEqual(pool.connections_opened, 4)
+        self.assertEqual(server.requests, 60)
+
+    def test_raw_fuzz_run_through_a_proxy(self):
+        wordlists = {'$id$': [str(i) for i in range(10)], '$name$': ['x']}
+        tunnels = []
+
+        async def pipe(reader, writer):
+            try:
+                while data := await reader.read(65536):
+                    writer.write(data)
+                    await writer.drain()
+            finally:
+                writer.close()
+
+        async def tunnel(reader, writer):
+            request_line = (await reader.readuntil(b'\r\n\r\n')).split(b'\r\n', 1)[0]
+            host, _, port = request_line.split(b' ')[1].rpartition(b':')
+            tunnels.append(request_line)
+            upstream_reader, upstream_writer = await asyncio.open_connection(host.decode(), int(port))
+            writer.write(b'HTTP/1.1 200 Connection established\r\n\r\n')
+            await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+
+        async def run(url):
+            proxy = await asyncio.start_server(tunnel, '127.0.0.1', 0)
+            module = FuzzBaseModule(num_workers=2, wordlists=wordlists,
+                                    proxy=f"http://127.0.0.1:{proxy.sockets[0].getsockname()[1]}")
+            async with proxy:
+                await module.run_raw_fuzz(RAW_REQUEST, url, 'product')
+            return module
+
+        with StandInServer(handler=echo_handler) as server, contextlib.redirect_stdout(io.StringIO()):
+            module = asyncio.run(run(server.url))
+
+        responses = [resp for resp, _ in module.base_fuzz_results(response=True)]
+        self.assertEqual(sorted(resp.text for resp in responses),
+                         sorted(f'POST /items/{i} {{"name": "x"}}' for i in range(10)))
+        self.assertTrue(tunnels)
+        self.assertEqual({line.split(b' ')[0] for line in tunnels}, {b'CONNECT'})
+        self.assertLessEqual(len(tunnels), 2)
+        with self.assertRaises(ValueError):
+            RawRequester(proxy="socks5://127.0.0.1:1080")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import httpx
+
+from config import Config
+from fuzzer_core.engine.requester.requester import Requester, pool_limits_from_config
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+
+
+class TestRequesterPool(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    async def send_requests(self, requester, count):
+        for i in range(count):
+            request = requester.build_request("GET", f"{self.server.url}/item/{i}")
+            response = await requester.send_request(request, None)
+            self.assertEqual(response.status_code, 200)
+
+    async def test_keep_alive_reuses_connection(self):
+        async with Requester(keep_alive=True) as requester:
+            await self.send_requests(requester, 20)
+
+        self.assertEqual(requester.pool_stats.requests, 20)
+        self.assertEqual(requester.pool_stats.connections_opened, 1)
+        self.assertEqual(requester.pool_stats.reused_requests, 19)
+        self.assertEqual(self.server.connections, 1)
+
+    async def test_connection_close_opens_connection_per_request(self):
+        async with Requester(keep_alive=False) as requester:
+            await self.send_requests(requester, 5)
+
+        self.assertEqual(requester.pool_stats.connections_opened, 5)
+        self.assertEqual(requester.pool_stats.reuse_ratio, 0.0)
+
+    def test_pool_limits_from_config(self):
+        config = Config()
+        config['fuzz_engine'] = {'max_connections': 7, 'max_keepalive_connections': 3, 'keepalive_expiry': 2}
+        limits = pool_limits_from_config(config)
+        self.assertEqual((limits.max_connections, limits.max_keepalive_connections, limits.keepalive_expiry),
+                         (7, 3, 2))
+        self.assertEqual(pool_limits_from_config(None), httpx.Limits())
+
+
+if __name__ == "__main__":
+    unittest.main()
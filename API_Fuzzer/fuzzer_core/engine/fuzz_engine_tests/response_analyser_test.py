@@ -0,0 +1,72 @@
+import contextlib
+import io
+import unittest
+
+import httpx
+
+from fuzzer_core.engine.response_analyser import ResponseAnalyser, ResponseNotMatchedExc
+
+
+def unread_response(status_code, headers=None, body=b"some body here"):
+    # the body can't be accessed before it's read: any rule touching it would raise
+    async def stream():
+        yield body
+
+    return httpx.Response(status_code, headers=headers, content=stream(),
+                          request=httpx.Request('GET', 'http://127.0.0.1/'))
+
+
+class TestMatchPlan(unittest.TestCase):
+
+    def test_cheap_rules_run_first_and_short_circuit(self):
+        analyser = ResponseAnalyser(match_hide=['match', {'length-in-words': {'min': 1},
+                                                          'response-code': {'code': [200]}}],
+                                    analysis=['response-code'])
+        self.assertEqual([rule.option for rule in analyser.rules], ['response-code', 'length-in-words'])
+
+        # filtered on its status: the body is never read
+        self.assertIsNone(analyser.evaluate(unread_response(404)))
+        self.assertEqual(analyser.evaluate(httpx.Response(200, content=b"two words")), {'response-code': 200})
+
+        stats = analyser.rule_stats()
+        self.assertEqual((stats['evaluated'], stats['kept']), (2, 1))
+        self.assertEqual(stats['rules'][0], {'option': 'response-code', 'evaluated': 2, 'hits': 1, 'filtered': 1})
+        self.assertEqual(stats['rules'][1], {'option': 'length-in-words', 'evaluated': 1, 'hits': 1, 'filtered': 0})
+
+    def test_hide_mode_drops_responses_matching_any_rule(self):
+        analyser = ResponseAnalyser(match_hide=['hide', {'response-code': {'code': 404},
+                                                         'response-header': {'headers': {'x-cache': 'HIT'}}}],
+                                    analysis=['response-code'])
+        self.assertIsNone(analyser.evaluate(httpx.Response(404)))
+        self.assertIsNone(analyser.evaluate(httpx.Response(200, headers={'X-Cache': 'HIT'})))
+        self.assertEqual(analyser.evaluate(httpx.Response(200, headers={'X-Cache': 'MISS'})), {'response-code': 200})
+
+    def test_length_in_bytes_from_content_length_header(self):
+        analyser = ResponseAnalyser(match_hide=['match', {'length-in-bytes': {'max': 100}}],
+                                    analysis=['length-in-bytes'])
+        self.assertEqual(analyser.evaluate(unread_response(200, {'Content-Length': '14'})), {'length-in-bytes': 14})
+        self.assertIsNone(analyser.evaluate(unread_response(200, {'Content-Length': '1000'})))
+
+        # encoded body: the header isn't the size of the body
+        response = httpx.Response(200, headers={'Content-Encoding': 'identity', 'Content-Length': '1000'},
+                                  content=b"x" * 10)
+        self.assertEqual(analyser.evaluate(response), {'length-in-bytes': 10})
+
+    def test_values_are_shared_between_rules_and_analysis(self):
+        analyser = ResponseAnalyser(match_hide=['match', {'sensitive-info': {'info': ['Email Addresses']}}],
+                                    analysis=['sensitive-info', 'length-in-lines'])
+        results = analyser.evaluate(httpx.Response(200, content=b"a@b.io\nc@d.io"))
+        self.assertEqual(results['sensitive-info']['Email Addresses']['count'], 2)
+        self.assertEqual(results['length-in-lines'], 2)
+
+    def test_failed_request_and_exception_wrapper(self):
+        analyser = ResponseAnalyser(match_hide=['match', {'response-code': {'code': [200]}}], analysis=None)
+        self.assertIsNone(analyser.evaluate(None))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(analyser.response_analysis(httpx.Response(200)))
+            with self.assertRaises(ResponseNotMatchedExc):
+                analyser.response_analysis(httpx.Response(500))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import asyncio
+import contextlib
+import hashlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+import httpx
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.queues.result_store import ResultStore
+from fuzzer_core.engine.response_analyser import ResponseAnalyser
+from fuzzer_core.engine.response_clusters import ClusterIndex, SimHasher, WORD
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+NOT_FOUND = (b"<html><head><title>404 Not Found</title></head><body><h1>Not Found</h1><p>The requested URL /%s was "
+             b"not found on this server. Request id %d at 12:%02d</p><hr><address>Apache/2.4.41 (Ubuntu) Server at "
+             b"example.com Port 80</address></body></html>")
+ADMIN = b'{"users": [{"id": 1, "name": "alice", "email": "alice@example.com", "role": "admin"}], "total": 1}'
+
+
+def not_found(path: bytes, number: int) -> bytes:
+    return NOT_FOUND % (path, number, number % 60)
+
+
+def handler(method, path, headers, body):
+    if path.endswith('/admin'):
+        return 200, {}, ADMIN
+    if path.endswith('/backup'):
+        return 403, {}, not_found(b"backup", 0)
+    return 404, {}, not_found(path.encode(), len(path) * 7919)
+
+
+class TestResponseClusters(unittest.TestCase):
+
+    def test_near_duplicates_share_a_fingerprint_neighbourhood(self):
+        simhasher = SimHasher()
+        random.seed(7)
+        first = simhasher.fingerprint(not_found(b"index", 1))
+        for number in range(200):
+            path = bytes(random.choice(b"abcdefghij") for _ in range(random.randint(3, 12)))
+            distance = (simhasher.fingerprint(not_found(path, number)) ^ first).bit_count()
+            self.assertLessEqual(distance, 6)
+        self.assertGreater((simhasher.fingerprint(ADMIN) ^ first).bit_count(), 12)
+        self.assertEqual(simhasher.fingerprint(b"1234 5678"), 0)
+
+    def test_fingerprint_is_the_majority_of_the_word_hashes(self):
+        content = not_found(b"some/path", 42) + ADMIN
+        words = set(WORD.findall(content))
+        hashes = [int.from_bytes(hashlib.blake2b(word, digest_size=8).digest(), 'little') for word in words]
+        votes = [sum(word_hash >> bit & 1 for word_hash in hashes) for bit in range(64)]
+        expected = sum(1 << bit for bit, count in enumerate(votes) if 2 * count > len(words))
+        self.assertEqual(SimHasher().fingerprint(content), expected)
+
+    def test_index_finds_clusters_within_the_distance(self):
+        index = ClusterIndex(max_distance=3)
+        random.seed(3)
+        fingerprint = random.getrandbits(64)
+        cluster, is_new = index.assign(200, fingerprint, fuzz_index=0, url='http://127.0.0.1/a')
+        self.assertTrue(is_new)
+        for distance in range(4):
+            bits = random.sample(range(64), distance)
+            near = fingerprint ^ sum(1 << bit for bit in bits)
+            self.assertEqual(index.assign(200, near), (cluster, False))
+        far = fingerprint ^ 0b11111
+        self.assertTrue(index.assign(200, far)[1])
+        # other status code: other cluster
+        self.assertTrue(index.assign(404, fingerprint)[1])
+        self.assertEqual([(summary['count'], summary['fuzz_index']) for summary in index.summary()],
+                         [(5, 0), (1, None), (1, None)])
+
+    def test_match_keeps_one_response_of_each_cluster(self):
+        analyser = ResponseAnalyser(match_hide=['match', {'response-cluster': {}, 'response-code': {'code': [404]}}],
+                                    analysis=['response-cluster'])
+        self.assertEqual(analyser.rules[-1].option, 'response-cluster')
+        request = httpx.Request('GET', 'http://127.0.0.1/')
+        responses = [httpx.Response(404, content=not_found(b"p%d" % i, i), request=request) for i in range(50)]
+        kept = [analyser.evaluate(response) for response in responses]
+        self.assertEqual(kept[0], {'response-cluster': 0})
+        self.assertTrue(all(analysis is None for analysis in kept[1:]))
+        # filtered out by the status code before joining a cluster
+        self.assertIsNone(analyser.evaluate(httpx.Response(200, content=ADMIN, request=request)))
+        self.assertEqual(len(analyser.clusters), 1)
+
+    def test_clusters_of_a_run(self):
+        wordlists = {'$path$': [f"missing{i}" for i in range(40)] + ['admin', 'backup']}
+        with tempfile.TemporaryDirectory() as directory:
+            config = {'fuzz_engine': {'result_store': os.path.join(directory, 'run.db')}}
+            with StandInServer(handler=handler) as server, contextlib.redirect_stdout(io.StringIO()):
+                module = FuzzBaseModule(num_workers=4, wordlists=wordlists, config=config,
+                                        response_analysis={'analysis_parameters': ['response-cluster']})
+                asyncio.run(module.run_fuzz({'method': 'GET', 'url': server.url + '/$path$'}, None))
+            self.assertEqual(sorted((cluster['status_code'], cluster['count']) for cluster in module.cluster_summary()),
+                             [(200, 1), (403, 1), (404, 40)])
+
+            module.result_store.close()
+            with ResultStore(config['fuzz_engine']['result_store']) as store:
+                clusters = store.clusters()
+                self.assertEqual([(result.status_code, count) for result, count in clusters],
+                                 [(404, 40), (200, 1), (403, 1)])
+                self.assertEqual(store.clusters(status_code=200)[0][0].url, server.url + '/admin')
+
+
+if __name__ == "__main__":
+    unittest.main()
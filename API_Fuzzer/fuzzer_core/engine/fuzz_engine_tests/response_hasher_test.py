@@ -0,0 +1,64 @@
+import hashlib
+import unittest
+
+import httpx
+
+from fuzzer_core.engine.response_analyser import ResponseAnalyser
+from fuzzer_core.engine.response_hasher import ResponseHasher, HASH_ALGORITHMS
+from utils.encoding_decoding import hash_response_md5
+
+
+def response(status=200, headers=None, content=b"<html>same page</html>"):
+    return httpx.Response(status, headers=headers or {}, content=content,
+                          request=httpx.Request('GET', 'http://127.0.0.1/'))
+
+
+class TestResponseHasher(unittest.TestCase):
+
+    def test_volatile_headers_are_left_out(self):
+        hasher = ResponseHasher()
+        first = response(headers={'Date': 'Mon, 01 Jan 2024 00:00:00 GMT', 'Set-Cookie': 'session=1',
+                                  'X-Request-Id': 'aaa', 'Content-Type': 'text/html'})
+        second = response(headers={'content-type': 'text/html', 'date': 'Mon, 01 Jan 2024 00:00:09 GMT',
+                                   'set-cookie': 'session=2', 'x-request-id': 'bbb'})
+        self.assertEqual(hasher.hexdigest(first), hasher.hexdigest(second))
+
+        self.assertNotEqual(hasher.hexdigest(first), hasher.hexdigest(response(headers={'Content-Type': 'text/xml'})))
+        self.assertNotEqual(hasher.hexdigest(first), hasher.hexdigest(response(status=404)))
+        self.assertNotEqual(hasher.hexdigest(first), hasher.hexdigest(response(content=b"<html>other</html>")))
+
+        every_header = ResponseHasher(exclude_headers=())
+        self.assertNotEqual(every_header.hexdigest(first), every_header.hexdigest(second))
+        no_header = ResponseHasher(include_headers=False)
+        self.assertEqual(no_header.hexdigest(response(headers={'Server': 'a'})),
+                         no_header.hexdigest(response(headers={'Server': 'b'})))
+
+    def test_algorithms(self):
+        page = response(headers={'Content-Type': 'text/html'})
+        for algorithm in HASH_ALGORITHMS:
+            with self.subTest(algorithm=algorithm):
+                hasher = ResponseHasher(algorithm)
+                self.assertEqual(hasher.hexdigest(page), hasher.digest(page).hex())
+        self.assertEqual(len(ResponseHasher().digest(page)), 8)
+        with self.assertRaises(ValueError):
+            ResponseHasher('rot13')
+
+        # the body is fed as it is read
+        hashed = ResponseHasher('md5').start(page)
+        hashed.update(page.content[:5])
+        hashed.update(page.content[5:])
+        self.assertEqual(hashed.hexdigest(), ResponseHasher('md5').hexdigest(page))
+        expected = hashlib.md5(b"200\r\ncontent-length:22\r\ncontent-type:text/html\r\n\r\n" + page.content)
+        self.assertEqual(hash_response_md5(page), expected.hexdigest())
+
+    def test_hash_option_dedups_responses(self):
+        known = ResponseHasher().hexdigest(response(headers={'Date': 'yesterday'}))
+        analyser = ResponseAnalyser(match_hide=['hide', {'response-hash': {'hash': [known.upper()]}}],
+                                    analysis=['response-hash'])
+        self.assertIsNone(analyser.evaluate(response(headers={'Date': 'today'})))
+        kept = analyser.evaluate(response(content=b"new page"))
+        self.assertEqual(kept['response-hash'], ResponseHasher().hexdigest(response(content=b"new page")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import contextlib
+import io
+import pickle
+import unittest
+
+import httpx
+
+from fuzzer_core.engine.response_analyser import ResponseAnalyser
+from fuzzer_core.engine.response_metrics import ResponseMetrics, METRICS_EXTENSION
+
+CONTENTS = [b"", b"one line", b"two\nlines\n", b"  spaced \t words\r\nand crlf", b"\n\n\n",
+            "café naïve 日本語\n\U0001f600 emoji".encode('utf-8')]
+
+# line breaks and whitespace str.splitlines / str.split know but bytes.splitlines / bytes.split don't
+SEPARATORS = ["a\rb\rc", "x\xa0y z", "a\x1cb", "a\x1fb", "line1\u2028line2", "a\x85b\u3000c\u2029", "cr\r\nlf\r",
+              "\u2009thin\u202fspaces\u200a"]
+
+
+def expected(text: str) -> dict:
+    return {'length-in-bytes': len(text.encode('utf-8')), 'length-in-lines': len(text.splitlines()),
+            'length-in-words': len(text.split()), 'length-in-chars': len(text)}
+
+
+class TestResponseMetrics(unittest.TestCase):
+
+    def test_same_as_text_metrics(self):
+        for content in CONTENTS:
+            with self.subTest(content=content):
+                self.assertEqual(ResponseMetrics.from_content(content).as_dict(), expected(content.decode('utf-8')))
+
+    def test_separators_of_str(self):
+        for text in SEPARATORS:
+            with self.subTest(text=text):
+                self.assertEqual(ResponseMetrics.from_content(text.encode('utf-8')).as_dict(), expected(text))
+
+    def test_separators_split_over_chunks(self):
+        # measured as bytes up to the first separator that isn't ASCII, decoded from there
+        content = CONTENTS[-1] + "\r\n".join(SEPARATORS).encode('utf-8')
+        for split in range(len(content) + 1):
+            metrics = ResponseMetrics()
+            metrics.update(content[:split])
+            metrics.update(content[split:])
+            self.assertEqual(metrics.as_dict(), expected(content.decode('utf-8')), split)
+
+    def test_chunks_split_anywhere(self):
+        content = CONTENTS[-1] + b" " + CONTENTS[3]
+        for split in range(len(content) + 1):
+            metrics = ResponseMetrics()
+            metrics.update(content[:split])
+            metrics.update(content[split:])
+            self.assertEqual(metrics.as_dict(), expected(content.decode('utf-8')), split)
+
+    def test_other_encoding(self):
+        content = "déjà vu\n".encode('latin-1')
+        metrics = ResponseMetrics.from_content(content, encoding='iso-8859-1')
+        self.assertEqual((metrics.bytes, metrics.chars, metrics.words, metrics.length_in_lines), (8, 8, 2, 1))
+        # not ASCII compatible: even its ASCII bytes are decoded
+        metrics = ResponseMetrics.from_content("two\nlines".encode('utf-16-le'), encoding='utf-16-le')
+        self.assertEqual((metrics.chars, metrics.words, metrics.length_in_lines), (9, 2, 2))
+
+        # sent between processes with the results: the decoder is recreated
+        metrics = pickle.loads(pickle.dumps(ResponseMetrics.from_content("日本".encode('shift_jis'), 'shift_jis')))
+        metrics.update("語".encode('shift_jis'))
+        self.assertEqual((metrics.bytes, metrics.chars), (6, 3))
+
+    def test_cached_in_response(self):
+        response = httpx.Response(200, content=CONTENTS[2])
+        metrics = ResponseMetrics.of_response(response)
+        self.assertIs(response.extensions[METRICS_EXTENSION], metrics)
+        self.assertIs(ResponseMetrics.of_response(response), metrics)
+
+
+class TestAnalyserMetrics(unittest.TestCase):
+
+    def test_length_options_and_value_search(self):
+        analyser = ResponseAnalyser(match_hide=['match', {'value-in-response': {'value': '日本'}}],
+                                    analysis=['length-in-bytes', 'length-in-lines', 'length-in-words',
+                                              'length-in-chars'])
+        response = httpx.Response(200, content=CONTENTS[-1])
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = analyser.response_analysis(response)
+        self.assertEqual(results, expected(CONTENTS[-1].decode('utf-8')))
+
+        self.assertTrue(ResponseAnalyser.value_in_response(CONTENTS[-1], 'naïve'))
+        self.assertFalse(ResponseAnalyser.value_in_response(CONTENTS[-1], 'nope'))
+        self.assertTrue(ResponseAnalyser.value_in_response("déjà".encode('latin-1'), 'éj', 'latin-1'))
+
+
+if __name__ == "__main__":
+    unittest.main()
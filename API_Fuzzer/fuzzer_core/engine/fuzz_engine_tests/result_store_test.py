@@ -0,0 +1,95 @@
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.fuzz_result import FuzzResult
+from fuzzer_core.engine.queues.result_store import ResultStore
+from fuzzer_core.engine.response_analyser import ResponseAnalyser
+from fuzzer_core.engine.response_hasher import ResponseHasher
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+
+def handler(method, path, headers, body):
+    index = int(path.rsplit('p', 1)[1])
+    if index % 5 == 0:
+        return 404, {}, b"not found"
+    return 200, {'Content-Type': 'text/plain'}, b"x" * (index * 10)
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'results.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_module(self, requests=30, **engine_conf):
+        wordlists = {'$path$': [f"p{i}" for i in range(requests)]}
+        config = {'fuzz_engine': {'result_store': self.path, 'store_batch_size': 7, **engine_conf}}
+        with StandInServer(handler=handler) as server, contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=4, wordlists=wordlists, config=config,
+                                    response_analysis={'analysis_parameters': ['response-code', 'length-in-bytes',
+                                                                               'response-hash']})
+            asyncio.run(module.run_fuzz({'method': 'GET', 'url': server.url + '/$path$'}, None))
+        return module
+
+    def test_results_are_written_to_the_store(self):
+        module = self.run_module()
+        # nothing stays in memory
+        self.assertEqual(module.response_queue.qsize(), 1)
+        results = list(module.base_fuzz_results(response=True))
+        self.assertEqual(len(results), 30)
+        self.assertTrue(all(isinstance(result, FuzzResult) for result, _ in results))
+        module.result_store.close()
+
+        with ResultStore(self.path) as store:
+            self.assertEqual(len(store), 30)
+            self.assertEqual(store.count(status_code=404), 6)
+            self.assertEqual(store.count(status_code=[200, 404]), 30)
+            long = [result.fuzz_index for result, _ in store.results(status_code=200, min_length=200)]
+            self.assertEqual(sorted(long), [i for i in range(20, 30) if i % 5])
+
+            # found by the hash of the analysis
+            hashes = {result.fuzz_index: analysis['response-hash'] for result, analysis in store.results()}
+            found, analysis = next(store.results(body_hash=hashes[7]))
+            self.assertEqual((found.fuzz_index, found.length, found.hexdigest), (7, 70, hashes[7]))
+            self.assertEqual(analysis['response-code'], 200)
+            self.assertEqual(store.count(max_elapsed=0), 0)
+            self.assertIsNone(store.body(found))
+
+    def test_stored_bodies_can_be_analysed_again(self):
+        module = self.run_module(store_bodies=True)
+        module.result_store.close()
+
+        with ResultStore(self.path) as store:
+            result = next(result for result, _ in store.results(min_length=120, max_length=120))
+            self.assertEqual(store.body(result), b"x" * 120)
+            response = store.response(result)
+            self.assertEqual(ResponseHasher().digest(response), result.body_hash)
+            self.assertEqual(next(store.results(body_hash=result.body_hash))[0], result)
+            self.assertEqual((response.status_code, response.headers['content-type']), (200, 'text/plain'))
+
+            analyser = ResponseAnalyser(match_hide=['match', {'length-in-bytes': {'min': 100}}],
+                                        analysis=['response-code'])
+            analysis = analyser.evaluate(response)
+            self.assertEqual(analysis['response-code'], 200)
+            self.assertIsNone(analyser.evaluate(store.response(next(store.results(max_length=50))[0])))
+
+    def test_runs_are_appended(self):
+        self.run_module(requests=10).result_store.close()
+        self.run_module(requests=10, store_bodies=True).result_store.close()
+        with ResultStore(self.path) as store:
+            self.assertEqual(store.count(), 20)
+            indexes = [result.fuzz_index for result, _ in store.results()]
+            self.assertEqual(sorted(indexes), sorted(list(range(10)) * 2))
+            self.assertEqual(len(list(store.results(limit=3))), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import contextlib
+import io
+import time
+import unittest
+
+import httpx
+
+from fuzzer_core.engine.response_analyser import ResponseAnalyser, ResponseNotMatchedExc
+from fuzzer_core.engine.sensitive_scanner import SensitiveInfoScanner
+
+CONTENT = (b"contact: jane.doe@example.com, john@example.org\n"
+           b"phone: +33 6 12 34 56 78 / +14155552671\n"
+           b"card: 4111 1111 1111 1111\n"
+           b"api_key=abcd1234")
+
+
+class TestSensitiveInfoScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.scanner = SensitiveInfoScanner()
+
+    def test_counts_and_offsets(self):
+        found = self.scanner.scan(CONTENT)
+        # categories can overlap ("12 34 56" of the phone number is also a date)
+        self.assertEqual(set(found), {"Email Addresses", "International phone numbers", "Credit card numbers",
+                                      "API Keys", "Date of birth"})
+        self.assertEqual(set(self.scanner.scan(b"4111111111111111")),
+                         {"16 digits credit card numbers", "Credit card numbers"})
+        self.assertEqual(found["Email Addresses"]['count'], 2)
+        start, end = found["Email Addresses"]['offsets'][0]
+        self.assertEqual(CONTENT[start:end], b"jane.doe@example.com")
+        self.assertEqual([CONTENT[start:end] for start, end in found["International phone numbers"]['offsets']],
+                         [b"+33 6 12 34 56 78", b"+14155552671"])
+
+    def test_text_content_and_categories(self):
+        self.assertEqual(self.scanner.categories("nothing to see here"), [])
+        self.assertEqual(ResponseAnalyser.match_sensitive_information("mail me: a@b.io"), ["Email Addresses"])
+
+    def test_custom_patterns(self):
+        scanner = SensitiveInfoScanner(extra_patterns={"AWS keys": r'(?i)akia[0-9A-Z]{16}'})
+        found = scanner.scan(b"key akiaABCDEFGHIJKLMNOP and a@b.io")
+        self.assertEqual(set(found), {"AWS keys", "Email Addresses"})
+
+        for patterns in ({"empty": r'x*'}, {"broken": r'(unclosed'}):
+            with self.assertRaises(ValueError):
+                SensitiveInfoScanner(extra_patterns=patterns)
+
+    def test_scan_is_capped(self):
+        scanner = SensitiveInfoScanner(max_scan_bytes=10)
+        self.assertEqual(scanner.scan(b"x" * 10 + b" a@b.io"), {})
+        self.assertEqual(len(scanner.scan(b"a@b.io " + b"x" * 10)), 1)
+
+    def test_long_digit_runs_dont_backtrack(self):
+        start = time.perf_counter()
+        self.scanner.scan(b"+" + b"1" * 100000 + b"a " + b"+1-2" * 50000)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_analyser_option(self):
+        analyser = ResponseAnalyser(match_hide=['match', {'sensitive-info': {'info': ['Email Addresses']}}],
+                                    analysis=['sensitive-info'])
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = analyser.response_analysis(httpx.Response(200, content=CONTENT))
+            self.assertEqual(results['sensitive-info']['Email Addresses']['count'], 2)
+            with self.assertRaises(ResponseNotMatchedExc):
+                analyser.response_analysis(httpx.Response(200, content=b"api_key=abcd"))
+
+
+if __name__ == "__main__":
+    unittest.main()
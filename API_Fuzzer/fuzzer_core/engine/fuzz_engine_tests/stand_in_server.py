@@ -0,0 +1,118 @@
+import asyncio
+import threading
+from typing import Callable
+
+"""
+Minimal keep-alive HTTP/1.1 server used as a local stand-in target by the engine tests and benchmarks
+it runs its own event loop on a background thread so the fuzz engine can be driven from the main thread
+
+handler(method, path, headers, body) -> (status, headers, body) OR (status, headers, body, delay_in_seconds)
+"""
+
+REASONS = {200: b"OK", 201: b"Created", 204: b"No Content", 301: b"Moved Permanently", 400: b"Bad Request",
+           401: b"Unauthorized", 403: b"Forbidden", 404: b"Not Found", 429: b"Too Many Requests",
+           500: b"Internal Server Error", 503: b"Service Unavailable"}
+
+
+def default_handler(method, path, headers, body):
+    return 200, {"Content-Type": "text/plain"}, b"stand-in response for " + path.encode()
+
+
+class StandInServer:
+
+    def __init__(self, handler: Callable = None, host: str = "127.0.0.1", port: int = 0):
+        self.handler = handler or default_handler
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self.requests = 0
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._writers = set()
+        self._started = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    async def _shutdown(self):
+        # closes the listening socket and drops the keep-alive connections still waiting for a request
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        while self._writers:
+            await asyncio.sleep(0.01)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._serve_connection, self.host, self.port, backlog=4096))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                body = b""
+                if int(headers.get('content-length', 0)):
+                    body = await reader.readexactly(int(headers['content-length']))
+
+                self.requests += 1
+                status, resp_headers, resp_body, *delay = self.handler(method, path, headers, body)
+                if delay and delay[0]:
+                    await asyncio.sleep(delay[0])
+
+                close = headers.get('connection', '').lower() == 'close'
+                head = b"HTTP/1.1 %d %s\r\n" % (status, REASONS.get(status, b"Unknown"))
+                head += b"".join(f"{key}: {value}\r\n".encode('latin-1') for key, value in resp_headers.items())
+                head += b"Content-Length: %d\r\n" % len(resp_body)
+                head += b"Connection: close\r\n\r\n" if close else b"\r\n"
+                writer.write(head + resp_body)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+            self._writers.discard(writer)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
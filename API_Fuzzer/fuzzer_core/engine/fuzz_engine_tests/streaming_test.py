@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+import io
+import unittest
+
+import httpx
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.engine.fuzzworker import FuzzWorker
+from fuzzer_core.engine.requester.requester import Requester
+from fuzzer_core.engine.response_analyser import ResponseAnalyser
+from fuzzer_core.engine.response_metrics import is_truncated
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+BIG_BODY = b"x" * (1024 * 1024)
+BLOB = b"word " * (1024 * 1024)
+
+
+def handler(method, path, headers, body):
+    if path.startswith('/hit'):
+        return 200, {"Content-Type": "text/plain"}, b"found it here"
+    if path.startswith('/blob'):
+        return 200, {}, BLOB
+    if path.startswith('/big'):
+        return 404, {}, BIG_BODY
+    return 404, {}, b"not found"
+
+
+class TestStreamedResponses(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = StandInServer(handler=handler).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def worker(self, requester, match_hide, analysis):
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyser = ResponseAnalyser(match_hide=match_hide, analysis=analysis)
+            return FuzzWorker(request_queue=None, response_queue=None, requester_client=requester,
+                              response_analyser=analyser)
+
+    async def send(self, worker, path):
+        request = worker.requester_client.build_request("GET", f"{self.server.url}{path}")
+        response = await worker.send_request(request, None)
+        return response, await worker.analyse_response(response)
+
+    async def test_filtered_bodies_are_not_downloaded(self):
+        async with Requester(stream_responses=True) as requester:
+            worker = self.worker(requester, ['match', {'response-code': {'code': [200]}}], ['length-in-words'])
+
+            response, (kept, analysis) = await self.send(worker, '/big')
+            self.assertFalse(kept)
+            self.assertTrue(response.is_closed)
+            self.assertLess(response.num_bytes_downloaded, len(BIG_BODY) // 4)
+
+            # small bodies are drained: their connection is reused
+            for path in ('/miss/1', '/miss/2', '/hit'):
+                response, (kept, analysis) = await self.send(worker, path)
+            self.assertEqual((kept, analysis), (True, {'length-in-words': 3}))
+            self.assertEqual(response.text, "found it here")
+
+        # the big body closed its connection, the next one served the other requests
+        self.assertEqual(requester.pool_stats.connections_opened, 2)
+        self.assertEqual(worker.response_analyser.rule_stats()['kept'], 1)
+
+    async def test_body_read_only_when_needed(self):
+        async with Requester(stream_responses=True, keep_body=False) as requester:
+            worker = self.worker(requester, ['hide', {'response-code': {'code': [404]}}], ['response-code'])
+            response, (kept, analysis) = await self.send(worker, '/hit')
+            self.assertEqual((kept, analysis), (True, {'response-code': 200}))
+            with self.assertRaises(httpx.ResponseNotRead):
+                response.content
+
+            # a length rule the headers answer (Content-Length) doesn't need the body either
+            worker = self.worker(requester, ['match', {'length-in-bytes': {'max': 100}}], ['length-in-bytes'])
+            response, (kept, analysis) = await self.send(worker, '/big')
+            self.assertFalse(kept)
+            self.assertLess(response.num_bytes_downloaded, len(BIG_BODY) // 4)
+
+            worker = self.worker(requester, ['match', {'response-code': {'code': [200]}}], ['response-hash'])
+            response, (kept, analysis) = await self.send(worker, '/hit')
+            self.assertTrue(kept)
+            self.assertEqual(response.content, b"found it here")
+
+    async def test_body_size_cap(self):
+        async with Requester(max_body_size=1000) as requester:
+            self.assertTrue(requester.stream_responses)
+            worker = self.worker(requester, ['match', {'length-in-words': {'min': 10}}],
+                                 ['length-in-words', 'length-in-bytes', 'length-in-lines'])
+
+            response, (kept, analysis) = await self.send(worker, '/blob')
+            self.assertTrue(kept)
+            # the metrics cover the whole body, only its first bytes are kept
+            self.assertEqual(analysis, {'length-in-words': 1024 * 1024, 'length-in-bytes': len(BLOB),
+                                        'length-in-lines': 1})
+            self.assertEqual(response.content, BLOB[:1000])
+            self.assertTrue(is_truncated(response))
+
+            worker = self.worker(requester, None, ['length-in-bytes'])
+            response, (kept, analysis) = await self.send(worker, '/hit')
+            self.assertEqual((response.content, analysis), (b"found it here", {'length-in-bytes': 13}))
+            self.assertFalse(is_truncated(response))
+
+    def test_module_streaming_run(self):
+        config = {'fuzz_engine': {'stream_responses': True}}
+        response_analysis = {'matching_requirements': ['match', {'response-code': {'code': [200]}}],
+                             'analysis_parameters': ['length-in-bytes']}
+        with contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=4, wordlists={'$path$': ['hit', 'miss', 'big'] * 5},
+                                    config=config, response_analysis=response_analysis)
+            asyncio.run(module.run_fuzz({'method': 'GET', 'url': f"{self.server.url}/$path$"}, 'product'))
+
+        results = list(module.base_fuzz_results(response=True))
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(response.content == b"found it here" for response, _ in results))
+        self.assertEqual(module.match_stats()['evaluated'], 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+
+from utils.combination_space import ZipSpace
+from utils.wordlist_cache import WordlistCache, content_id, normalise_wordlist
+from utils.wordlist_wrapper import process_wordlists_dict, close_wordlists
+
+
+class TestWordlistCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = WordlistCache(os.path.join(self.directory.name, 'cache'))
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_normalise(self):
+        content = b'\xef\xbb\xbfadmin\r\nuser\nadmin\n\n\nlast'
+        self.assertEqual(normalise_wordlist(content), b'admin\nuser\nadmin\n\n\nlast\n')
+        self.assertEqual(normalise_wordlist(content, dedupe=True), b'admin\nuser\n\nlast\n')
+        self.assertEqual(normalise_wordlist(b''), b'')
+        self.assertEqual(normalise_wordlist(b'\n'), b'\n')
+
+    def test_add_and_get(self):
+        content = 'admin\r\nuser\nadmin\n'
+        wordlist_id = self.cache.add(content, name='words.txt')
+        self.assertEqual(wordlist_id, content_id(content.encode()))
+        self.assertIn(wordlist_id, self.cache)
+        path = self.cache.path_of(wordlist_id)
+        modified = os.stat(path).st_mtime_ns
+
+        # cached already: not written again
+        self.assertEqual(self.cache.add(content), wordlist_id)
+        self.assertEqual(os.stat(path).st_mtime_ns, modified)
+        with self.cache.get(wordlist_id) as wordlist:
+            self.assertEqual(list(wordlist), ['admin', 'user', 'admin'])
+            self.assertIsInstance(wordlist._starts, memoryview)
+        self.assertEqual([(entry['name'], entry['words']) for entry in self.cache.entries()], [('words.txt', 3)])
+
+        # deduped on request only, under another id
+        deduped_id = self.cache.add(content, dedupe=True)
+        self.assertEqual(deduped_id, content_id(content, dedupe=True))
+        self.assertNotEqual(deduped_id, wordlist_id)
+        with self.cache.get(deduped_id) as wordlist:
+            self.assertEqual(list(wordlist), ['admin', 'user'])
+        self.cache.remove(deduped_id)
+
+        with self.assertRaises(KeyError):
+            self.cache.get(content_id('other'))
+        with self.assertRaises(KeyError):
+            self.cache.get('../../etc/passwd')
+        with self.assertRaises(ValueError):
+            self.cache.path_of('../../etc/passwd')
+        # removed from the directory by hand
+        os.remove(path)
+        with self.assertRaises(KeyError):
+            self.cache.get(wordlist_id)
+
+    def test_least_recently_used_are_evicted(self):
+        contents = ['\n'.join(f"{name}{i}" for i in range(1000)) for name in ('first', 'second', 'third')]
+        ids = [self.cache.add(content) for content in contents[:2]]
+        # room for two wordlists
+        self.cache.max_bytes = self.cache.size + 100
+        self.cache.get(ids[0]).close()
+
+        self.cache.add(contents[2])
+        self.assertEqual([ids[0] in self.cache, ids[1] in self.cache], [True, False])
+        self.assertFalse(os.path.exists(self.cache.path_of(ids[1])))
+        self.assertLessEqual(self.cache.size, self.cache.max_bytes)
+
+        # never the one just added
+        self.cache.max_bytes = 0
+        added = self.cache.add('admin')
+        self.assertEqual([entry['id'] for entry in self.cache.entries()], [added])
+
+    def test_wordlists_sent_by_id(self):
+        wordlists = process_wordlists_dict({'$path$': {'filename': 'paths.txt', 'content': 'admin\nusers\n'}},
+                                           cache=self.cache)
+        self.assertEqual(list(wordlists['$path$']), ['admin', 'users'])
+        wordlist_id = content_id('admin\nusers\n')
+        wordlists = process_wordlists_dict({'$path$': {'filename': 'paths.txt', 'id': wordlist_id}}, cache=self.cache)
+        self.assertEqual(list(wordlists['$path$']), ['admin', 'users'])
+        with self.assertRaises(KeyError):
+            process_wordlists_dict({'$path$': {'id': content_id('unknown')}}, cache=self.cache)
+        deduped = process_wordlists_dict({'$path$': {'content': 'a\nb\na', 'dedupe': True}}, cache=self.cache)
+        self.assertEqual(list(deduped['$path$']), ['a', 'b'])
+        # without a cache
+        self.assertEqual(process_wordlists_dict({'$path$': {'content': 'a\nb'}}), {'$path$': ['a', 'b']})
+
+    def test_zip_keeps_duplicate_words(self):
+        wordlists = process_wordlists_dict({'$user$': {'content': 'admin\nadmin\nroot\n\n\nguest'},
+                                            '$password$': {'content': 'a\nb\nc\nd\ne\nf'}}, cache=self.cache)
+        pairs = list(ZipSpace([wordlists['$user$'], wordlists['$password$']]))
+        self.assertEqual(pairs, [('admin', 'a'), ('admin', 'b'), ('root', 'c'), ('', 'd'), ('', 'e'), ('guest', 'f')])
+        close_wordlists(wordlists)
+
+    def test_close_wordlists(self):
+        wordlists = process_wordlists_dict({'$path$': {'content': 'admin\nusers'},
+                                            '$user$': {'content': 'root', 'transforms': [{'case': ['upper']}]},
+                                            '$id$': {'content': '1\n2'}}, cache=self.cache)
+        wordlists['$id$'] = ['1', '2']
+        close_wordlists(wordlists)
+        # maps released, the lists are left as they are
+        self.assertEqual((len(wordlists['$path$']), len(wordlists['$user$'].wordlist)), (0, 0))
+        self.assertEqual(wordlists['$id$'], ['1', '2'])
+
+
+if __name__ == "__main__":
+    unittest.main()
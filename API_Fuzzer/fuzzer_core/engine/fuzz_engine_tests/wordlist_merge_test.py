@@ -0,0 +1,104 @@
+import itertools
+import os
+import random
+import tempfile
+import unittest
+
+from utils.wordlist_cache import WordlistCache
+from utils.wordlist_merge import ExternalSorter, merge_wordlists
+from utils.wordlist_wrapper import Wordlist
+
+
+class TestWordlistMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, 'merged.txt')
+        random.seed(11)
+        self.paths = [random.choice(('admin', 'api', 'v1', 'users')) for _ in range(300)]
+        self.ids = [str(random.randint(0, 30)) for _ in range(40)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def merged(self, merge_type, **options):
+        written = merge_wordlists([self.paths, self.ids], merge_type, self.output, separator='/',
+                                  temporary_directory=self.directory.name, **options)
+        with open(self.output) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(written, len(lines))
+        return lines
+
+    def test_external_sort_spills_runs(self):
+        lines = [b'%d\n' % random.randint(0, 10 ** 6) for _ in range(5000)]
+        sorter = ExternalSorter(self.directory.name, run_bytes=4096)
+        sorter.add_lines(lines)
+        self.assertGreater(len(sorter._runs), 10)
+        self.assertEqual(list(sorter.sorted_lines()), sorted(lines))
+
+    def test_merge_types(self):
+        self.assertEqual(self.merged('chain'), self.paths + self.ids)
+        self.assertEqual(self.merged('zip'), ['/'.join(pair) for pair in zip(self.paths, self.ids)])
+        product = ['/'.join(pair) for pair in itertools.product(self.paths, self.ids)]
+        self.assertEqual(self.merged('product'), product)
+        with self.assertRaises(ValueError):
+            self.merged('shuffle')
+
+    def test_dedupe_and_sort_with_bounded_runs(self):
+        product = ['/'.join(pair) for pair in itertools.product(self.paths, self.ids)]
+        # runs of a few hundred lines: the sorts go through temporary files
+        self.assertEqual(self.merged('product', dedupe=True, run_bytes=16384), list(dict.fromkeys(product)))
+        self.assertEqual(self.merged('product', sort=True, run_bytes=16384), sorted(product))
+        self.assertEqual(self.merged('product', dedupe=True, sort=True, run_bytes=16384), sorted(set(product)))
+
+        progress = []
+        self.merged('chain', progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(progress[-1], (340, 340))
+
+    def test_progress_of_a_space_bigger_than_len_allows(self):
+        totals = []
+
+        def progress(done, total):
+            totals.append(total)
+            raise KeyboardInterrupt
+
+        # 10 ** 20 combinations: above sys.maxsize, stopped after the first batch
+        words = [str(i) for i in range(10 ** 4)]
+        with self.assertRaises(KeyboardInterrupt):
+            merge_wordlists([words] * 5, 'product', self.output, progress=progress)
+        self.assertEqual(totals, [10 ** 20])
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_merge_to_cache(self):
+        with WordlistCache(os.path.join(self.directory.name, 'cache')) as cache:
+            sources = [cache.load('\n'.join(self.paths)), cache.load('\n'.join(self.ids))]
+            wordlist_id = Wordlist.merge_to_cache(sources, 'product', cache, separator=':', sort=True, dedupe=True)
+            with cache.get(wordlist_id) as merged:
+                expected = sorted(f"{path}:{number}" for path, number in itertools.product(set(self.paths),
+                                                                                            set(self.ids)))
+                self.assertEqual(list(merged), expected)
+            self.assertEqual(cache.entries()[0]['name'], 'product.txt')
+            # the same merge again is the same cached wordlist
+            self.assertEqual(Wordlist.merge_to_cache(sources, 'product', cache, separator=':', sort=True, dedupe=True),
+                             wordlist_id)
+            self.assertEqual(len(cache.entries()), 3)
+            self.assertFalse([name for name in os.listdir(cache.directory) if name.startswith('merge-')])
+            for source in sources:
+                source.close()
+
+    def test_zip_merge_of_cached_wordlists_keeps_duplicates(self):
+        with WordlistCache(os.path.join(self.directory.name, 'cache')) as cache:
+            sources = [cache.load('admin\nadmin\nroot'), cache.load('a\nb\nc')]
+            wordlist_id = Wordlist.merge_to_cache(sources, 'zip', cache, separator=':')
+            with cache.get(wordlist_id) as merged:
+                self.assertEqual(list(merged), ['admin:a', 'admin:b', 'root:c'])
+            # duplicates removed from the merge only
+            deduped_id = Wordlist.merge_to_cache(sources, 'chain', cache, dedupe=True)
+            with cache.get(deduped_id) as merged:
+                self.assertEqual(list(merged), ['admin', 'root', 'a', 'b', 'c'])
+            for source in sources:
+                source.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import contextlib
+import io
+import pickle
+import unittest
+
+from fuzzer_core.engine.fuzz_engine_tests.stand_in_server import StandInServer
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+from utils.combination_space import ProductSpace
+from utils.encoding_decoding import encode_content
+from utils.wordlist_transforms import TransformedWordlist, compile_rule
+from utils.wordlist_wrapper import process_wordlists_dict
+
+PIPELINE = [{'rules': [':', 'c $1', 'r', 'sa4']},
+            {'case': ['keep', 'upper']},
+            {'prefixes': ['', '.'], 'suffixes': {'range': [0, 3]}},
+            {'encodings': [[], ['urlencode'], ['base64', 'urlencode']]}]
+
+
+def expanded(words):
+    # what the pipeline expands to, built eagerly
+    variants = []
+    for word in words:
+        for ruled in (word, word.capitalize() + '1', word[::-1], word.replace('a', '4')):
+            for cased in (ruled, ruled.upper()):
+                for affixed in (f"{prefix}{cased}{suffix}" for prefix in ('', '.') for suffix in range(3)):
+                    variants.extend(encode_content(affixed, chain) if chain else affixed
+                                    for chain in ([], ['urlencode'], ['base64', 'urlencode']))
+    return variants
+
+
+class TestWordlistTransforms(unittest.TestCase):
+
+    def test_rules(self):
+        cases = {':': 'password', 'l': 'password', 'u': 'PASSWORD', 'c': 'Password', 'C': 'pASSWORD',
+                 'T0 T2': 'PaSsword', 'r': 'drowssap', 'd': 'passwordpassword', 'p1': 'passwordpassword',
+                 'f': 'passworddrowssap', '{': 'asswordp', '}': 'dpasswor', '$1$2': 'password12', '^!': '!password',
+                 '[': 'assword', ']': 'passwor', 'D3': 'pasword', 'x04': 'pass', 'O04': 'word', 'i4_': 'pass_word',
+                 'o0P': 'Password', "'4": 'pass', 'ss$': 'pa$$word', '@s': 'paword', 'z2': 'pppassword',
+                 'Z2': 'passworddd', 'c sa@ $!': 'P@ssword!', 'TA': 'password'}
+        for rule, expected in cases.items():
+            self.assertEqual(compile_rule(rule)('password'), expected, rule)
+        for rule in ('k', '$', 'T!'):
+            with self.assertRaises(ValueError):
+                compile_rule(rule)
+
+    def test_size_and_order(self):
+        words = ['admin', 'data', 'x']
+        wordlist = TransformedWordlist(words, PIPELINE)
+        self.assertEqual(wordlist.variants, 4 * 2 * 6 * 3)
+        self.assertEqual(len(wordlist), 3 * 144)
+        expected = expanded(words)
+        self.assertEqual(list(wordlist), expected)
+        self.assertEqual([wordlist[index] for index in range(len(wordlist))], expected)
+        self.assertEqual(list(wordlist[100:200:7]), expected[100:200:7])
+        self.assertEqual([item for shard in wordlist.shards(5) for item in shard], expected)
+        self.assertEqual(list(pickle.loads(pickle.dumps(wordlist))), expected)
+
+        with self.assertRaises(ValueError):
+            TransformedWordlist(words, [{'encodings': [['rot13']]}])
+        with self.assertRaises(ValueError):
+            TransformedWordlist(words, [{'shuffle': True}])
+
+    def test_billions_of_variants_are_never_materialised(self):
+        words = TransformedWordlist([f"user{i}" for i in range(1000)],
+                                    [{'rules': [':', 'u', 'c']}, {'suffixes': {'range': [0, 10 ** 6]}}])
+        self.assertEqual(len(words), 3 * 10 ** 9)
+        self.assertEqual(words[-1], 'User999999999')
+        self.assertEqual(words[10 ** 6 + 42], 'USER042')
+        self.assertEqual(words[2 * 10 ** 6 + 42], 'User042')
+
+        # used as a wordlist: a space bigger than len() allows
+        space = ProductSpace([words, words, words])
+        self.assertEqual(space.size, 27 * 10 ** 27)
+        self.assertEqual(space[space.size - 1], ('User999999999',) * 3)
+
+    def test_transformed_run(self):
+        wordlists = process_wordlists_dict({'$path$': {'content': 'admin\nbackup', 'transforms': [
+            {'case': ['keep', 'upper']}, {'suffixes': ['', '.bak']}]}})
+        self.assertEqual(len(wordlists['$path$']), 8)
+        with StandInServer() as server, contextlib.redirect_stdout(io.StringIO()):
+            module = FuzzBaseModule(num_workers=2, wordlists=wordlists,
+                                    config={'fuzz_engine': {'result_records': True}})
+            asyncio.run(module.run_fuzz({'method': 'GET', 'url': server.url + '/$path$'}, None))
+        paths = sorted(result.url.rsplit('/', 1)[1] for result, _ in module.base_fuzz_results(response=True))
+        self.assertEqual(paths, sorted(['admin', 'admin.bak', 'ADMIN', 'ADMIN.bak',
+                                        'backup', 'backup.bak', 'BACKUP', 'BACKUP.bak']))
+
+
+if __name__ == "__main__":
+    unittest.main()
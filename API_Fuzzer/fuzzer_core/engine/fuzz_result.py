@@ -0,0 +1,127 @@
+import sys
+
+import httpx
+
+from fuzzer_core.engine.queues.request_queue import FUZZ_INDEX_EXTENSION
+from fuzzer_core.engine.response_analyser import declared_body_length
+from fuzzer_core.engine.response_hasher import ResponseHasher
+from fuzzer_core.engine.response_metrics import ResponseMetrics, is_truncated
+
+"""
+NOTES:
+
+- a FuzzResult is what the response queue keeps of a response (fuzz_engine.result_records): a few ints and strings in
+  __slots__ instead of the httpx.Response with its headers, request, stream and body
+- fuzz_index is the index of the combination in the fuzz space (set on the request by the request queue): the fuzz
+  tuple of a result is found again with CombinationSpace[fuzz_index], the request doesn't need to be kept
+- the lengths come from the cached ResponseMetrics (so they cover the whole body of a truncated response), they are
+  None when the body was discarded (streamed responses without keep_body), length falls back to Content-Length
+- the body itself isn't kept, body_offset is its position in a body store when one is used
+- body_hash is the digest of the analyser's ResponseHasher (hexdigest is its response-hash analysis): a result is
+  found in a store by the hash the analysis shows, whatever the algorithm and hashed headers configured
+"""
+
+
+# hasher of the records made without an analyser (the one a ResponseAnalyser uses by default)
+DEFAULT_HASHER = ResponseHasher()
+
+
+def fuzz_index(request) -> int | None:
+    """
+    :param request: sent request (httpx.Request or RawRequest)
+    :return: index of the combination the request was rendered from (None if it wasn't set)
+    """
+    return None if request is None else request.extensions.get(FUZZ_INDEX_EXTENSION)
+
+
+class FuzzResult:
+    __slots__ = ('fuzz_index', 'method', 'url', 'status_code', 'elapsed', 'length', 'lines', 'words', 'chars',
+                 'body_hash', 'truncated', 'body_offset')
+
+    def __init__(self, fuzz_index: int | None, method: str, url: str, status_code: int | None = None,
+                 elapsed: float | None = None, length: int | None = None, lines: int | None = None,
+                 words: int | None = None, chars: int | None = None, body_hash: bytes | None = None,
+                 truncated: bool = False, body_offset: int | None = None):
+        """
+        :param fuzz_index: index of the fuzz combination of the request
+        :param method: request method
+        :param url: request url
+        :param status_code: None if the request failed
+        :param elapsed: seconds between sending the request and closing the response
+        :param length: body length in bytes
+        :param lines: body length in lines
+        :param words: body length in words
+        :param chars: body length in characters
+        :param body_hash: digest of the response (status code, kept headers and body, see ResponseHasher)
+        :param truncated: only the first bytes of the body were kept
+        :param body_offset: position of the body in a body store
+        """
+        self.fuzz_index = fuzz_index
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.elapsed = elapsed
+        self.length = length
+        self.lines = lines
+        self.words = words
+        self.chars = chars
+        self.body_hash = body_hash
+        self.truncated = truncated
+        self.body_offset = body_offset
+
+    @classmethod
+    def from_response(cls, response: httpx.Response | None, request=None,
+                      hasher: ResponseHasher = None) -> 'FuzzResult':
+        """
+        :param response: response to keep (None if the request failed)
+        :param request: request sent (the request of the response if not given)
+        :param hasher: hasher of the response analyser (default: blake2b, volatile headers left out)
+        :return: FuzzResult
+        """
+        if request is None and response is not None:
+            request = response.request
+        # the httpx request of a raw response is rebuilt from its raw request, without its extensions
+        index = fuzz_index(getattr(response, 'raw_request', None) or request)
+        # methods are a handful of strings shared by every result
+        result = cls(index, sys.intern(request.method) if request is not None else None,
+                     str(request.url) if request is not None else None)
+        if response is None:
+            return result
+
+        result.status_code = response.status_code
+        try:
+            result.elapsed = response.elapsed.total_seconds()
+        except RuntimeError:
+            # response never closed
+            pass
+        try:
+            response.content
+        except httpx.ResponseNotRead:
+            # body discarded
+            result.length = declared_body_length(response)
+            return result
+
+        metrics = ResponseMetrics.of_response(response)
+        result.length, result.lines, result.words, result.chars = (metrics.bytes, metrics.length_in_lines,
+                                                                   metrics.words, metrics.chars)
+        result.body_hash = (DEFAULT_HASHER if hasher is None else hasher).digest(response)
+        result.truncated = is_truncated(response)
+        return result
+
+    @property
+    def hexdigest(self) -> str | None:
+        return None if self.body_hash is None else self.body_hash.hex()
+
+    def as_dict(self) -> dict:
+        return {'fuzz_index': self.fuzz_index, 'method': self.method, 'url': self.url,
+                'status_code': self.status_code, 'elapsed': self.elapsed, 'length': self.length,
+                'lines': self.lines, 'words': self.words, 'chars': self.chars, 'body_hash': self.hexdigest,
+                'truncated': self.truncated, 'body_offset': self.body_offset}
+
+    def __eq__(self, other):
+        if not isinstance(other, FuzzResult):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"<FuzzResult #{self.fuzz_index} {self.method} {self.url} [{self.status_code}] length={self.length}>"
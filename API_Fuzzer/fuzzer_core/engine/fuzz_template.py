@@ -0,0 +1,96 @@
+import re
+from typing import Callable, Sequence
+
+"""
+NOTES:
+
+- a request (dict or raw string) is parsed once into a tree of renderers: constants, strings made of literal segments
+  and placeholder slots, and containers (dict / list / tuple) of renderers
+- rendering a fuzz tuple fills the slots directly: no str(dict), no str.replace chains, no ast.literal_eval, so
+  payloads containing quotes, backslashes or brackets are loaded as they are
+- the placeholders are found in the same order as they appear in str(request), which is the order the wordlists are
+  combined in (see extract_ordered_wordlists_list)
+- containers are rebuilt on every render, the rendered requests never share a mutable object
+"""
+
+FUZZ_PATTERN = re.compile(r'\$\w+\$')
+
+
+class FuzzTemplate:
+    def __init__(self, template: str | dict | list | tuple):
+        """
+        :param template: request content (raw string or dict) with $placeholder$ fuzz points
+        """
+        self.template = template
+        # every placeholder occurrence in order of appearance
+        self.matches = []
+        self._find_matches(template)
+
+        # slot of each placeholder: index of its word in the fuzz tuples
+        self.fields = list(dict.fromkeys(self.matches))
+        self._slots = {field: index for index, field in enumerate(self.fields)}
+        self._render = self._compile(template)
+
+    def render(self, words: Sequence):
+        """
+        Loads a fuzz tuple into the template
+        :param words: one word per placeholder, in the order of self.fields
+        :return: str or dict (same structure as the template)
+        """
+        return self._render(words)
+
+    __call__ = render
+
+    def render_all(self, tuples):
+        """
+        :param tuples: iterable of fuzz tuples
+        :return: generator of rendered templates
+        """
+        render = self._render
+        for words in tuples:
+            yield render(words)
+
+    def _find_matches(self, node):
+        if isinstance(node, str):
+            self.matches.extend(FUZZ_PATTERN.findall(node))
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                self._find_matches(key)
+                self._find_matches(value)
+        elif isinstance(node, (list, tuple)):
+            for item in node:
+                self._find_matches(item)
+
+    def _compile(self, node) -> Callable:
+        if isinstance(node, str):
+            return self._compile_string(node)
+
+        if isinstance(node, dict):
+            items = [(self._compile(key), self._compile(value)) for key, value in node.items()]
+            return lambda words: {key(words): value(words) for key, value in items}
+
+        if isinstance(node, (list, tuple)):
+            items = [self._compile(item) for item in node]
+            container = type(node)
+            return lambda words: container([item(words) for item in items])
+
+        # numbers, booleans, None, bytes: immutable constants
+        return lambda words: node
+
+    def _compile_string(self, string: str) -> Callable:
+        parts = re.split(f"({FUZZ_PATTERN.pattern})", string)
+        if len(parts) == 1:
+            return lambda words: string
+
+        if len(parts) == 3 and parts[0] == parts[2] == '':
+            # the whole string is a placeholder
+            slot = self._slots[parts[1]]
+            return lambda words: str(words[slot])
+
+        # literal segments (with format braces escaped) and positional slots, filled in a single str.format call
+        format_string = ''.join(f"{{{self._slots[part]}}}" if index % 2 else part.replace('{', '{{').replace('}', '}}')
+                                for index, part in enumerate(parts))
+        return lambda words: format_string.format(*words)
+
+    def __repr__(self):
+        return f"FuzzTemplate(fields={self.fields})"
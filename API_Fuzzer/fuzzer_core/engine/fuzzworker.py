@@ -2,7 +2,8 @@ import asyncio
 import time
 from typing import Callable
 
-from fuzzer_core.engine.queues.request_queue import RequestQueue
+from fuzzer_core.engine.fuzz_result import FuzzResult
+from fuzzer_core.engine.queues.request_queue import RequestQueue, NoMoreItems
 from fuzzer_core.engine.queues.response_queue import ResponseQueue
 from fuzzer_core.engine.ratelimiter import RateLimiter
 from fuzzer_core.engine.request_builder import RequestBuilder
@@ -15,10 +16,13 @@ from fuzzer_core.engine.response_analyser import ResponseNotMatchedExc
 class FuzzWorker:
 
     def __init__(self, request_queue: RequestQueue, response_queue: ResponseQueue, requester_client=None, rate_limiter=None,
-                 response_analyser=None, plugin_func: Callable = None, is_paused=False):
+                 response_analyser=None, plugin_func: Callable = None, is_paused=False, max_retries: int = 3,
+                 result_records: bool = False):
         """
 
         :param is_paused:
+        :param max_retries: times a request throttled by the target is sent again before its response is kept
+        :param result_records: a FuzzResult record is put in the response queue instead of the response
         :param event_loop:
         :param request_queue:
         :param response_queue:
@@ -34,52 +38,124 @@ class FuzzWorker:
         self.response_analyser = response_analyser if response_analyser is not None else None
         self.plugin_function = plugin_func if plugin_func is not None else None
         self.is_paused = is_paused
+        self.max_retries = max_retries
+        self.result_records = result_records
+        # the requester sends the requests in streaming mode: bodies are downloaded once the response is kept
+        self.stream_responses = getattr(self.requester_client, 'stream_responses', False)
 
         # self.event_loop = asyncio.new_event_loop() if event_loop is None else event_loop
         print("successfully created fuzzworker")
 
     async def work(self):
-        print("starting work method ")
+        # The rate limiter (if any) is acquired for each request in process_requests
+        await self.process_requests()
 
-        # Check if rate limiter exists and use it if it does
-        if self.rate_limiter:
-            async with self.rate_limiter:
-                async with self.rate_limiter.throttle():
-                    await self.process_requests()
+    async def send_request(self, request, auth):
+        """
+        Sends a request once the rate limiter allows it
+        :param request: built request
+        :param auth: request authentication
+        :return: response or None (only its headers are received in streaming mode)
+        """
+        kwargs = {'stream': True} if self.stream_responses else {}
+        if self.rate_limiter is None:
+            return await self.requester_client.send_request(request, auth, **kwargs)
+
+        async with self.rate_limiter.throttle(host=request.url.host):
+            return await self.requester_client.send_request(request, auth, **kwargs)
+
+    async def analyse_response(self, response) -> tuple[bool, dict | None]:
+        """
+        Runs the match / hide plan and the analysis of a response
+        A streamed response (headers only) goes through the rules answered from its headers first: the body of a
+        response they filter out is discarded, the body of a kept one is only downloaded if needed
+        :param response: response or None
+        :return: (kept, analysis results)
+        """
+        analyser = self.response_analyser
+        if response is None or response.is_closed:
+            if analyser is None:
+                return True, None
+            analysis = analyser.evaluate(response)
+            return analysis is not None, analysis
+
+        values = {}
+        first_rule = 0 if analyser is None else analyser.match_headers(response, values)
+        if first_rule is None:
+            await self.requester_client.discard(response)
+            return False, None
+
+        if analyser is None or self.requester_client.keep_body or analyser.needs_body(response, first_rule):
+            await self.requester_client.read_body(response)
         else:
-            # If no rate limiter, directly process the requests
-            await self.process_requests()
+            await self.requester_client.discard(response)
+        if analyser is None:
+            return True, None
+        analysis = analyser.evaluate(response, values, first_rule=first_rule)
+        return analysis is not None, analysis
+
+    def requeue_if_throttled(self, request, auth, response) -> bool:
+        """
+        Gives the response to the rate limiter, a request throttled by the target is put back in the request queue
+        (at most max_retries times, after that its response is kept as a result)
+        :param request: sent request
+        :param auth: request authentication
+        :param response: response or None
+        :return: True if the request was put back in the queue
+        """
+        if self.rate_limiter is None or not self.rate_limiter.update_from_response(response, host=request.url.host):
+            return False
+
+        retries = request.extensions.get('retries', 0)
+        if retries >= self.max_retries:
+            return False
+
+        request.extensions['retries'] = retries + 1
+        self.request_queue.requeue((request, auth))
+        return True
 
     async def process_requests(self):
-        # Get the next URL from the queue
-        async with self.request_queue:
-            #print("BEFORE QUEUE EMPTY CHECK  *** QSIZE:  " + str(self.request_queue.qsize()))
-            while not self.request_queue.empty():
-                print("getting request")
+        # The request queue is shared with the producer and the other workers, it's not closed from here
+        while True:
+            # Get the next request from the queue (waits while the producer is still loading it)
+            try:
                 request, auth = await self.request_queue.get()
+            except NoMoreItems:
+                break
 
-                if self.plugin_function:
+            if self.plugin_function:
+                # a plugin sends its own requests: the whole call counts as one acquisition of the rate limiter
+                if self.rate_limiter is None:
                     responses = await self.plugin_function(requester_client=self.requester_client, request=request,
                                                            auth=auth)
                 else:
-                    responses = [await self.requester_client.send_request(request, auth)]
-
-                for response in responses:
-                    analysis = None
-                    try:
-                        if self.response_analyser is not None:
-                            analysis = self.response_analyser.response_analysis(response=response)
-                            if analysis:
-                                print(analysis)
-                        await self.response_queue.put((response, analysis))
-
-                    except ResponseNotMatchedExc:
-                        # If response wasn't matched it won't be added to the response queue
-                        continue
-
-        print("no more responses")
-        # Response queue stops loading when sending requests is over
-        self.response_queue.is_loading = False #not self.response_queue.is_loading
+                    async with self.rate_limiter.throttle(host=request.url.host):
+                        responses = await self.plugin_function(requester_client=self.requester_client,
+                                                               request=request, auth=auth)
+                    # the plugin requests can't be sent again on their own, the limiter still adapts to them
+                    for response in responses:
+                        self.rate_limiter.update_from_response(response, host=request.url.host)
+            else:
+                response = await self.send_request(request, auth)
+                if self.requeue_if_throttled(request, auth, response):
+                    if response is not None and not response.is_closed:
+                        # streamed response of a request sent again: releases its connection
+                        await self.requester_client.discard(response)
+                    continue
+                responses = [response]
+
+            for response in responses:
+                kept, analysis = await self.analyse_response(response)
+                if not kept:
+                    # If response wasn't matched it won't be added to the response queue
+                    continue
+                if self.result_records:
+                    # the response (headers, request, body) is dropped once its record is made
+                    response = FuzzResult.from_response(response, request if response is None else None,
+                                                        hasher=getattr(self.response_analyser, 'hasher', None))
+                await self.response_queue.put((response, analysis))
+
+        # The response queue is closed by the caller once every worker is done
 
     '''async def work(self):
         print("starting worker method ")
@@ -0,0 +1,200 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable
+
+import httpx
+
+from fuzzer_core.engine.fuzzworker import FuzzWorker
+from fuzzer_core.engine.queues.request_queue import RequestQueue, NoMoreItems
+from fuzzer_core.engine.queues.response_queue import ResponseQueue
+from fuzzer_core.engine.requester.requester import Requester
+
+"""
+NOTES:
+
+- one lane per origin (scheme://host:port), each with its own bounded request queue, Requester (connection pool),
+  RateLimiter and worker slots: a slow origin only holds its own workers and connections
+- the dispatcher takes the built requests from the main request queue and routes them to the lane of their origin,
+  it never waits on a lane: a request that doesn't fit in the queue of its lane goes to the lane's overflow, which
+  the lane's feeder moves to its queue as its workers make room. A full (slow, stalled) lane only holds up its own
+  origin, the dispatcher keeps serving the others (the overflow of a stalled origin grows meanwhile)
+- lanes are created on the first request of their origin, the responses of every lane go to the same response queue
+"""
+
+
+def request_origin(request: httpx.Request) -> str:
+    """
+    :param request: built request
+    :return: origin of the request: scheme://host[:port]
+    """
+    return f"{request.url.scheme}://{request.url.netloc.decode('ascii')}"
+
+
+class OriginLane:
+    def __init__(self, origin: str, request_queue: RequestQueue, requester_client: Requester, rate_limiter=None):
+        """
+        :param origin: scheme://host[:port]
+        :param request_queue: requests of the origin
+        :param requester_client: client (and connection pool) of the origin
+        :param rate_limiter: rate limiter of the origin (None: no rate limiting)
+        """
+        self.origin = origin
+        self.request_queue = request_queue
+        self.requester_client = requester_client
+        self.rate_limiter = rate_limiter
+
+        self.workers = None
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+        # requests routed to the lane while its queue was full, in order
+        self.overflow = deque()
+        self._overflowed = asyncio.Event()
+        self._closing = False
+        self._feeder = None
+
+    def start(self, worker: FuzzWorker, num_workers: int):
+        self.workers = asyncio.gather(*(worker.work() for _ in range(num_workers)))
+        self.workers.add_done_callback(self._finished)
+        self._feeder = asyncio.create_task(self._feed())
+
+    def push(self, item: tuple):
+        """
+        Routes a request to the lane without waiting: queued if there's room, kept in the overflow otherwise
+        :param item: (request, auth) tuple
+        :return:
+        """
+        if not self.overflow and not self.request_queue.full():
+            self.request_queue.put_nowait(item)
+        else:
+            self.overflow.append(item)
+            self._overflowed.set()
+
+    async def _feed(self):
+        # moves the overflow to the queue (waiting for room), then closes the queue once the lane is closed
+        while True:
+            while self.overflow:
+                await self.request_queue.put_built(self.overflow.popleft())
+            if self._closing:
+                break
+            await self._overflowed.wait()
+            self._overflowed.clear()
+        await self.request_queue.close()
+
+    async def close(self):
+        """
+        No more requests for the lane: its queue is closed once its overflow is queued
+        :return:
+        """
+        self._closing = True
+        self._overflowed.set()
+        await self._feeder
+
+    def _finished(self, _):
+        self.finished_at = time.perf_counter()
+
+    def stats(self) -> dict:
+        """
+        :return: dict with the requests sent, requests still queued, time spent, throughput, pool and limiter stats
+        """
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        requests = self.requester_client.pool_stats.requests
+        # the end of queue marker stays in the queue once it's closed
+        pending = self.request_queue.qsize() - (0 if self.request_queue.is_loading else 1) + len(self.overflow)
+
+        return {'requests': requests,
+                'pending': max(pending, 0),
+                'elapsed': elapsed,
+                'requests_per_second': requests / elapsed if elapsed else 0.0,
+                'done': self.finished_at is not None,
+                'pool': self.requester_client.pool_stats.as_dict(),
+                'rate_limiter': self.rate_limiter.as_dict() if self.rate_limiter is not None else None}
+
+
+class OriginScheduler:
+    def __init__(self, request_queue: RequestQueue, response_queue: ResponseQueue, requester_factory: Callable,
+                 rate_limiter_factory: Callable = None, workers_per_origin: int = 1, queue_size: int = 1000,
+                 response_analyser=None, plugin_func: Callable = None, max_retries: int = 3,
+                 result_records: bool = False):
+        """
+        :param request_queue: queue filled by the producer (requests of every origin)
+        :param response_queue: queue receiving the responses of every origin
+        :param requester_factory: creates the Requester of a new origin
+        :param rate_limiter_factory: creates the rate limiter of a new origin (None: no rate limiting)
+        :param workers_per_origin: worker slots of each origin
+        :param queue_size: size of the request queue of each origin
+        :param response_analyser:
+        :param plugin_func:
+        :param max_retries: times a request throttled by the target is sent again
+        :param result_records: responses are kept as FuzzResult records
+        """
+        self.request_queue = request_queue
+        self.response_queue = response_queue
+        self.requester_factory = requester_factory
+        self.rate_limiter_factory = rate_limiter_factory
+        self.workers_per_origin = workers_per_origin
+        self.queue_size = queue_size
+        self.response_analyser = response_analyser
+        self.plugin_function = plugin_func
+        self.max_retries = max_retries
+        self.result_records = result_records
+
+        self.lanes: dict[str, OriginLane] = {}
+
+    def lane(self, origin: str) -> OriginLane:
+        """
+        Lane of the origin, created (and its workers started) on the first request of the origin
+        :param origin: scheme://host[:port]
+        :return: OriginLane
+        """
+        if origin not in self.lanes:
+            lane = OriginLane(origin=origin,
+                              request_queue=RequestQueue(request_builder=self.request_queue.request_builder,
+                                                         maxsize=self.queue_size),
+                              requester_client=self.requester_factory(),
+                              rate_limiter=self.rate_limiter_factory() if self.rate_limiter_factory else None)
+            worker = FuzzWorker(request_queue=lane.request_queue, response_queue=self.response_queue,
+                                requester_client=lane.requester_client, rate_limiter=lane.rate_limiter,
+                                response_analyser=self.response_analyser, plugin_func=self.plugin_function,
+                                max_retries=self.max_retries, result_records=self.result_records)
+            lane.start(worker, self.workers_per_origin)
+            self.lanes[origin] = lane
+
+        return self.lanes[origin]
+
+    async def dispatch(self):
+        """
+        Routes the requests of the main request queue to the lanes of their origin, until the queue is closed
+        :return:
+        """
+        try:
+            while True:
+                try:
+                    item = await self.request_queue.get()
+                except NoMoreItems:
+                    break
+                self.lane(request_origin(item[0])).push(item)
+        finally:
+            # every lane is closed at once: a lane still feeding its overflow doesn't delay the end of the others
+            await asyncio.gather(*(lane.close() for lane in self.lanes.values()))
+
+    async def run(self):
+        """
+        Dispatches the requests and waits for the workers of every lane, the response queue is closed at the end
+        :return:
+        """
+        self.response_queue.loading_start()
+        try:
+            await self.dispatch()
+            await asyncio.gather(*(lane.workers for lane in self.lanes.values()))
+        finally:
+            self.response_queue.close()
+            for lane in self.lanes.values():
+                await lane.requester_client.aclose()
+
+    def stats(self) -> dict:
+        """
+        :return: stats of each origin
+        """
+        return {origin: lane.stats() for origin, lane in self.lanes.items()}
@@ -1,5 +1,7 @@
+import asyncio
 import json
-from asyncio import (Queue, QueueEmpty)
+from asyncio import Queue, QueueFull
+from typing import Iterable
 #from queue import Queue, Empty as QueueEmpty
 from urllib.parse import urlparse
 
@@ -76,52 +78,88 @@ class NoMoreItems(Exception):
         return f"{self.message}{' (' + self.additional_info + ')' if self.additional_info else ''}"
 
 
+# Marker put at the end of the queue once the producer is done, every consumer that reaches it puts it back
+# (for the next consumer) and stops
+END_OF_QUEUE = object()
+
+# request extension holding the index of the fuzz combination a request was rendered from
+FUZZ_INDEX_EXTENSION = 'fuzz_index'
+
+
+def drop_end_marker(queue: Queue):
+    """
+    Removes the end of queue marker left by a previous run so the queue can be loaded again
+    :param queue: asyncio queue
+    :return:
+    """
+    for _ in range(queue.qsize()):
+        item = queue.get_nowait()
+        if item is not END_OF_QUEUE:
+            queue.put_nowait(item)
+
+
 class RequestQueue(Queue):
-    def __init__(self, request_builder: RequestBuilder):
-        super().__init__()
+    def __init__(self, request_builder: RequestBuilder, maxsize: int = 0):
+        """
+        :param request_builder: builds the request objects from the request dicts put in the queue
+        :param maxsize: high-water mark of the queue, producers suspend on put() when it is reached (0: unbounded)
+        """
+        super().__init__(maxsize=maxsize)
         # asyncio queues come with internal lock, no need to use locks explicitly here
 
         self.request_builder = request_builder
         self.is_loading = True
 
+        self.requeued = 0
+        self._pending_requeues = set()
+
     def loading_start(self):
         if not self.is_loading:
+            drop_end_marker(self)
             self.is_loading = True
 
     def loading_stop(self):
         if self.is_loading:
             self.is_loading = False
 
-    async def populate(self, items: list[dict]):
+    async def populate(self, items: Iterable[dict] | Iterable[tuple], built: bool = False, first_index: int = None):
         """
             populates the request queue with requests objects created from items
-        :param items: list of dicts
+            items can be a generator: they are only built when there's room in the queue (backpressure)
+            the queue is closed once all items are loaded
+        :param items: iterable of dicts
+        :param built: items are already built (request, auth) tuples (raw requests), loaded as they are
+        :param first_index: fuzz index of the first item, the requests get their index in their extensions
         :return:
         """
         self.loading_start()
+        put = self.put_built if built else self.put
         try:
-            for item in items:
-                await self.put(item)
+            if first_index is None:
+                for item in items:
+                    await put(item)
+            else:
+                for index, item in enumerate(items, first_index):
+                    await put(item, index)
         finally:
-            self.loading_stop()
+            await self.close()
 
-    async def put(self, item: dict):
+    async def put(self, item: dict, index: int = None):
         """
             gets request contents in a dict, builds request object and loads it in  queue
         :param item: dict of request contents
+        :param index: fuzz index of the request
         :return:
         """
 
         try:
-            print("RequestQueue: WE ARE PUTTING")
-            print("RequestQueue: ", item)
             if validate_request(item):
                 try:
                     req = self.request_builder.build_request(req_dict=item)
-                    print("RequestQueue: ", req)
+                    if index is not None:
+                        req[0].extensions[FUZZ_INDEX_EXTENSION] = index
+                    # suspends the producer while the queue is full
                     await super().put(req)
-                    # self.put_nowait(req)
-                    print("RequestQueue: ", self.qsize())
                 except RequestBuildError as e:
                     print("RequestQueue: ERROR : ", e)
 
@@ -132,23 +170,69 @@ class RequestQueue(Queue):
 
     async def get(self):
         """
-        Getting an item from the queue (without waiting if empty), if queue empty and no more items are getting
-        loaded, it returns None
-        :return: item (tuple) or None
+        Getting an item from the queue, waits (without polling) while the queue is empty and still loading
+        once the queue is closed and all its items are taken (requeued ones included), NoMoreItems is raised
+        :return: item (tuple)
+        :raises NoMoreItems:
         """
         while True:
-            try:
-                # return self.get_nowait()
-                return await super().get()
-            except QueueEmpty:
-                if self.is_loading:
-                    continue
-                print("Error: Request queue is empty. Unable to dequeue a request.")
+            if not self.is_loading and self.empty() and not self._pending_requeues:
+                raise NoMoreItems
+
+            item = await super().get()
+            if item is not END_OF_QUEUE:
+                return item
+
+            if self.empty() and self._pending_requeues:
+                # requests still waiting to be put back (the queue was full): taken before the marker is
+                await asyncio.wait(set(self._pending_requeues))
+                await super().put(item)
+                continue
+
+            # leave the marker at the end of the queue for the other consumers
+            self.put_nowait(item)
+            if self.qsize() == 1:
                 raise NoMoreItems
 
+    async def put_built(self, item: tuple, index: int = None):
+        """
+            loads an already built request (taken from another request queue), suspends while the queue is full
+        :param item: (request, auth) tuple
+        :param index: fuzz index of the request
+        :return:
+        """
+        if index is not None:
+            item[0].extensions[FUZZ_INDEX_EXTENSION] = index
+        await super().put(item)
+
+    def requeue(self, item: tuple):
+        """
+        Puts back an already built request (e.g. throttled by the target) to be sent again
+        never blocks the consumer calling it: if the queue is full the item is put as soon as there's room
+        (get() doesn't end the consumers while such a put is pending: the item is taken before the end marker)
+        :param item: (request, auth) tuple taken from the queue
+        :return:
+        """
+        self.requeued += 1
+        try:
+            self.put_nowait(item)
+        except QueueFull:
+            task = asyncio.ensure_future(super().put(item))
+            # keeps a reference on the task until it's done
+            self._pending_requeues.add(task)
+            task.add_done_callback(self._pending_requeues.discard)
+
     def get_batch(self, n):
         return [self.get() for _ in range(n)]
 
+    async def close(self):
+        """
+        Called by the producer when it's done loading: consumers will stop once they took every remaining item
+        :return:
+        """
+        self.loading_stop()
+        await super().put(END_OF_QUEUE)
+
     async def __aenter__(self):
         return self
 
@@ -156,19 +240,16 @@ class RequestQueue(Queue):
         if exc_type:
             # exception will mostly be a NoMoreItems exception
             print(exc_value)
-            # invoke close before exiting the context manager
-        self.close()
+            # invoke clear before exiting the context manager
+        self.clear()
 
-    def close(self):
+    def clear(self):
         self.loading_stop()
         # Clear the queue without retrieving its contents
         while not self.empty():
             self.get_nowait()
 
 
-
-
-
 '''
 class RequestQueue(Queue):
     def __init__(self, request_builder: RequestBuilder):
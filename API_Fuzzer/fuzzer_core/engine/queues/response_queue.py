@@ -1,80 +1,102 @@
-from asyncio import Queue, QueueEmpty
+from asyncio import Queue
 #from queue import Queue, Empty as QueueEmpty
 
-
-class NoMoreItems(Exception):
-    def __init__(self, message="The queue has no more items in it", additional_info=None):
-        self.message = message
-        self.additional_info = additional_info
-
-    def __str__(self):
-        return f"{self.message}{' (' + self.additional_info + ')' if self.additional_info else ''}"
+from fuzzer_core.engine.queues.request_queue import END_OF_QUEUE, NoMoreItems, drop_end_marker
 
 
 class ResponseQueue(Queue):
     """
     Contains tuples of matched response content, analysis results, flags from analysing (exple: sensitive info ...)
+    With a result store, the results are written through to the store instead (they're read back with dump() or the
+    store queries, get() only sees the results kept in memory)
     """
 
-    def __init__(self):
+    def __init__(self, store=None):
+        """
+        :param store: ResultStore the results are written to (None: results are kept in memory)
+        """
         super().__init__()
         self.is_loading = True
+        self.store = store
         # asyncio queues come with internal lock, no need to use locks explicitly here
 
+    def loading_start(self):
+        if not self.is_loading:
+            drop_end_marker(self)
+            self.is_loading = True
+
     async def put(self, *responses: tuple):
-        print("ResponseQueue: RESPONSE IN RESPONSE QUEUE")
         for response in responses:
-            print("ResponseQueue: ", response)
-            await super().put(response)
-            # self.put_nowait(response)
-        print("ResponseQueue: ", self.qsize())
+            if self.store is not None:
+                self.store.add(*response)
+            else:
+                await super().put(response)
 
     def put_batch(self, responses):
         for response in responses:
-            self.put(response)
+            if self.store is not None:
+                self.store.add(*response)
+            else:
+                self.put_nowait(response)
 
     async def get(self):
-        while True:
-            try:
-                return await super().get()
-                #return self.get_nowait()
-            except QueueEmpty:
-                if self.is_loading:
-                    continue
-                print("Responsequeue.get: Error: Response queue is empty. Unable to dequeue a request. Works as it should DW")
-                raise NoMoreItems
+        """
+        Waits (without polling) for the next response while the workers are still running
+        :return: response tuple
+        :raises NoMoreItems: once the queue is closed and all its items are taken
+        """
+        if not self.is_loading and self.empty():
+            raise NoMoreItems
+
+        item = await super().get()
+        if item is END_OF_QUEUE:
+            self.put_nowait(item)
+            raise NoMoreItems
+        return item
 
     def get_noasync(self):
-        while True:
-            try:
-                return self.get_nowait()
-            except QueueEmpty:
-                if self.is_loading:
-                    continue
-                #print("Responsequeue.get: Error: Response queue is empty. Unable to dequeue a request.")
-                raise NoMoreItems
+        """
+        Non-blocking get, for consumers outside the event loop (there's nothing to wait on from there)
+        :return: response tuple
+        :raises NoMoreItems: if the queue is empty or closed
+        """
+        if self.empty():
+            raise NoMoreItems
+
+        item = self.get_nowait()
+        if item is END_OF_QUEUE:
+            self.put_nowait(item)
+            raise NoMoreItems
+        return item
 
     def dump(self):
-        #print(self.is_loading)
+        if self.store is not None:
+            yield from self.store.results()
         while True:
             try:
                 yield self.get_noasync()
             except NoMoreItems:
-                print("Responsequeue.dump: no more items ")
                 break
 
-    def __aenter__(self):
+    async def __aenter__(self):
         return self
 
-    def __aexit__(self, exc_type, exc, tb):
+    async def __aexit__(self, exc_type, exc, tb):
         if exc_type:
             # log error here and safely close the class
             pass
         self.close()
 
     def close(self):
-        pass
-
+        """
+        Called once all the workers are done: consumers will stop once they took every remaining response
+        :return:
+        """
+        if self.is_loading:
+            self.is_loading = False
+            self.put_nowait(END_OF_QUEUE)
+        if self.store is not None:
+            self.store.flush()
 
 
 
@@ -0,0 +1,258 @@
+import json
+import sqlite3
+from datetime import timedelta
+from typing import Iterator
+
+import httpx
+
+from fuzzer_core.engine.fuzz_result import FuzzResult
+from fuzzer_core.engine.response_hasher import ResponseHasher
+
+"""
+NOTES:
+
+- append-only SQLite store of the results of a run, in WAL mode: the results are written in batches (one transaction
+  each), readers can query the file while a run is still writing to it
+- a ResponseQueue with a store writes its results through to it instead of keeping them in memory, the RAM used by a
+  run doesn't depend on its number of results
+- results are stored as FuzzResult columns (indexed on status, length, body hash, elapsed and fuzz index) with their
+  analysis as JSON (timedeltas as seconds, bytes as hex, other non JSON values as strings)
+- clusters() groups the results on the response-cluster of their analysis: one representative and a count for each
+  cluster of near duplicates (cluster ids are the ones of the run that wrote them)
+- with keep_bodies, the headers and (kept) body of each response are stored too: body_offset of the result is the id
+  of its row in the bodies table, response() rebuilds an httpx.Response to analyse it again without sending anything
+- the connection is opened on the first use: a module holding a store that never writes (shard processes) doesn't
+  create the file
+- writes happen on the event loop thread (sqlite connections stay on their thread), a batch is one executemany
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    fuzz_index INTEGER,
+    method TEXT,
+    url TEXT,
+    status_code INTEGER,
+    elapsed REAL,
+    length INTEGER,
+    lines INTEGER,
+    words INTEGER,
+    chars INTEGER,
+    body_hash BLOB,
+    truncated INTEGER,
+    body_id INTEGER,
+    analysis TEXT
+);
+CREATE TABLE IF NOT EXISTS bodies (
+    id INTEGER PRIMARY KEY,
+    headers TEXT,
+    content BLOB
+);
+CREATE INDEX IF NOT EXISTS results_status ON results (status_code);
+CREATE INDEX IF NOT EXISTS results_length ON results (length);
+CREATE INDEX IF NOT EXISTS results_hash ON results (body_hash);
+CREATE INDEX IF NOT EXISTS results_elapsed ON results (elapsed);
+CREATE INDEX IF NOT EXISTS results_index ON results (fuzz_index);
+"""
+
+RESULT_COLUMNS = ('fuzz_index', 'method', 'url', 'status_code', 'elapsed', 'length', 'lines', 'words', 'chars',
+                  'body_hash', 'truncated', 'body_id', 'analysis')
+
+
+def json_default(value):
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+class ResultStore:
+    def __init__(self, path: str, batch_size: int = 500, keep_bodies: bool = False, hasher: ResponseHasher = None):
+        """
+        :param path: SQLite file (created if needed, results are appended to the ones already in it)
+        :param batch_size: results buffered before they're written in one transaction
+        :param keep_bodies: the headers and body of each response are stored too
+        :param hasher: hashes the responses made into results (the hasher of the response analyser)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.keep_bodies = keep_bodies
+        self.hasher = hasher
+
+        self._connection = None
+        self._pending = []
+        self._pending_bodies = []
+        self._next_body_id = None
+        self.written = 0
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            # WAL stays consistent with NORMAL, only the last transactions can be lost on a power failure
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def reserve_body_id(self) -> int:
+        # body ids are given before the batch is written so the results of the batch can point to their body
+        if self._next_body_id is None:
+            self._next_body_id = self.connection.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM bodies').fetchone()[0]
+        body_id = self._next_body_id
+        self._next_body_id += 1
+        return body_id
+
+    def add(self, response: httpx.Response | FuzzResult | None, analysis: dict | None = None):
+        """
+        Buffers a result, the buffer is written once it holds batch_size results
+        :param response: response (made into a FuzzResult) or FuzzResult, None if the request failed
+        :param analysis: analysis of the response
+        :return:
+        """
+        result = response if isinstance(response, FuzzResult) else FuzzResult.from_response(response,
+                                                                                             hasher=self.hasher)
+        if self.keep_bodies and isinstance(response, httpx.Response):
+            try:
+                content = response.content
+            except httpx.ResponseNotRead:
+                content = None
+            if content is not None:
+                result.body_offset = self.reserve_body_id()
+                self._pending_bodies.append((result.body_offset, json.dumps(response.headers.multi_items()),
+                                             content))
+
+        self._pending.append((result.fuzz_index, result.method, result.url, result.status_code, result.elapsed,
+                              result.length, result.lines, result.words, result.chars, result.body_hash,
+                              int(result.truncated), result.body_offset,
+                              None if analysis is None else json.dumps(analysis, default=json_default)))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered results (one transaction)
+        :return:
+        """
+        if not self._pending:
+            return
+        with self.connection:
+            if self._pending_bodies:
+                self.connection.executemany('INSERT INTO bodies (id, headers, content) VALUES (?, ?, ?)',
+                                            self._pending_bodies)
+            self.connection.executemany(f"INSERT INTO results ({', '.join(RESULT_COLUMNS)}) "
+                                        f"VALUES ({', '.join('?' * len(RESULT_COLUMNS))})", self._pending)
+        self.written += len(self._pending)
+        self._pending = []
+        self._pending_bodies = []
+
+    @staticmethod
+    def where(status_code: int | list[int] = None, min_length: int = None, max_length: int = None,
+              body_hash: bytes | str = None, min_elapsed: float = None, max_elapsed: float = None) -> tuple:
+        """
+        :return: (SQL condition, parameters) of the filters
+        """
+        conditions, params = [], []
+        if status_code is not None:
+            codes = [status_code] if isinstance(status_code, int) else list(status_code)
+            conditions.append(f"status_code IN ({', '.join('?' * len(codes))})")
+            params.extend(codes)
+        for column, operator, value in (('length', '>=', min_length), ('length', '<=', max_length),
+                                        ('elapsed', '>=', min_elapsed), ('elapsed', '<=', max_elapsed)):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+        if body_hash is not None:
+            conditions.append("body_hash = ?")
+            params.append(bytes.fromhex(body_hash) if isinstance(body_hash, str) else body_hash)
+        return (' WHERE ' + ' AND '.join(conditions)) if conditions else '', params
+
+    def results(self, limit: int = None, **filters) -> Iterator[tuple[FuzzResult, dict | None]]:
+        """
+        Results of the store, in the order they were added (pending results are written first)
+        :param limit: max number of results
+        :param filters: status_code (int or list), min_length, max_length, body_hash, min_elapsed, max_elapsed
+        :return: iterator of (FuzzResult, analysis)
+        """
+        self.flush()
+        where, params = self.where(**filters)
+        query = f"SELECT {', '.join(RESULT_COLUMNS)} FROM results{where} ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        for row in self.connection.execute(query, params):
+            *fields, truncated, body_id, analysis = row
+            yield (FuzzResult(*fields, truncated=bool(truncated), body_offset=body_id),
+                   None if analysis is None else json.loads(analysis))
+
+    def count(self, **filters) -> int:
+        self.flush()
+        where, params = self.where(**filters)
+        return self.connection.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def clusters(self, **filters) -> list[tuple[FuzzResult, int]]:
+        """
+        One representative (first result) and the number of results of each response-cluster of the store
+        :param filters: same as results()
+        :return: list of (FuzzResult, count), the biggest cluster first
+        """
+        self.flush()
+        where, params = self.where(**filters)
+        cluster = "json_extract(analysis, '$.\"response-cluster\"')"
+        condition = f"{where} AND {cluster} IS NOT NULL" if where else f" WHERE {cluster} IS NOT NULL"
+        query = (f"SELECT {', '.join(RESULT_COLUMNS[:-1])}, clusters.count FROM results JOIN "
+                 f"(SELECT MIN(id) AS first, COUNT(*) AS count FROM results{condition} GROUP BY {cluster}) AS clusters "
+                 f"ON results.id = clusters.first ORDER BY clusters.count DESC, results.id")
+        return [(FuzzResult(*fields, truncated=bool(truncated), body_offset=body_id), count)
+                for *fields, truncated, body_id, count in self.connection.execute(query, params)]
+
+    def body(self, result: FuzzResult) -> bytes | None:
+        """
+        :param result: result read from the store
+        :return: kept body of the response (None if it wasn't stored)
+        """
+        if result.body_offset is None:
+            return None
+        self.flush()
+        row = self.connection.execute('SELECT content FROM bodies WHERE id = ?', (result.body_offset,)).fetchone()
+        return None if row is None else row[0]
+
+    def response(self, result: FuzzResult) -> httpx.Response | None:
+        """
+        Rebuilds the response of a result from its stored headers and body (to analyse it again)
+        :param result: result read from the store
+        :return: httpx.Response (None if its body wasn't stored)
+        """
+        if result.body_offset is None or result.status_code is None:
+            return None
+        self.flush()
+        row = self.connection.execute('SELECT headers, content FROM bodies WHERE id = ?',
+                                      (result.body_offset,)).fetchone()
+        if row is None:
+            return None
+        headers, content = row
+        # the stored body is already decoded
+        headers = [(key, value) for key, value in json.loads(headers) if key.lower() != 'content-encoding']
+        return httpx.Response(result.status_code, headers=headers, content=content,
+                              request=httpx.Request(result.method, result.url))
+
+    def close(self):
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self):
+        return self.count()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f"ResultStore({self.path!r}, written={self.written}, pending={len(self._pending)})"
@@ -1,86 +1,178 @@
 import asyncio
-import math
+import multiprocessing
 import time
 from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Callable
+
+import httpx
+
+from fuzzer_core.engine.response_analyser import ResponseAnalyser
 
 """
 NOTES:
 
-- 
-- if you want to remove the concurrency limiter, then remove the semaphore code ( in init and throttle)
+- Token bucket implemented as a GCRA (generic cell rate algorithm): instead of a background task adding/consuming
+  tokens, each acquisition computes the time at which it's allowed to send from the theoretical arrival time (tat)
+  of the next request. Send times are computed exactly (no drift), so the achieved rate stays on target at high rates,
+  only the wake-up of each request depends on the event loop timer resolution.
+- burst: number of requests that can be sent at once after an idle period (bucket capacity)
+- if you want to remove the concurrency limiter, then don't pass concurrency_limit (no semaphore is created)
+- AdaptiveRateLimiter: one bucket per host, each one adjusted with AIMD (additive increase on success, multiplicative
+  decrease when throttled) so it converges on the highest rate the host sustains. Retry-After and X-RateLimit-* headers
+  pause the bucket or cap its rate directly.
+- SharedRateLimiter: same GCRA with the tat in shared memory, the processes of a multi-process run reserve their send
+  slots from the same timeline so the global rate holds whatever the number of processes
 """
 
+# key of the bucket used when no host is given
+ANY_HOST = '*'
+
+# an X-RateLimit-Reset value above this is an epoch timestamp, otherwise a number of seconds
+EPOCH_THRESHOLD = 10 ** 9
+
+
+def parse_retry_after(value: str, wall_clock: Callable[[], float] = time.time) -> float | None:
+    """
+    Retry-After header value (delay in seconds or HTTP date)
+    :param value: header value
+    :param wall_clock: current time (epoch seconds), used for HTTP dates
+    :return: delay in seconds or None if it can't be parsed
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - wall_clock(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_limit_reset(value: str, wall_clock: Callable[[], float] = time.time) -> float | None:
+    """
+    X-RateLimit-Reset header value (seconds until the reset or epoch timestamp of the reset)
+    :param value: header value
+    :param wall_clock: current time (epoch seconds), used for timestamps
+    :return: seconds until the window resets or None if it can't be parsed
+    """
+    try:
+        reset = float(value)
+    except (TypeError, ValueError):
+        return None
+    if reset > EPOCH_THRESHOLD:
+        reset -= wall_clock()
+    return max(reset, 0.0)
+
 
 class RateLimiter:
     def __init__(self,
-                 rate_limit: int,
-                 concurrency_limit: int = None) -> None:
+                 rate_limit: float,
+                 concurrency_limit: int = None,
+                 burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        :param rate_limit: requests per second
+        :param concurrency_limit: max number of requests in flight (None: no limit)
+        :param burst: bucket capacity, requests allowed back to back after an idle period
+        :param clock: monotonic clock in seconds
+        """
 
-        if not rate_limit or rate_limit < 1:
+        if not rate_limit or rate_limit <= 0:
             raise ValueError('rate limit must be non zero positive number')
 
+        if burst is None or burst < 1:
+            raise ValueError('burst must be a non zero positive number')
+
         # Validation on the concurrency limit if provided and creation of Semaphore to handle concurrency
+        self.semaphore = None
         if concurrency_limit:
             if concurrency_limit < 1:
                 raise ValueError('concurrent limit must be non zero positive number')
-        else:
-            concurrency_limit = 1
-        self.semaphore = asyncio.Semaphore(concurrency_limit)
+            self.semaphore = asyncio.Semaphore(concurrency_limit)
 
+        self.clock = clock
+        self.burst = burst
         self.rate_limit = rate_limit
-        self.tokens_queue = asyncio.Queue(rate_limit)
-        self.tokens_consumer_task = asyncio.create_task(self.consume_tokens())
+        self.acquired = 0
 
-    async def add_token(self) -> None:
-        await self.tokens_queue.put(1)
-        return None
+        # theoretical arrival time of the next request
+        self._tat = 0.0
+
+    @property
+    def rate_limit(self) -> float:
+        return self._rate_limit
 
-    async def consume_tokens(self):
+    @rate_limit.setter
+    def rate_limit(self, rate: float):
+        self._rate_limit = rate
+        self._interval = 1 / rate
+        # how early a request can be sent compared to its theoretical arrival time
+        self._tolerance = (self.burst - 1) * self._interval
+
+    def reserve(self, host: str = None) -> float:
+        """
+        Reserves the next send slot
+        :param host: target host of the request (only used by the adaptive rate limiter)
+        :return: delay in seconds before the request can be sent
         """
+        now = self.clock()
+        tat = max(self._tat, now)
+        self._tat = tat + self._interval
+        self.acquired += 1
 
+        return max(tat - self._tolerance - now, 0.0)
+
+    def pause_until(self, when: float, host: str = None) -> None:
+        """
+        No request is sent before the given time (target asked to back off), requests are spaced at the rate after it
+        :param when: time on the limiter's clock
+        :param host: target host (only used by the adaptive rate limiter)
         :return:
         """
-        try:
-            consumption_rate = 1 / self.rate_limit
-            last_consumption_time = 0
-
-            while True:
-                if self.tokens_queue.empty():
-                    await asyncio.sleep(consumption_rate)
-                    continue
-
-                # monotonic time is more useful in measuring time intervals
-                current_consumption_time = time.monotonic()
-                total_tokens = self.tokens_queue.qsize()
-
-                time_from_last_consumption = current_consumption_time - last_consumption_time
-                calculated_tokens_to_consume = math.floor(
-                    time_from_last_consumption / consumption_rate)
-                tokens_to_consume = min(
-                    total_tokens, calculated_tokens_to_consume)
-
-                for i in range(0, tokens_to_consume):
-                    self.tokens_queue.get_nowait()
-
-                last_consumption_time = time.monotonic()
-
-                await asyncio.sleep(consumption_rate)
-        except asyncio.CancelledError:
-            # handle cancellation of the consume_tokens task if cancelled explicitly.
-            # you can ignore the error here and deal with closing this task later but this is not advised
-            raise
-        except Exception as e:
-            # do something with the error and re-raise
-            raise
+        self._tat = max(self._tat, when + self._tolerance)
+
+    def update_from_response(self, response: httpx.Response | None, host: str = None) -> bool:
+        """
+        Feedback of a sent request, a fixed rate limiter ignores it
+        :param response: response received (None if the request failed)
+        :param host: target host of the request
+        :return: True if the request was throttled by the target and should be sent again
+        """
+        return False
+
+    @property
+    def rates(self) -> dict:
+        """
+        current rate (requests per second) of each bucket
+        """
+        return {ANY_HOST: self.rate_limit}
+
+    def as_dict(self) -> dict:
+        return {'rates': self.rates, 'acquired': self.acquired}
+
+    async def acquire(self, host: str = None) -> None:
+        """
+        Waits until the next request is allowed to be sent
+        :param host: target host of the request
+        :return:
+        """
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
 
     @asynccontextmanager
-    async def throttle(self):
-        await self.semaphore.acquire()
-        await self.add_token()
+    async def throttle(self, host: str = None):
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
         try:
+            await self.acquire(host)
             yield
         finally:
-            self.semaphore.release()
+            if self.semaphore is not None:
+                self.semaphore.release()
 
     async def __aenter__(self):
         return self
@@ -93,30 +185,185 @@ class RateLimiter:
         await self.close()
 
     async def close(self) -> None:
-        if self.tokens_consumer_task and not self.tokens_consumer_task.cancelled():
-            try:
-                self.tokens_consumer_task.cancel()
-                await self.tokens_consumer_task
-            except asyncio.CancelledError:
-                # we ignore this exception, but it is good to log and signal the task was cancelled
-                pass
-            except Exception as e:
-                # log here and deal with the exception
-                raise
+        # nothing runs in the background, kept for the context manager usage
+        pass
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    def __init__(self,
+                 rate_limit: float,
+                 concurrency_limit: int = None,
+                 burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic,
+                 min_rate: float = 1.0,
+                 max_rate: float = None,
+                 increase: float = 1.0,
+                 decrease: float = 0.5,
+                 cooldown: float = 1.0,
+                 throttle_codes: tuple = (429, 503),
+                 wall_clock: Callable[[], float] = time.time) -> None:
+        """
+        :param rate_limit: starting rate of every host (requests per second)
+        :param concurrency_limit: max number of requests in flight, all hosts included (None: no limit)
+        :param burst: bucket capacity of every host
+        :param clock: monotonic clock in seconds
+        :param min_rate: the rate of a host is never decreased below it
+        :param max_rate: the rate of a host is never increased above it (None: no ceiling)
+        :param increase: rate added each second of successful requests (requests per second)
+        :param decrease: factor applied to the rate of a host when it throttles a request
+        :param cooldown: min time in seconds between two decreases of a host (requests in flight are throttled too)
+        :param throttle_codes: status codes of throttled requests
+        :param wall_clock: current time as epoch seconds, to read the dates and timestamps sent by the targets
+        """
+        super().__init__(rate_limit=rate_limit, concurrency_limit=concurrency_limit, burst=burst, clock=clock)
+
+        if not min_rate or min_rate <= 0 or min_rate > rate_limit:
+            raise ValueError('min rate must be a non zero positive number lower than the rate limit')
+        if max_rate is not None and max_rate < rate_limit:
+            raise ValueError('max rate must be higher than the rate limit')
+        if not 0 < decrease < 1:
+            raise ValueError('decrease must be between 0 and 1')
+
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.throttle_codes = throttle_codes
+        self.wall_clock = wall_clock
+
+        self.throttled = 0
+        self.buckets: dict[str, RateLimiter] = {}
+        self._last_decrease: dict[str, float] = {}
+
+    def bucket(self, host: str = None) -> RateLimiter:
+        """
+        Rate limiter of a host, created on its first request
+        :param host: target host
+        :return: RateLimiter
+        """
+        host = host or ANY_HOST
+        if host not in self.buckets:
+            self.buckets[host] = RateLimiter(rate_limit=self.rate_limit, burst=self.burst, clock=self.clock)
+        return self.buckets[host]
+
+    def reserve(self, host: str = None) -> float:
+        self.acquired += 1
+        return self.bucket(host).reserve()
+
+    def pause_until(self, when: float, host: str = None) -> None:
+        self.bucket(host).pause_until(when)
+
+    def current_rate(self, host: str = None) -> float:
+        return self.bucket(host).rate_limit
+
+    @property
+    def rates(self) -> dict:
+        return {host: bucket.rate_limit for host, bucket in self.buckets.items()}
+
+    def as_dict(self) -> dict:
+        return {'rates': self.rates, 'acquired': self.acquired, 'throttled': self.throttled}
+
+    def update_from_response(self, response: httpx.Response | None, host: str = None) -> bool:
+        """
+        Adjusts the rate of the host from the response:
+        - throttled (429/503): multiplicative decrease, paused for the Retry-After delay if any
+        - otherwise: additive increase, capped by what X-RateLimit-Remaining allows until X-RateLimit-Reset
+        :param response: response received (None if the request failed: no feedback)
+        :param host: target host of the request
+        :return: True if the request was throttled and should be sent again
+        """
+        if response is None:
+            return False
+
+        host = host or ANY_HOST
+        bucket = self.bucket(host)
+        now = self.clock()
+        rate_limit_info = ResponseAnalyser.extract_rate_limit_information(response.headers)
+
+        if response.status_code in self.throttle_codes:
+            self.throttled += 1
+            if now - self._last_decrease.get(host, float('-inf')) >= self.cooldown:
+                self._last_decrease[host] = now
+                bucket.rate_limit = max(bucket.rate_limit * self.decrease, self.min_rate)
+
+            retry_after = parse_retry_after(rate_limit_info.get('retry_after'), self.wall_clock)
+            if retry_after:
+                bucket.pause_until(now + retry_after)
+            return True
+
+        rate = bucket.rate_limit + self.increase / bucket.rate_limit
+        if self.max_rate is not None:
+            rate = min(rate, self.max_rate)
+
+        reset = parse_rate_limit_reset(rate_limit_info.get('reset_time'), self.wall_clock)
+        try:
+            remaining = int(rate_limit_info['remaining'])
+        except (KeyError, ValueError):
+            remaining = None
+        if reset and remaining is not None:
+            # what's left of the window can't be sent faster than this
+            rate = min(rate, remaining / reset)
+            if remaining == 0:
+                bucket.pause_until(now + reset)
+
+        bucket.rate_limit = max(rate, self.min_rate)
+        return False
+
+
+class SharedRateLimiter(RateLimiter):
+    def __init__(self,
+                 rate_limit: float,
+                 shared_tat,
+                 concurrency_limit: int = None,
+                 burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Rate limiter of one process of a multi-process run: the theoretical arrival time lives in shared memory, so
+        the rate applies to the requests of all the processes together
+        :param rate_limit: requests per second, all processes included
+        :param shared_tat: multiprocessing Value('d') shared by the processes (see create_shared_tat)
+        :param concurrency_limit: max number of requests in flight in this process (None: no limit)
+        :param burst: bucket capacity, all processes included
+        :param clock: monotonic clock in seconds, it must be the same in every process (time.monotonic is system wide)
+        """
+        super().__init__(rate_limit=rate_limit, concurrency_limit=concurrency_limit, burst=burst, clock=clock)
+        self.shared_tat = shared_tat
+
+    @staticmethod
+    def create_shared_tat(context=None):
+        """
+        :param context: multiprocessing context the processes are started with (None: default context)
+        :return: shared theoretical arrival time, to pass to the SharedRateLimiter of each process
+        """
+        return (context or multiprocessing).Value('d', 0.0)
+
+    def reserve(self, host: str = None) -> float:
+        now = self.clock()
+        # the lock is only held for the read and write of the shared value
+        with self.shared_tat.get_lock():
+            tat = max(self.shared_tat.value, now)
+            self.shared_tat.value = tat + self._interval
+        self.acquired += 1
+
+        return max(tat - self._tolerance - now, 0.0)
+
+    def pause_until(self, when: float, host: str = None) -> None:
+        with self.shared_tat.get_lock():
+            self.shared_tat.value = max(self.shared_tat.value, when + self._tolerance)
 
 
 """
 EXAMPLE CODE USAGE
 
 async def worker(rate_limiter, request_queue):
-    async with rate_limiter:
-        while True:
-            # Acquire permission from the rate limiter
-            async with rate_limiter.throttle():
-                # Get a request from the queue and send an asynchronous request
-                request = await request_queue.get()
-                if not request:
-                    break
-                else: 
-                    await send_request()
+    while True:
+        request = await request_queue.get()
+        if not request:
+            break
+        # Acquire permission from the rate limiter (once per request)
+        async with rate_limiter.throttle(host=request.url.host):
+            response = await send_request()
+        if rate_limiter.update_from_response(response, host=request.url.host):
+            request_queue.requeue(request)
 """
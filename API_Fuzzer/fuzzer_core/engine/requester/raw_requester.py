@@ -0,0 +1,400 @@
+import asyncio
+import base64
+import re
+import ssl
+import time
+from collections import deque
+from datetime import timedelta
+
+import httpx
+
+from fuzzer_core.engine.requester.requester import PoolStats
+
+"""
+NOTES:
+
+Raw mode: the request template is sent as written, nothing is normalised by httpx (header names, order, duplicates,
+malformed lines and bodies are all kept)
+
+- RawTemplate: the raw request is parsed once into pre-encoded byte chunks and placeholder slots (byte offsets),
+  rendering a fuzz tuple is a single bytes join
+- RawRequest: rendered bytes and the target origin, no httpx.Request is built to send it
+- RawRequester: keep-alive pool of asyncio streams per origin, the rendered bytes are written straight to the socket
+  and the HTTP/1.1 response is parsed into a RawResponse (httpx.Response, so the analysis works the same way)
+- through a proxy (http:// only), every connection is a CONNECT tunnel to the origin (TLS started inside it for https
+  origins): the request bytes are sent as written, never rewritten into the absolute form of a proxied request
+"""
+
+PLACEHOLDER_PATTERN = re.compile(rb'\$\w+\$')
+CONTENT_LENGTH_PATTERN = re.compile(rb'(?im)^content-length[ \t]*:[ \t]*([^\r\n]*)')
+BARE_LF_PATTERN = re.compile(rb'(?<!\r)\n')
+
+# slot of the Content-Length value, computed from the rendered body
+CONTENT_LENGTH_SLOT = -1
+
+# size limit of the response status line and headers
+MAX_HEAD_SIZE = 2 ** 20
+
+
+class RawTemplate:
+    def __init__(self, raw: str | bytes, target: str, crlf: bool = True, update_content_length: bool = True,
+                 encoding: str = 'utf-8'):
+        """
+        :param raw: raw HTTP request with $placeholder$ fuzz points
+        :param target: origin the request is sent to (scheme://host[:port])
+        :param crlf: turn the bare LF line endings of the request line and headers into CRLF (body is kept as is)
+        :param update_content_length: recompute the Content-Length header (if present) when the body has fuzz points
+        :param encoding: encoding of the raw string and of the fuzzwords
+        """
+        self.target = httpx.URL(target)
+        self.encoding = encoding
+
+        data = raw.encode(encoding) if isinstance(raw, str) else bytes(raw)
+        head, separator, body = self._split_head(data)
+        if not separator:
+            # no empty line: the request has no body, the head still has to be terminated (or the server waits for
+            # more headers)
+            head = head.rstrip(b'\r\n')
+            separator = b'\r\n\r\n' if crlf else b'\n\n'
+        if crlf:
+            head = BARE_LF_PATTERN.sub(b'\r\n', head)
+            separator = b'\r\n\r\n' if separator else separator
+
+        # every placeholder occurrence in order of appearance, and the slot (fuzz tuple index) of each one
+        self.matches = [match.decode(encoding) for match in PLACEHOLDER_PATTERN.findall(head + body)]
+        self.fields = list(dict.fromkeys(self.matches))
+        self._slots = {field.encode(encoding): index for index, field in enumerate(self.fields)}
+
+        content_length = None
+        if update_content_length and PLACEHOLDER_PATTERN.search(body):
+            content_length = CONTENT_LENGTH_PATTERN.search(head)
+
+        self.head_parts = self._compile(head + separator, content_length.span(1) if content_length else None)
+        self.body_parts = self._compile(body)
+
+    @staticmethod
+    def _split_head(data: bytes) -> tuple:
+        # the first empty line ends the headers, whatever line endings are used
+        positions = [(data.find(separator), separator) for separator in (b'\r\n\r\n', b'\n\n')]
+        positions = [(position, separator) for position, separator in positions if position != -1]
+        if not positions:
+            return data, b'', b''
+        position, separator = min(positions)
+        return data[:position], separator, data[position + len(separator):]
+
+    def _compile(self, data: bytes, content_length_span: tuple = None) -> list:
+        """
+        :return: list of literal byte chunks (bytes) and slots (int)
+        """
+        parts, position = [], 0
+        spans = [(match.start(), match.end(), self._slots[match.group()]) for match in PLACEHOLDER_PATTERN.finditer(data)]
+        if content_length_span is not None:
+            spans.append((*content_length_span, CONTENT_LENGTH_SLOT))
+
+        for start, end, slot in sorted(spans):
+            if start > position:
+                parts.append(data[position:start])
+            parts.append(slot)
+            position = end
+        if position < len(data):
+            parts.append(data[position:])
+        return parts
+
+    def render(self, words) -> bytes:
+        """
+        :param words: one word (str or bytes) per placeholder, in the order of self.fields
+        :return: request bytes
+        """
+        encoded = [word if isinstance(word, bytes) else str(word).encode(self.encoding) for word in words]
+        body = b''.join([part if isinstance(part, bytes) else encoded[part] for part in self.body_parts])
+        encoded.append(str(len(body)).encode('ascii'))
+        # CONTENT_LENGTH_SLOT (-1) is the last item of encoded
+        return b''.join([part if isinstance(part, bytes) else encoded[part] for part in self.head_parts]) + body
+
+    def request(self, words) -> 'RawRequest':
+        return RawRequest(self.render(words), self.target)
+
+    def render_all(self, tuples):
+        """
+        :param tuples: iterable of fuzz tuples
+        :return: generator of (RawRequest, None) items, ready for the request queue
+        """
+        for words in tuples:
+            yield RawRequest(self.render(words), self.target), None
+
+    def __repr__(self):
+        return f"RawTemplate(target={self.target}, fields={self.fields})"
+
+
+class RawRequest:
+    __slots__ = ('data', 'url', 'extensions')
+
+    def __init__(self, data: bytes, url: httpx.URL):
+        """
+        :param data: request bytes, sent as they are
+        :param url: target origin
+        """
+        self.data = data
+        self.url = url
+        self.extensions = {}
+
+    @property
+    def method(self) -> str:
+        return self.data[:self.data.find(b' ')].decode('latin-1')
+
+    def to_httpx(self) -> httpx.Request:
+        """
+        httpx.Request equivalent of the request line and headers (for display and analysis, never sent)
+        :return: httpx.Request
+        """
+        head = self.data.split(b'\n\n', 1)[0].split(b'\r\n\r\n', 1)[0]
+        lines = head.replace(b'\r\n', b'\n').split(b'\n')
+        method, _, target = lines[0].partition(b' ')
+        target = target.rsplit(b' ', 1)[0] if b' HTTP/' in target else target
+        headers = [tuple(part.strip() for part in line.split(b':', 1)) for line in lines[1:] if b':' in line]
+        try:
+            url = self.url.join(target.decode('latin-1'))
+        except httpx.InvalidURL:
+            url = self.url
+        return httpx.Request(method.decode('latin-1') or 'GET', url, headers=headers)
+
+    def __repr__(self):
+        return f"<RawRequest {self.url} {len(self.data)} bytes>"
+
+
+class RawResponse(httpx.Response):
+    """
+    Response parsed from the socket, the httpx.Request is only built if it's accessed
+    """
+
+    def __init__(self, raw_request: RawRequest, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.raw_request = raw_request
+
+    @property
+    def request(self) -> httpx.Request:
+        if self._request is None:
+            self._request = self.raw_request.to_httpx()
+        return self._request
+
+    @request.setter
+    def request(self, value: httpx.Request):
+        self._request = value
+
+
+class RawConnection:
+    __slots__ = ('reader', 'writer', 'requests')
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+class ProxyTunnelError(OSError):
+    """
+    The proxy refused to open a tunnel to the origin
+    """
+
+
+class RawRequester:
+    def __init__(self, max_connections: int = 100, keep_alive: bool = True, timeout: float = 10.0,
+                 verify: bool = True, proxy: str | httpx.URL = None):
+        """
+        :param max_connections: max number of connections opened to each origin
+        :param keep_alive: connections are kept open and reused (the request bytes aren't changed, only the socket)
+        :param timeout: time limit of a request in seconds (connection included)
+        :param verify: verify the TLS certificates of https origins
+        :param proxy: http proxy (http://[user:password@]host:port), the connections are CONNECT tunnels through it
+        :raises ValueError: if the proxy isn't an http:// url
+        """
+        self.proxy = httpx.URL(proxy) if proxy else None
+        if self.proxy is not None and self.proxy.scheme != 'http':
+            raise ValueError(f"raw mode only supports http:// proxies, not {self.proxy.scheme}://")
+        self.max_connections = max_connections
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.ssl_context = ssl.create_default_context()
+        if not verify:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+
+        self.pool_stats = PoolStats()
+        self._idle: dict[tuple, deque] = {}
+        self._semaphores: dict[tuple, asyncio.Semaphore] = {}
+
+    async def send_request(self, req: RawRequest, auth=None) -> RawResponse | None:
+        """
+        Writes the request bytes to a pooled connection of its origin and reads the response
+        :param req: RawRequest
+        :param auth: unused, the raw request carries its own authentication headers
+        :return: RawResponse or None if the origin can't be reached
+        """
+        origin = (req.url.scheme, req.url.host, req.url.port or (443 if req.url.scheme == 'https' else 80))
+        if origin not in self._semaphores:
+            self._semaphores[origin] = asyncio.Semaphore(self.max_connections)
+            self._idle[origin] = deque()
+
+        async with self._semaphores[origin]:
+            try:
+                return await asyncio.wait_for(self._exchange(origin, req), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                    ConnectionClosed, ValueError):
+                # TODO: Log this error
+                print("Error connecting to url")
+                return None
+
+    async def _exchange(self, origin: tuple, req: RawRequest) -> RawResponse:
+        idle = self._idle[origin]
+        while idle:
+            connection = idle.pop()
+            try:
+                # a kept alive connection can be closed by the server at any time: sent again on a new one
+                return await self._send_on(connection, origin, req)
+            except (ConnectionClosed, ConnectionError):
+                connection.close()
+
+        return await self._send_on(await self._connect(origin), origin, req)
+
+    async def _connect(self, origin: tuple) -> RawConnection:
+        scheme, host, port = origin
+        ssl_context = self.ssl_context if scheme == 'https' else None
+        if self.proxy is None:
+            reader, writer = await asyncio.open_connection(host, port, limit=MAX_HEAD_SIZE, ssl=ssl_context)
+        else:
+            reader, writer = await self._open_tunnel(host, port)
+            if ssl_context is not None:
+                await writer.start_tls(ssl_context, server_hostname=host)
+        self.pool_stats.connections_opened += 1
+        if scheme == 'https':
+            self.pool_stats.tls_handshakes += 1
+        return RawConnection(reader, writer)
+
+    async def _open_tunnel(self, host: str, port: int) -> tuple:
+        """
+        :return: reader and writer of a connection to the proxy, tunnelled to host:port
+        :raises ProxyTunnelError: if the proxy doesn't answer the CONNECT request with a 2xx status
+        """
+        reader, writer = await asyncio.open_connection(self.proxy.host, self.proxy.port or 80, limit=MAX_HEAD_SIZE)
+        try:
+            authority = b'[%s]:%d' % (host.encode('ascii'), port) if ':' in host else \
+                b'%s:%d' % (host.encode('idna'), port)
+            head = b'CONNECT %s HTTP/1.1\r\nHost: %s\r\n' % (authority, authority)
+            if self.proxy.username:
+                credentials = f"{self.proxy.username}:{self.proxy.password}".encode('utf-8')
+                head += b'Proxy-Authorization: Basic %s\r\n' % base64.b64encode(credentials)
+            writer.write(head + b'\r\n')
+            await writer.drain()
+
+            status_line = (await reader.readuntil(b'\r\n\r\n')).split(b'\r\n', 1)[0]
+            status = status_line.split(b' ', 2)[1:2]
+            if not status or not status[0].startswith(b'2'):
+                raise ProxyTunnelError(f"proxy refused the tunnel to {authority.decode('ascii')}: "
+                                       f"{status_line.decode('latin-1')}")
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _send_on(self, connection: RawConnection, origin: tuple, req: RawRequest) -> RawResponse:
+        start = time.perf_counter()
+        # the connection is closed whatever fails (a write to a reset socket, a timeout, a cancelled worker)
+        try:
+            connection.writer.write(req.data)
+            await connection.writer.drain()
+            self.pool_stats.requests += 1
+            response, reusable = await self._read_response(connection, req)
+        except BaseException:
+            connection.close()
+            raise
+
+        response.elapsed = timedelta(seconds=time.perf_counter() - start)
+        connection.requests += 1
+        if reusable and self.keep_alive:
+            self._idle[origin].append(connection)
+        else:
+            connection.close()
+        return response
+
+    async def _read_response(self, connection: RawConnection, req: RawRequest) -> tuple:
+        reader = connection.reader
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except asyncio.IncompleteReadError as e:
+                if not e.partial and connection.requests:
+                    raise ConnectionClosed
+                raise
+            lines = head[:-4].split(b'\r\n')
+            version, _, status = lines[0].partition(b' ')
+            status_code, _, reason = status.partition(b' ')
+            status_code = int(status_code)
+            # informational responses (100 Continue...) are followed by the actual response
+            if not 100 <= status_code < 200 or status_code == 101:
+                break
+
+        headers = []
+        content_length, chunked, close = None, False, version == b'HTTP/1.0'
+        for line in lines[1:]:
+            key, _, value = line.partition(b':')
+            key, value = key.strip(), value.strip()
+            headers.append((key, value))
+            name = key.lower()
+            if name == b'content-length':
+                content_length = int(value)
+            elif name == b'transfer-encoding':
+                chunked = b'chunked' in value.lower()
+            elif name == b'connection':
+                close = b'close' in value.lower() if version != b'HTTP/1.0' else b'keep-alive' not in value.lower()
+
+        if req.method == 'HEAD' or status_code in (204, 304) or 100 <= status_code < 200:
+            body = b''
+        elif chunked:
+            body = await self._read_chunked(reader)
+        elif content_length is not None:
+            body = await reader.readexactly(content_length)
+        else:
+            # body delimited by the end of the connection
+            body = await reader.read()
+            close = True
+
+        extensions = {'http_version': version, 'reason_phrase': reason}
+        try:
+            response = RawResponse(req, status_code, headers=headers, content=body, extensions=extensions)
+        except httpx.DecodingError:
+            # body not matching its Content-Encoding: kept as it was received
+            headers = [(key, value) for key, value in headers if key.lower() != b'content-encoding']
+            response = RawResponse(req, status_code, headers=headers, content=body, extensions=extensions)
+        return response, not close
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+            if size == 0:
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        # trailers
+        while await reader.readuntil(b'\r\n') != b'\r\n':
+            pass
+        return b''.join(chunks)
+
+    async def aclose(self):
+        for idle in self._idle.values():
+            while idle:
+                idle.pop().close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
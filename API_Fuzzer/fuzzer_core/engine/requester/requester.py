@@ -16,6 +16,7 @@ from fuzzer_core.engine.ratelimiter import RateLimiter
 
 import mimetypes
 from fuzzer_core.engine.response_analyser import ResponseAnalyser, AnalysisOptions, ResponseNotMatchedExc
+from fuzzer_core.engine.response_metrics import ResponseMetrics, METRICS_EXTENSION, TRUNCATED_EXTENSION
 from utils.loaders import load_from_file
 
 
@@ -76,20 +77,112 @@ def prepare_files(files: List[Dict[str, str | None] | Tuple[str, str, str]]):
     return file_list
 
 
+def pool_limits_from_config(config: dict = None) -> httpx.Limits:
+    """
+    Builds the connection pool limits from the fuzz_engine section of the configuration
+    missing values fall back to the httpx defaults
+    :param config: configuration dict (Config instance)
+    :return: httpx.Limits
+    """
+    engine_conf = (config or {}).get('fuzz_engine', {}) or {}
+    default_limits = httpx.Limits()
+
+    return httpx.Limits(
+        max_connections=engine_conf.get('max_connections', default_limits.max_connections),
+        max_keepalive_connections=engine_conf.get('max_keepalive_connections',
+                                                  default_limits.max_keepalive_connections),
+        keepalive_expiry=engine_conf.get('keepalive_expiry', default_limits.keepalive_expiry))
+
+
+# bytes of a discarded body that are still read to keep its connection (bigger bodies close the connection)
+DISCARD_DRAIN_LIMIT = 64 * 1024
+
+
+class PoolStats:
+    """
+    Keeps count of the requests sent on the wire and of the connections (TCP / TLS) opened to send them
+    Counting is done through the httpcore "trace" request extension, so it covers redirects and auth retries too
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    async def trace(self, event_name: str, info: dict):
+        """
+        trace extension callback, called by httpcore for every step of the request lifecycle
+        :param event_name: "<module>.<step>.<started|complete|failed>"
+        :param info: step details (unused)
+        :return:
+        """
+        if event_name.endswith('send_request_headers.started'):
+            self.requests += 1
+        elif event_name == 'connection.connect_tcp.complete':
+            self.connections_opened += 1
+        elif event_name == 'connection.start_tls.complete':
+            self.tls_handshakes += 1
+
+    @property
+    def reused_requests(self) -> int:
+        """Requests sent over an already opened (kept alive) connection"""
+        return max(self.requests - self.connections_opened, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused_requests / self.requests if self.requests else 0.0
+
+    def reset(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    def as_dict(self) -> dict:
+        return {'requests': self.requests, 'connections_opened': self.connections_opened,
+                'tls_handshakes': self.tls_handshakes, 'reused_requests': self.reused_requests,
+                'reuse_ratio': round(self.reuse_ratio, 4)}
+
+    def __repr__(self):
+        return f"<PoolStats {self.as_dict()}>"
+
+
 class Requester(AsyncClient):
 
     def __init__(self, base_url="", headers=None, auth: dict = None, cookies=None, timeout=None, follow_redirects=None,
-                 proxy=None, http1=True, http2=False, config=None):
+                 proxy=None, http1=True, http2=False, config=None, limits: httpx.Limits = None, keep_alive: bool = None,
+                 stream_responses: bool = None, keep_body: bool = None, max_body_size: int = None):
         """
+        One Requester (and its connection pool) is meant to be shared by all the FuzzWorker coroutines of a run
 
         :param base_url:
         :param headers:
         :param auth:
         :param cookies:
         :param timeout:
+        :param limits: connection pool limits (built from config['fuzz_engine'] if not provided)
+        :param keep_alive: if False, "Connection: close" is sent and every request opens its own connection
+        :param stream_responses: the fuzz workers receive the status line and headers first, the body of a response
+        is only downloaded if it is kept (see FuzzWorker.analyse_response)
+        :param keep_body: with stream_responses, the body of a kept response is read even if no analysis needs it
+        :param max_body_size: only the first bytes of a body are kept (the length metrics still cover the whole body),
+        responses are streamed when it's set
         """
 
         self.auth = None
+        self.pool_stats = PoolStats()
+        if limits is None:
+            limits = pool_limits_from_config(config)
+        engine_conf = (config or {}).get('fuzz_engine', {}) or {}
+        if keep_alive is None:
+            keep_alive = engine_conf.get('keep_alive', True)
+        self.keep_alive = keep_alive
+        self.stream_responses = engine_conf.get('stream_responses', False) if stream_responses is None \
+            else stream_responses
+        self.keep_body = engine_conf.get('keep_body', True) if keep_body is None else keep_body
+        self.max_body_size = engine_conf.get('max_body_size', None) if max_body_size is None else max_body_size
+        if self.max_body_size is not None:
+            # the body can only be capped while it is received
+            self.stream_responses = True
         if config:
             requester_conf = config.get('request', {})
             if config.get("proxy", None) is not None:
@@ -111,15 +204,16 @@ class Requester(AsyncClient):
             super().__init__(base_url=merged.get('base_url', ''), headers=merged.get('headers', None),
                              cookies=merged.get('cookies', None), params=merged.get('params', None),
                              follow_redirects=merged.get('follow_redirects', None), proxy=merged.get('proxy', None),
-                             timeout=merged.get('timeout', None), http1=merged.get('http1', True),
-                             http2=merged.get('http2', False))
+                             timeout=merged.get('timeout', None), http1=merged.get('http1', http1),
+                             http2=merged.get('http2', http2), limits=limits)
 
             if merged.get('auth', None):
                 self.auth = prepare_auth(merged.get['auth'])
 
         else:
             super().__init__(base_url=base_url, headers=headers, cookies=cookies, timeout=timeout,
-                             follow_redirects=follow_redirects)
+                             follow_redirects=follow_redirects, proxy=proxy, http1=http1, http2=http2,
+                             limits=limits)
             if auth:
                 self.auth = prepare_auth(auth)
 
@@ -166,9 +260,10 @@ class Requester(AsyncClient):
         :param req_dict:
         :return: Response object
         """
-        # Closing connection so the next request won't be sent under same connection (asyncio issues)
         headers = req_dict.get("headers", {})
-        headers["Connection"] = "close"
+        if not self.keep_alive:
+            # Closing connection so the next request won't be sent under same connection (asyncio issues)
+            headers["Connection"] = "close"
 
         auth = self.auth
         if req_dict.get("auth", None) is not None:
@@ -181,21 +276,76 @@ class Requester(AsyncClient):
 
         return response
 
-    async def send_request(self, req, auth) -> httpx.Response | None:
+    async def send_request(self, req, auth, stream: bool = False) -> httpx.Response | None:
         """
         This method sends a built request and returns the response
         :param req: request object (built and ready to be sent)
         :param auth: authentication ( either of type AuthType or UseClientDefault)
+        :param stream: only the status line and headers are received, the body must then be read (read_body) or
+        discarded (discard) to release the connection
         :return: response Object
         """
+        if not self.keep_alive:
+            req.headers["Connection"] = "close"
+        req.extensions["trace"] = self.pool_stats.trace
         try:
-            response = await self.send(request=req, auth=auth, follow_redirects=self.follow_redirects)
+            response = await self.send(request=req, auth=auth, follow_redirects=self.follow_redirects, stream=stream)
         except httpx.ConnectError:
             # TODO: Log this error
             print("Error connecting to url")
             return None
         return response
 
+    async def read_body(self, response: httpx.Response):
+        """
+        Downloads the body of a streamed response (the response is closed once read)
+        With max_body_size, the whole body is received but only its first bytes are kept: its length metrics are
+        computed chunk by chunk and cached in the response, which is marked as truncated if bytes were dropped
+        :param response: streamed response
+        :return:
+        """
+        if self.max_body_size is None:
+            await response.aread()
+            return
+
+        metrics = ResponseMetrics(response.encoding or 'utf-8')
+        kept = []
+        try:
+            async for chunk in response.aiter_bytes():
+                if metrics.bytes < self.max_body_size:
+                    kept.append(chunk[:self.max_body_size - metrics.bytes])
+                metrics.update(chunk)
+        finally:
+            await response.aclose()
+
+        # what aread would have set, with the kept bytes only
+        response._content = b"".join(kept)
+        response.extensions[METRICS_EXTENSION] = metrics
+        if metrics.bytes > self.max_body_size:
+            response.extensions[TRUNCATED_EXTENSION] = True
+
+    async def discard(self, response: httpx.Response):
+        """
+        Closes a streamed response without keeping its body
+        A small body is still read (and dropped) so its connection can be reused, a bigger one closes the connection
+        :param response: streamed response
+        :return:
+        """
+        length = response.headers.get('content-length', '')
+        try:
+            # a body known to be too big closes its connection right away
+            if self.keep_alive and not (length.isdigit() and int(length) > DISCARD_DRAIN_LIMIT):
+                received = 0
+                async for chunk in response.aiter_raw():
+                    received += len(chunk)
+                    if received > DISCARD_DRAIN_LIMIT:
+                        break
+        except httpx.HTTPError:
+            # the body is dropped anyway
+            pass
+        finally:
+            await response.aclose()
+
     async def send_requests(self, request_list: list[dict] = None, rate_limiter=None, **kwargs) -> list[httpx.Response]:
         """
         Async method receives a list of request values and sends them with a defined delay
@@ -236,6 +386,8 @@ class Requester(AsyncClient):
                                              params=params, content=content, data=data, json=json,
                                              files=files, cookies=cookies, timeout=timeout)
 
+                    req.extensions["trace"] = self.pool_stats.trace
+
                     # Acquire permission from the rate limiter
                     async with limiter.throttle():
                         response_list.append(
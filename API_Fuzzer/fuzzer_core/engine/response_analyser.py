@@ -4,6 +4,7 @@ import re
 import zlib
 from collections import Counter
 from datetime import timedelta
+from typing import Callable
 from urllib.parse import quote, unquote
 import brotli
 
@@ -12,7 +13,10 @@ from enum import Enum
 import httpx
 from httpx import Response
 
-from utils.encoding_decoding import hash_response_md5
+from fuzzer_core.engine.response_clusters import ClusterIndex
+from fuzzer_core.engine.response_hasher import ResponseHasher
+from fuzzer_core.engine.response_metrics import ResponseMetrics
+from fuzzer_core.engine.sensitive_scanner import SensitiveInfoScanner, DEFAULT_MAX_SCAN_BYTES
 
 
 class AnalysisOptions(Enum):
@@ -30,6 +34,8 @@ class AnalysisOptions(Enum):
     RESP_SENSITIVE_INFO = "sensitive-info"
 
     RESP_HASH = "response-hash"
+    RESP_CLUSTER = "response-cluster"
+    RESP_ANOMALY = "response-anomaly"
 
 
 class ResponseNotMatchedExc(Exception):
@@ -47,35 +53,341 @@ response_analysis -> invoke_match -> make_analysis
 match_hide= ("match" | "hide", { AnalysisOptions:{},AnalysisOptions:{ } })
 analysis= [AnalysisOption.LENGTH_WORDS, AnalysisOption....] 
 
+compiled plan (evaluate) :
+- the match / hide requirements are compiled once (in __init__) into rules: one predicate per option, with its
+  conditions already parsed (sets of codes, lowercase header names, encoded values ...)
+- rules run cheapest first and stop at the first one that filters the response out: status code and headers never
+  touch the body, length-in-bytes uses the Content-Length header when it gives the body size
+- "match": a response is kept if every rule matches, "hide": if no rule matches
+- the values computed for the rules (metrics, sensitive info ...) are reused by the analysis of the same response
+- each rule counts the responses it evaluated, matched and filtered out
+- response-cluster puts each response in a cluster of near duplicates (ClusterIndex of the analyser), its value is
+  the cluster id. Its rule ({'max_count': n}, default 1) matches the first n responses of a cluster: in match mode
+  only the responses that don't look like one already seen are kept
+- with a baseline profile (calibration of the run), the responses kept by the rules are then compared to the
+  baseline: only the ones that deviate from it are kept, response-anomaly gives what deviates
+- streamed responses (only the status line and headers received): match_headers runs the rules answered from the
+  headers, needs_body tells if the rest of the plan or the analysis needs the body, evaluate(first_rule=...) runs the
+  rest once the body was read (or discarded)
+
 """
 
+# rules are evaluated in this order (the cheap ones first), options not listed come last
+RULE_COSTS = {
+    AnalysisOptions.RESP_CODE.value: 0,
+    AnalysisOptions.RESP_HEADER.value: 1,
+    AnalysisOptions.RESP_ELAPSED_TIME.value: 1,
+    AnalysisOptions.LENGTH_BYTES.value: 2,
+    AnalysisOptions.LENGTH_LINES.value: 3,
+    AnalysisOptions.LENGTH_WORDS.value: 3,
+    AnalysisOptions.LENGTH_CHARS.value: 3,
+    AnalysisOptions.RESP_VALUE.value: 4,
+    AnalysisOptions.RESP_SENSITIVE_INFO.value: 5,
+    # stateful: runs last, so that only the responses kept by every other rule join a cluster
+    AnalysisOptions.RESP_CLUSTER.value: 100,
+}
+
+# options computed from the response body
+BODY_OPTIONS = frozenset({AnalysisOptions.LENGTH_LINES.value, AnalysisOptions.LENGTH_WORDS.value,
+                          AnalysisOptions.LENGTH_CHARS.value, AnalysisOptions.RESP_VALUE.value,
+                          AnalysisOptions.RESP_SENSITIVE_INFO.value, AnalysisOptions.RESP_HASH.value,
+                          AnalysisOptions.RESP_CLUSTER.value, AnalysisOptions.RESP_ANOMALY.value})
+
+# options answered from the status line and the headers only
+HEADER_OPTIONS = frozenset({AnalysisOptions.RESP_CODE.value, AnalysisOptions.RESP_HEADER.value})
+
+
+def declared_body_length(response: httpx.Response) -> int | None:
+    """
+    Body size given by the Content-Length header, if it is the size of the body (not encoded, a body is expected)
+    :param response: response (its body doesn't need to be read)
+    :return: int or None
+    """
+    headers = response.headers
+    if 'content-encoding' in headers or response.status_code in (204, 304) or response.status_code < 200:
+        return None
+    length = headers.get('content-length')
+    if length is None or not length.isdigit():
+        return None
+    try:
+        if response.request.method == 'HEAD':
+            return None
+    except RuntimeError:
+        # response built without its request
+        pass
+    return int(length)
+
+
+def option_needs_body(option: str, response: httpx.Response) -> bool:
+    """
+    :param option: analysis option
+    :param response: response (its body doesn't need to be read)
+    :return: True if the value of the option is computed from the body of the response
+    """
+    if option == AnalysisOptions.LENGTH_BYTES.value:
+        return declared_body_length(response) is None
+    return option in BODY_OPTIONS
+
+
+def option_in_headers(option: str, response: httpx.Response) -> bool:
+    """
+    :return: True if the value of the option is known before the body is received (the elapsed time isn't: it's
+    measured until the response is closed)
+    """
+    if option == AnalysisOptions.LENGTH_BYTES.value:
+        return declared_body_length(response) is not None
+    return option in HEADER_OPTIONS
+
+
+class MatchRule:
+    __slots__ = ('option', 'predicate', 'cost', 'evaluated', 'hits', 'filtered')
+
+    def __init__(self, option: str, predicate: Callable, cost: int):
+        """
+        :param option: analysis option of the rule
+        :param predicate: predicate(response, values) -> True if the response matches the conditions of the rule
+        :param cost: evaluation order
+        """
+        self.option = option
+        self.predicate = predicate
+        self.cost = cost
+        self.evaluated = 0
+        self.hits = 0
+        self.filtered = 0
+
+    def as_dict(self) -> dict:
+        return {'option': self.option, 'evaluated': self.evaluated, 'hits': self.hits, 'filtered': self.filtered}
+
+    def __repr__(self):
+        return f"<MatchRule {self.as_dict()}>"
+
 
 class ResponseAnalyser:
 
-    def __init__(self, match_hide: list[str, dict], analysis: list = None):
+    # shared scanner of the default patterns (match_sensitive_information)
+    default_sensitive_scanner = None
+
+    def __init__(self, match_hide: list[str, dict], analysis: list = None, sensitive_patterns: dict = None,
+                 max_scan_bytes: int | None = DEFAULT_MAX_SCAN_BYTES, hasher: ResponseHasher = None,
+                 clusters: ClusterIndex = None):
+        """
+        :param match_hide: ("match" | "hide", {option: conditions})
+        :param analysis: analysis options
+        :param sensitive_patterns: user sensitive information patterns (category: regex), added to the default ones
+        :param max_scan_bytes: only the first bytes of a response are scanned for sensitive information (None: all)
+        :param hasher: hasher of the response-hash option (default: blake2b, volatile headers left out)
+        :param clusters: cluster index of the response-cluster option
+        """
         self.matching_mode, self.matching_requirements = (None, None) if match_hide is None else match_hide
         self.analysis_parameters = None if analysis is None else analysis
+        # compiled once, used for every response
+        self.sensitive_scanner = SensitiveInfoScanner(extra_patterns=sensitive_patterns, max_scan_bytes=max_scan_bytes)
+        self.hasher = ResponseHasher() if hasher is None else hasher
+        self.clusters = ClusterIndex() if clusters is None else clusters
+
+        # match / hide plan: a response is kept if each rule gives keep_value
+        self.keep_value = self.matching_mode != "hide"
+        self.rules = sorted((self.compile_rule(option, conditions)
+                             for option, conditions in (self.matching_requirements or {}).items()),
+                            key=lambda rule: rule.cost)
+        self.kept = 0
+
+        # baseline of the run (set by the calibration): only the responses deviating from it are kept
+        self.baseline = None
+        self.baseline_filtered = 0
 
     def response_analysis(self, response: httpx.Response) -> dict | None:
         """
         the method will do the request matching with the specified parameters and requirements At the same time will
         do the response analysis against the specified analysis parameters in the ResponseAnalysis instance
         :param response: response object to analyse and match
-        :return: dict of analysis results or None if response not matched (if not matched, no need to check analysis)
+        :return: dict of analysis results (None if there are no analysis parameters)
+        :raises ResponseNotMatchedExc: if the response is filtered out by the match / hide requirements
         """
+        analysis_results = self.evaluate(response)
+        if analysis_results is None:
+            raise ResponseNotMatchedExc
+        print("ANALYSIS RES    ", analysis_results)
+        return analysis_results if self.analysis_parameters is not None else None
 
-        analysis_results = {} if self.analysis_parameters is not None else None
-        try:
-            if self.matching_requirements:
-                analysis_results.update(self.invoke_match(response=response, analysis_params=self.analysis_parameters))
+    def evaluate(self, response: httpx.Response | None, values: dict = None, first_rule: int = 0) -> dict | None:
+        """
+        Runs the compiled match / hide plan then the analysis of the kept responses (no exception on filtered ones)
+        :param response: response to match and analyse (None if the request failed)
+        :param values: values already computed for the response (by match_headers)
+        :param first_rule: rules already run by match_headers
+        :return: dict of analysis results, None if the response is filtered out
+        """
+        # values computed for the response, shared by the rules and the analysis
+        values = {} if values is None else values
+        if not self.run_rules(response, values, first_rule, len(self.rules)):
+            return None
+        if self.baseline is not None and response is not None and \
+                not self.option_value(response, AnalysisOptions.RESP_ANOMALY.value, values):
+            self.baseline_filtered += 1
+            return None
+
+        self.kept += 1
+        if not self.analysis_parameters or response is None:
+            return {}
+        return {param: self.option_value(response, param, values) for param in self.analysis_parameters}
+
+    def match_headers(self, response: httpx.Response, values: dict) -> int | None:
+        """
+        Runs the first rules of the plan that only need the status line and headers of a streamed response
+        :param response: response whose body wasn't read yet
+        :param values: values computed for the response (updated)
+        :return: number of rules run (first rule left for evaluate), None if the response is filtered out
+        """
+        stop = 0
+        while stop < len(self.rules) and option_in_headers(self.rules[stop].option, response):
+            stop += 1
+        return stop if self.run_rules(response, values, 0, stop) else None
 
-            # Check if all analysis has been carried out (through matching)
-            if not all(param in analysis_results for param in self.analysis_parameters):
-                analysis_results = self.invoke_analysis(response=response, analysis_results=analysis_results)
-        except ResponseNotMatchedExc:
-            raise
-        print("ANALYSIS RES    ", analysis_results)
-        return analysis_results
+    def needs_body(self, response: httpx.Response, first_rule: int = 0) -> bool:
+        """
+        :param response: response whose body wasn't read yet
+        :param first_rule: rules already run by match_headers
+        :return: True if the rules left or the analysis need the body of the response
+        """
+        return self.baseline is not None or \
+            any(option_needs_body(rule.option, response) for rule in self.rules[first_rule:]) or \
+            any(option_needs_body(param, response) for param in self.analysis_parameters or ())
+
+    def run_rules(self, response: httpx.Response | None, values: dict, start: int, stop: int) -> bool:
+        """
+        :return: False as soon as a rule filters the response out
+        """
+        for rule in self.rules[start:stop]:
+            rule.evaluated += 1
+            matched = response is not None and rule.predicate(response, values)
+            if matched:
+                rule.hits += 1
+            if matched != self.keep_value:
+                rule.filtered += 1
+                return False
+        return True
+
+    def option_value(self, response: httpx.Response, option: str, values: dict = None):
+        """
+        Analysis result of one option, computed once per response
+        :param response: response to analyse
+        :param option: analysis option
+        :param values: values already computed for the response (updated)
+        :return: value of the option
+        """
+        if values is not None and option in values:
+            return values[option]
+
+        out = None
+        match option:
+            case AnalysisOptions.LENGTH_BYTES.value:
+                # the body size when the headers give it, the body isn't touched
+                out = declared_body_length(response)
+                if out is None:
+                    out = ResponseMetrics.of_response(response).bytes
+            case AnalysisOptions.LENGTH_LINES.value:
+                out = ResponseMetrics.of_response(response).length_in_lines
+            case AnalysisOptions.LENGTH_WORDS.value:
+                out = ResponseMetrics.of_response(response).words
+            case AnalysisOptions.LENGTH_CHARS.value:
+                out = ResponseMetrics.of_response(response).chars
+            case AnalysisOptions.RESP_CODE.value:
+                out = response.status_code
+            case AnalysisOptions.RESP_ELAPSED_TIME.value:
+                out = response.elapsed
+            case AnalysisOptions.RESP_HEADER.value:
+                out = dict(response.headers)
+            case AnalysisOptions.RESP_SENSITIVE_INFO.value:
+                out = self.sensitive_scanner.scan(response.content)
+            case AnalysisOptions.RESP_HASH.value:
+                out = self.hasher.hexdigest(response)
+            case AnalysisOptions.RESP_CLUSTER.value:
+                out = self.clusters.assign_response(response)[0].id
+            case AnalysisOptions.RESP_ANOMALY.value:
+                out = [] if self.baseline is None else self.baseline.deviations(response)
+
+        if values is not None:
+            values[option] = out
+        return out
+
+    def compile_rule(self, option: str, conditions: dict) -> MatchRule:
+        """
+        Compiles the conditions of an option into a predicate
+        :param option: analysis option
+        :param conditions: matching conditions of the option
+        :return: MatchRule
+        """
+        conditions = conditions or {}
+        value = self.option_value
+        predicate = None
+
+        match option:
+            case AnalysisOptions.RESP_CODE.value:
+                codes = conditions.get('code', [])
+                codes = frozenset([codes] if isinstance(codes, int) else codes)
+                predicate = lambda response, values: response.status_code in codes
+
+            case AnalysisOptions.RESP_HEADER.value:
+                # httpx headers are case-insensitive: nothing to rebuild for each response
+                headers = [(key.lower(), header_value) for key, header_value in conditions.get('headers', {}).items()]
+
+                def predicate(response, values):
+                    for key, header_value in headers:
+                        received = response.headers.get(key)
+                        if received is None or (header_value and received != header_value):
+                            return False
+                    return True
+
+            case AnalysisOptions.RESP_ELAPSED_TIME.value:
+                minimum = None if conditions.get('min') is None else timedelta(seconds=conditions['min'])
+                maximum = None if conditions.get('max') is None else timedelta(seconds=conditions['max'])
+                predicate = lambda response, values: ((minimum is None or response.elapsed >= minimum) and
+                                                      (maximum is None or response.elapsed <= maximum))
+
+            case (AnalysisOptions.LENGTH_BYTES.value | AnalysisOptions.LENGTH_LINES.value |
+                  AnalysisOptions.LENGTH_WORDS.value | AnalysisOptions.LENGTH_CHARS.value):
+                minimum, maximum = conditions.get('min'), conditions.get('max')
+
+                def predicate(response, values):
+                    length = value(response, option, values)
+                    return (maximum is None or length <= maximum) and (minimum is None or length >= minimum)
+
+            case AnalysisOptions.RESP_VALUE.value:
+                target = conditions.get('value')
+                predicate = lambda response, values: target is not None and self.value_in_response(
+                    content=response.content, target_value=target, encoding=response.encoding or 'utf-8')
+
+            case AnalysisOptions.RESP_SENSITIVE_INFO.value:
+                infos = conditions.get('info', [])
+                predicate = lambda response, values: any(info in value(response, option, values) for info in infos)
+
+            case AnalysisOptions.RESP_HASH.value if conditions.get('hash'):
+                hashes = conditions['hash']
+                hashes = frozenset(hash_value.lower() for hash_value in ([hashes] if isinstance(hashes, str)
+                                                                         else hashes))
+                predicate = lambda response, values: value(response, option, values) in hashes
+
+            case AnalysisOptions.RESP_CLUSTER.value:
+                max_count = conditions.get('max_count', 1)
+                clusters = self.clusters.clusters
+                predicate = lambda response, values: clusters[value(response, option, values)].count <= max_count
+
+        if predicate is None:
+            # options without conditions (hash ...) match every response
+            predicate = lambda response, values: True
+        return MatchRule(option, predicate, RULE_COSTS.get(option, len(RULE_COSTS)))
+
+    def rule_stats(self) -> dict:
+        """
+        :return: responses evaluated and kept, and the counters of each rule (in evaluation order)
+        """
+        # a response is either kept or filtered out by one rule or the baseline
+        evaluated = self.kept + sum(rule.filtered for rule in self.rules) + self.baseline_filtered
+        stats = {'evaluated': evaluated, 'kept': self.kept, 'rules': [rule.as_dict() for rule in self.rules]}
+        if self.baseline is not None:
+            stats['baseline'] = {**self.baseline.as_dict(), 'filtered': self.baseline_filtered}
+        return stats
 
     def invoke_match(self, response: httpx.Response, analysis_params: list = None) -> dict:
         """
@@ -138,17 +450,18 @@ class ResponseAnalyser:
         out = None
 
         match analysis_option:
+            # the length metrics are computed together on the first one and cached in the response
             case AnalysisOptions.LENGTH_BYTES.value:
-                out = self.calculate_length_in_bytes(response.text)
+                out = ResponseMetrics.of_response(response).bytes
 
             case AnalysisOptions.LENGTH_LINES.value:
-                out = self.calculate_length_in_lines(response.text)
+                out = ResponseMetrics.of_response(response).length_in_lines
 
             case AnalysisOptions.LENGTH_WORDS.value:
-                out = self.calculate_length_in_words(response.text)
+                out = ResponseMetrics.of_response(response).words
 
             case AnalysisOptions.LENGTH_CHARS.value:
-                out = self.calculate_length_in_chars(response.text)
+                out = ResponseMetrics.of_response(response).chars
 
             #####
             case AnalysisOptions.RESP_CODE.value:
@@ -184,20 +497,29 @@ class ResponseAnalyser:
             case AnalysisOptions.RESP_VALUE.value:
                 if matching_conditions is not None:
                     if (
-                            self.value_in_response(content=response.text,
-                                                   target_value=matching_conditions.get('value'))) != (
+                            self.value_in_response(content=response.content,
+                                                   target_value=matching_conditions.get('value'),
+                                                   encoding=response.encoding or 'utf-8')) != (
                             self.matching_mode != "hide"):
                         raise ResponseNotMatchedExc
 
             case AnalysisOptions.RESP_SENSITIVE_INFO.value:
-                out = self.match_sensitive_information(content=response.text)
+                # {category: {'count', 'offsets'}}, offsets in the raw content
+                out = self.sensitive_scanner.scan(response.content)
                 if matching_conditions is not None:
                     if (any(info in out for info in matching_conditions.get('info', []))) != (
                             self.matching_mode != "hide"):
                         raise ResponseNotMatchedExc
 
             case AnalysisOptions.RESP_HASH.value:
-                out = hash_response_md5(response)
+                out = self.hasher.hexdigest(response)
+
+            case AnalysisOptions.RESP_CLUSTER.value:
+                cluster, _ = self.clusters.assign_response(response)
+                out = cluster.id
+                if matching_conditions is not None:
+                    if (cluster.count <= matching_conditions.get('max_count', 1)) != (self.matching_mode != "hide"):
+                        raise ResponseNotMatchedExc
 
         # to avoid rewriting the same code for each method to be invoked, the matching of the analysis will be done here
         if analysis_option in [AnalysisOptions.LENGTH_BYTES.value, AnalysisOptions.LENGTH_LINES.value,
@@ -292,15 +614,22 @@ class ResponseAnalyser:
         return True if match else False
 
     @staticmethod
-    def value_in_response(content, target_value) -> bool:
+    def value_in_response(content, target_value, encoding: str = 'utf-8') -> bool:
         """
         Check if a certain value is present in the response content or not .
         :param content: The response object or content
         :param target_value: The value to check for
+        :param encoding: encoding of the content (if it's bytes)
         :return: True if the value is present (or not present, based on the state), False otherwise
         """
         if isinstance(content, bytes):
-            content = content.decode('utf-8')
+            if isinstance(target_value, bytes):
+                return target_value in content
+            try:
+                # the value is searched in the raw content, which is never decoded
+                return target_value.encode(encoding) in content
+            except (UnicodeEncodeError, LookupError):
+                content = content.decode('utf-8', errors='replace')
 
         return target_value in content
 
@@ -357,37 +686,16 @@ class ResponseAnalyser:
                     return False
         return True
 
-    @staticmethod
-    def match_sensitive_information(content: str):
+    @classmethod
+    def match_sensitive_information(cls, content: str):
         """
         Check if the request content contains sensitive information using regular expressions.
         :param content: The content of the request
-        :return: True if sensitive information is found, False otherwise
-        """
-        detected_info = []
-        sensitive_patterns = {
-            # Credit Card Numbers
-            "16 digits credit card numbers": r'\b\d{16}\b',  # 16-digit credit card numbers
-            "Credit card numbers": r'\b\d{4}[ -]?\d{4}[ -]?\d{4}[ -]?\d{4}\b',  # Various credit card number formats
-            "Social Security Numbers": r'\b\d{3}[ -]?\d{2}[ -]?\d{4}\b',  # Social Security Numbers with optional hyphens
-            "Email Addresses": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # Email Addresses
-            # "us_phone_number": r'\b\d{3}[ -]?\d{3}[ -]?\d{4}\b',  # US phone numbers with optional hyphens
-            "International phone numbers": r'\+(?:\d{1,4}[ -]?)?(?:\d{1,}\.?)?\d{1,}(?:[ -]?\d{1,}){1,}\b',
-            # International phone numbers
-            "Common password patterns": r'\b(?:password|pass|pwd)[A-Za-z0-9._%+-]*[:=]?[A-Za-z0-9._%+-]+\b',
-            # Common password patterns
-            "API Keys": r'\b(?:api[-_]?key|access[-_]?token)[:=]?[A-Za-z0-9._%+-]+\b',  # API Keys
-            "Date of birth": r'\b\d{1,2}[ /-]\d{1,2}[ /-]\d{2,4}\b',  # Date of birth with various separators
-            # "Addresses": r'\b\d+\s[A-Za-z0-9._%+-]+\s[A-Za-z0-9._%+-]+\b',  # Addresses
-            # "PIN codes": r'\b\d{4}\b',  # Personal Identification Numbers (PIN)
-            # "URLs": r'\bhttps?://[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'  # URLs
-        }
-
-        for key, pattern in sensitive_patterns.items():
-            if re.search(pattern, content):
-                detected_info.append(key)
-
-        return detected_info
+        :return: list of the categories of sensitive information found
+        """
+        if cls.default_sensitive_scanner is None:
+            cls.default_sensitive_scanner = SensitiveInfoScanner()
+        return cls.default_sensitive_scanner.categories(content)
 
     @staticmethod
     def extract_response_information(response: str) -> dict:
@@ -463,17 +771,31 @@ class ResponseAnalyser:
         response_information['security_measures'] = security_measures
 
         # Rate Limiting Information
-        rate_limit_info = {}
-        if 'X-RateLimit-Limit' in headers:
-            rate_limit_info['limit'] = headers['X-RateLimit-Limit']
-        if 'X-RateLimit-Remaining' in headers:
-            rate_limit_info['remaining'] = headers['X-RateLimit-Remaining']
-        if 'X-RateLimit-Reset' in headers:
-            rate_limit_info['reset_time'] = headers['X-RateLimit-Reset']
-        response_information['rate_limiting'] = rate_limit_info
+        response_information['rate_limiting'] = ResponseAnalyser.extract_rate_limit_information(headers)
 
         return response_information
 
+    @staticmethod
+    def extract_rate_limit_information(headers) -> dict:
+        """
+        Rate limiting headers sent by the target (header names are case-insensitive)
+        :param headers: dict or httpx.Headers
+        :return: dict with the limit, remaining, reset_time and retry_after values found (as sent)
+        """
+        headers = {key.lower(): value for key, value in headers.items()}
+
+        rate_limit_info = {}
+        if 'x-ratelimit-limit' in headers:
+            rate_limit_info['limit'] = headers['x-ratelimit-limit']
+        if 'x-ratelimit-remaining' in headers:
+            rate_limit_info['remaining'] = headers['x-ratelimit-remaining']
+        if 'x-ratelimit-reset' in headers:
+            rate_limit_info['reset_time'] = headers['x-ratelimit-reset']
+        if 'retry-after' in headers:
+            rate_limit_info['retry_after'] = headers['retry-after']
+
+        return rate_limit_info
+
 
 if __name__ == '__main__':
     # Example mock HTTP response to test the function
@@ -0,0 +1,207 @@
+import hashlib
+import re
+
+import httpx
+
+from fuzzer_core.engine.queues.request_queue import FUZZ_INDEX_EXTENSION
+
+"""
+NOTES:
+
+- a response gets a 64 bits SimHash of the set of words of its body: each distinct word votes for the bits of its
+  own 64 bits hash, a bit of the fingerprint is set when most words have it set. Two bodies sharing most of their
+  words get fingerprints a few bits apart (hamming distance), unrelated bodies ~32 bits apart
+- words are runs of letters / digits / underscores starting with a letter: numbers (ids, timestamps, counters) are
+  left out, they're what changes between two responses of the same page. An error page of ~25 words echoing the
+  fuzzed value moves by 5 bits at most, hence the default max distance of 6
+- the votes are counted without a python loop over the bits: the hash of each word is spread once into a big int of
+  64 lanes of 32 bits (cached for the words already seen), the votes are the sum of these ints. Adding 2^31 - (half
+  the words) - 1 to every lane sets the top bit of the lanes above half, the top bytes are read as '0' / '1' digits
+- the cluster index is an LSH index: fingerprints are cut into max_distance + 1 bands, two fingerprints at most
+  max_distance bits apart share at least one band (pigeonhole). A response only compares its fingerprint to the
+  seeds found in its band buckets, assigning a cluster takes the same time whatever the number of clusters
+- a small body sits close to the majority threshold on many bits: one changed word moves its fingerprint by up to ~6
+  bits, the members of a cluster spread over ~12 bits around the first one. Each cluster keeps up to max_seeds
+  distinct member fingerprints as seeds, a response joins the cluster of any seed it is close to
+- responses of different status codes never share a cluster
+- a cluster keeps its first response as representative (fuzz index and url) and counts its members, the index lives in
+  the analyser of a process: the cluster ids of the shards of a multiprocess run are their own
+"""
+
+# words of a body (numbers left out)
+WORD = re.compile(rb'[A-Za-z_][A-Za-z0-9_]*')
+
+FINGERPRINT_BITS = 64
+LANE_BITS = 32
+
+# byte value: its 8 bits, each one in its own lane
+BYTE_SPREAD = [sum(1 << (bit * LANE_BITS) for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+# 1 in every lane
+LANES_ONE = sum(1 << (lane * LANE_BITS) for lane in range(FINGERPRINT_BITS))
+# top byte of a lane: '1' if its top bit is set
+TOP_BIT_DIGIT = bytes(b'01'[byte >> 7] for byte in range(256))
+
+# only the first bytes of a body are fingerprinted
+DEFAULT_MAX_FINGERPRINT_BYTES = 64 * 1024
+
+DEFAULT_MAX_DISTANCE = 6
+DEFAULT_MAX_SEEDS = 16
+
+# words whose spread hash is kept (the cache is cleared past it)
+MAX_CACHED_WORDS = 100_000
+
+
+class SimHasher:
+    def __init__(self, max_bytes: int | None = DEFAULT_MAX_FINGERPRINT_BYTES):
+        """
+        :param max_bytes: only the first bytes of a body are fingerprinted (None: the whole body)
+        """
+        self.max_bytes = max_bytes
+        self._spread_words = {}
+
+    def spread(self, word: bytes) -> int:
+        spread = self._spread_words.get(word)
+        if spread is None:
+            word_hash = int.from_bytes(hashlib.blake2b(word, digest_size=8).digest(), 'little')
+            spread = 0
+            for byte in range(FINGERPRINT_BITS // 8):
+                spread |= BYTE_SPREAD[word_hash >> (byte * 8) & 0xFF] << (byte * 8 * LANE_BITS)
+            if len(self._spread_words) >= MAX_CACHED_WORDS:
+                self._spread_words.clear()
+            self._spread_words[word] = spread
+        return spread
+
+    def fingerprint(self, content: bytes) -> int:
+        """
+        :param content: raw body
+        :return: 64 bits SimHash of the words of the body (0 for a body without words)
+        """
+        if self.max_bytes is not None:
+            content = content[:self.max_bytes]
+        words = set(WORD.findall(content))
+        if not words:
+            return 0
+        votes = sum(map(self.spread, words))
+        # a lane reaches its top bit once its count is above half the words
+        votes += ((1 << (LANE_BITS - 1)) - len(words) // 2 - 1) * LANES_ONE
+        top_bytes = votes.to_bytes(FINGERPRINT_BITS * LANE_BITS // 8, 'little')[LANE_BITS // 8 - 1::LANE_BITS // 8]
+        return int(top_bytes.translate(TOP_BIT_DIGIT)[::-1], 2)
+
+
+class ResponseCluster:
+    __slots__ = ('id', 'status_code', 'fingerprint', 'count', 'seeds', 'fuzz_index', 'url')
+
+    def __init__(self, cluster_id: int, status_code: int, fingerprint: int, fuzz_index: int | None = None,
+                 url: str | None = None):
+        """
+        :param cluster_id: index of the cluster in its index
+        :param status_code: status code of its responses
+        :param fingerprint: fingerprint of its representative (first response)
+        :param fuzz_index: fuzz index of its representative
+        :param url: url of its representative
+        """
+        self.id = cluster_id
+        self.status_code = status_code
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.seeds = 0
+        self.fuzz_index = fuzz_index
+        self.url = url
+
+    def as_dict(self) -> dict:
+        return {'cluster': self.id, 'status_code': self.status_code, 'count': self.count,
+                'fuzz_index': self.fuzz_index, 'url': self.url, 'fingerprint': f"{self.fingerprint:016x}"}
+
+    def __repr__(self):
+        return f"<ResponseCluster {self.id} [{self.status_code}] count={self.count} {self.url}>"
+
+
+class ClusterIndex:
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, max_seeds: int = DEFAULT_MAX_SEEDS,
+                 simhasher: SimHasher = None):
+        """
+        :param max_distance: max number of different bits between a fingerprint and a seed of its cluster
+        :param max_seeds: max number of member fingerprints a cluster is found by
+        :param simhasher: fingerprints the bodies
+        """
+        if not 0 <= max_distance < FINGERPRINT_BITS:
+            raise ValueError(f"max_distance must be between 0 and {FINGERPRINT_BITS - 1}")
+        self.max_distance = max_distance
+        self.max_seeds = max_seeds
+        self.simhasher = SimHasher() if simhasher is None else simhasher
+
+        # (shift, mask) of each band, the last one takes the remaining bits
+        bands = max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        self.bands = [(band * width, (1 << (width if band < bands - 1 else FINGERPRINT_BITS - band * width)) - 1)
+                      for band in range(bands)]
+
+        self.clusters = []
+        # (status code, seed fingerprint): cluster, for the exact duplicates of a seed
+        self._exact = {}
+        # (status code, band, band bits): (seed fingerprint, cluster)
+        self._buckets = {}
+
+    def find(self, status_code: int, fingerprint: int) -> ResponseCluster | None:
+        """
+        :return: cluster of the fingerprint (None if it's at more than max_distance bits of every cluster)
+        """
+        cluster = self._exact.get((status_code, fingerprint))
+        if cluster is not None:
+            return cluster
+        for band, (shift, mask) in enumerate(self.bands):
+            for seed, cluster in self._buckets.get((status_code, band, fingerprint >> shift & mask), ()):
+                if (seed ^ fingerprint).bit_count() <= self.max_distance:
+                    return cluster
+        return None
+
+    def assign(self, status_code: int, fingerprint: int, fuzz_index: int | None = None,
+               url: str | None = None) -> tuple[ResponseCluster, bool]:
+        """
+        Puts a fingerprint in its cluster, a new cluster is made for it if none is close enough
+        :param status_code: status code of the response
+        :param fingerprint: fingerprint of the response
+        :param fuzz_index: fuzz index of the response (kept if it's the representative of a new cluster)
+        :param url: url of the response (same)
+        :return: (cluster, True if the cluster is new)
+        """
+        cluster = self.find(status_code, fingerprint)
+        is_new = cluster is None
+        if is_new:
+            cluster = ResponseCluster(len(self.clusters), status_code, fingerprint, fuzz_index, url)
+            self.clusters.append(cluster)
+        if (status_code, fingerprint) not in self._exact and cluster.seeds < self.max_seeds:
+            self._exact[(status_code, fingerprint)] = cluster
+            cluster.seeds += 1
+            for band, (shift, mask) in enumerate(self.bands):
+                self._buckets.setdefault((status_code, band, fingerprint >> shift & mask), []).append(
+                    (fingerprint, cluster))
+        cluster.count += 1
+        return cluster, is_new
+
+    def assign_response(self, response: httpx.Response) -> tuple[ResponseCluster, bool]:
+        """
+        :param response: response with its body read
+        :return: (cluster, True if the cluster is new)
+        """
+        try:
+            request = response.request
+            # the httpx request of a raw response is rebuilt from its raw request, without its extensions
+            fuzz_index = (getattr(response, 'raw_request', None) or request).extensions.get(FUZZ_INDEX_EXTENSION)
+            url = str(request.url)
+        except RuntimeError:
+            # response built without its request
+            fuzz_index = url = None
+        return self.assign(response.status_code, self.simhasher.fingerprint(response.content), fuzz_index, url)
+
+    def summary(self) -> list[dict]:
+        """
+        :return: the clusters (representative and count), the biggest first
+        """
+        return [cluster.as_dict() for cluster in sorted(self.clusters, key=lambda cluster: -cluster.count)]
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def __repr__(self):
+        return f"ClusterIndex(max_distance={self.max_distance}, clusters={len(self.clusters)})"
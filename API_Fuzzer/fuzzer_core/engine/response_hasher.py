@@ -0,0 +1,113 @@
+import hashlib
+import zlib
+
+import httpx
+
+"""
+NOTES:
+
+- a response is hashed from its raw bytes, fed one after the other to the hash: status code, headers, body. Nothing is
+  rebuilt as a string, the body is never decoded to text and re-encoded (hash_response_md5 used to do both)
+- the headers are taken from headers.raw (bytes, original case), names are lowered and the headers sorted, so the
+  order the server sends them in doesn't change the hash
+- volatile headers (date, cookies, request ids, timings ...) are left out by default: two responses that only differ
+  by them hash equal, which is what deduplication wants. exclude_headers=() hashes every header
+- the default algorithm is blake2b with an 8 bytes digest: as fast as md5 whatever the CPU (sha1 / sha256 are faster
+  only on CPUs with SHA instructions), and 64 bits keep collisions unlikely over millions of responses. crc32 /
+  adler32 are faster still but 32 bits collide after ~100k responses, they're only fit for small runs. xxhash
+  algorithms are available when the xxhash package is installed
+- the body hashed is the kept body of the response (the first bytes of a body read with a size cap)
+"""
+
+# headers that change between two requests returning the same resource
+VOLATILE_HEADERS = frozenset({
+    'date', 'expires', 'last-modified', 'age', 'etag', 'set-cookie', 'keep-alive',
+    'x-request-id', 'x-correlation-id', 'request-id', 'x-amzn-requestid', 'x-amz-request-id', 'x-amz-id-2',
+    'x-amz-cf-id', 'cf-ray', 'x-runtime', 'x-response-time', 'server-timing', 'x-trace-id', 'traceparent',
+})
+
+
+class ChecksumHash:
+    """
+    zlib checksum (crc32 / adler32) with the update / digest interface of the hashlib objects
+    """
+    __slots__ = ('checksum', 'value')
+
+    def __init__(self, checksum):
+        self.checksum = checksum
+        self.value = checksum(b'')
+
+    def update(self, data: bytes):
+        self.value = self.checksum(data, self.value)
+
+    def digest(self) -> bytes:
+        return self.value.to_bytes(4, 'big')
+
+    def hexdigest(self) -> str:
+        return f"{self.value:08x}"
+
+
+HASH_ALGORITHMS = {
+    'blake2b': lambda: hashlib.blake2b(digest_size=8),
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'crc32': lambda: ChecksumHash(zlib.crc32),
+    'adler32': lambda: ChecksumHash(zlib.adler32),
+}
+
+try:
+    import xxhash
+
+    HASH_ALGORITHMS.update({'xxh64': xxhash.xxh64, 'xxh3_64': xxhash.xxh3_64, 'xxh3_128': xxhash.xxh3_128})
+except ImportError:
+    pass
+
+DEFAULT_HASH_ALGORITHM = 'blake2b'
+
+
+class ResponseHasher:
+    def __init__(self, algorithm: str = DEFAULT_HASH_ALGORITHM, exclude_headers=VOLATILE_HEADERS,
+                 include_headers: bool = True):
+        """
+        :param algorithm: name of the hash algorithm (HASH_ALGORITHMS)
+        :param exclude_headers: names of the headers left out of the hash (case-insensitive)
+        :param include_headers: the headers are hashed (False: status code and body only)
+        """
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"unknown hash algorithm {algorithm!r} (available: {', '.join(HASH_ALGORITHMS)})")
+        self.algorithm = algorithm
+        self.new_hash = HASH_ALGORITHMS[algorithm]
+        self.exclude_headers = frozenset(name.lower().encode('latin-1') for name in exclude_headers or ())
+        self.include_headers = include_headers
+
+    def start(self, response: httpx.Response):
+        """
+        :param response: response (its body may not be read yet)
+        :return: hash object fed with the status code and headers of the response, the body is fed with update()
+        """
+        hashed = self.new_hash()
+        hashed.update(b'%d\r\n' % response.status_code)
+        if self.include_headers:
+            exclude = self.exclude_headers
+            headers = sorted((name.lower(), value) for name, value in response.headers.raw)
+            hashed.update(b''.join(b'%s:%s\r\n' % (name, value) for name, value in headers if name not in exclude))
+        hashed.update(b'\r\n')
+        return hashed
+
+    def digest(self, response: httpx.Response) -> bytes:
+        hashed = self.start(response)
+        hashed.update(response.content)
+        return hashed.digest()
+
+    def hexdigest(self, response: httpx.Response) -> str:
+        """
+        :param response: response with its body read
+        :return: hex digest of the status code, kept headers and body of the response
+        """
+        hashed = self.start(response)
+        hashed.update(response.content)
+        return hashed.hexdigest()
+
+    def __repr__(self):
+        return f"ResponseHasher({self.algorithm!r}, headers={self.include_headers})"
@@ -0,0 +1,199 @@
+import codecs
+
+import httpx
+
+"""
+NOTES:
+
+- the length metrics (bytes, lines, words, chars) are computed together, they're the ones of the decoded text:
+  lines as split by str.splitlines ('\r', '\r\n', '\x1c'-'\x1e', '\x85', '\u2028' ... end a line too), words as
+  split by str.split (any unicode whitespace)
+- an ASCII chunk (of an ASCII compatible encoding) isn't decoded: its ASCII separators that bytes.split doesn't know
+  are turned into b'\n' / b' ' (one translate), then each metric is a C level scan of the bytes (count / split).
+  A UTF-8 chunk without the first byte of a non-ASCII separator (0xC2, 0xE1-0xE3) is measured the same way, its chars
+  are the bytes that don't continue a character (0x80-0xBF)
+- the other chunks are decoded (incremental decoder, a character can be split over two chunks)
+- metrics can be fed chunk by chunk (update), words and lines split over two chunks (a '\r\n' included) are only
+  counted once
+- the metrics of a response are computed once and cached in response.extensions, every analysis option reuses them
+- a body read with a size cap (Requester max_body_size) gets its metrics from the whole stream while only its first
+  bytes are kept: the length options stay exact, the response is marked as truncated (the options reading the content
+  itself only see the kept bytes)
+"""
+
+# key of the cached metrics in response.extensions
+METRICS_EXTENSION = 'fuzz_metrics'
+
+# set in response.extensions when only the first bytes of the body were kept
+TRUNCATED_EXTENSION = 'fuzz_truncated'
+
+# line breaks of str.splitlines ('\r\n' is a single one)
+LINE_BREAKS = '\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+
+# ASCII line breaks turned into b'\n' and ASCII whitespace bytes.split doesn't split on turned into b' ': the lines
+# of an ASCII chunk are its b'\n' (minus its b'\r\n'), its words are split by bytes.split
+ASCII_SEPARATORS = bytes.maketrans(b'\r\x0b\x0c\x1c\x1d\x1e\x1f', b'\n\n\n\n\n\n ')
+
+ASCII_BYTES = bytes(range(128))
+
+# first byte of the UTF-8 encoding of the non-ASCII whitespace and line breaks ('\x85', '\xa0', '\u1680', '\u2000' -
+# '\u205f', '\u3000'): UTF-8 chunks without any are measured as bytes too
+SEPARATOR_LEAD_BYTES = (0xC2, 0xE1, 0xE2, 0xE3)
+
+# every byte except the UTF-8 continuation bytes, deleted to count the continuation bytes
+NOT_CONTINUATION_BYTES = bytes(byte for byte in range(256) if not 0x80 <= byte < 0xC0)
+
+
+def is_truncated(response: httpx.Response) -> bool:
+    return response.extensions.get(TRUNCATED_EXTENSION, False)
+
+
+def is_utf8(encoding: str | None) -> bool:
+    if not encoding:
+        return True
+    try:
+        return codecs.lookup(encoding).name in ('utf-8', 'ascii')
+    except LookupError:
+        return True
+
+
+def complete_utf8_end(chunk: bytes) -> int:
+    """
+    :param chunk: UTF-8 bytes
+    :return: end of the last complete character of the chunk (its length unless it ends in the middle of a character)
+    """
+    for back in range(1, min(4, len(chunk)) + 1):
+        byte = chunk[-back]
+        if byte < 0x80:
+            break
+        if byte >= 0xC0:
+            # first byte of the character: length of its sequence
+            if back < (2 if byte < 0xE0 else 3 if byte < 0xF0 else 4):
+                return len(chunk) - back
+            break
+    return len(chunk)
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    try:
+        return ASCII_BYTES.decode(encoding) == ASCII_BYTES.decode('ascii')
+    except (LookupError, UnicodeDecodeError):
+        return False
+
+
+class ResponseMetrics:
+    __slots__ = ('bytes', 'lines', 'words', 'chars', 'encoding', '_utf8', '_ascii', '_decoder', '_last_char')
+
+    def __init__(self, encoding: str = 'utf-8'):
+        """
+        :param encoding: encoding of the content (chars are counted in it)
+        """
+        self.bytes = 0
+        self.lines = 0
+        self.words = 0
+        self.chars = 0
+        self.encoding = encoding
+        self._utf8 = is_utf8(encoding)
+        # ASCII chunks can be measured without decoding them
+        self._ascii = self._utf8 or is_ascii_compatible(encoding)
+        self._decoder = self.create_decoder()
+        # last character measured
+        self._last_char = None
+
+    def create_decoder(self):
+        # incremental: a character can be split over two chunks
+        return codecs.getincrementaldecoder('utf-8' if self._utf8 else self.encoding)(errors='replace')
+
+    def update(self, chunk: bytes):
+        """
+        Adds a chunk of content to the metrics
+        :param chunk: next bytes of the content
+        :return:
+        """
+        if not chunk:
+            return
+
+        self.bytes += len(chunk)
+
+        is_ascii = chunk.isascii()
+        # the decoder holds the first bytes of a character split over two chunks: the next chunk is decoded too
+        if self._decoder.getstate()[0] or not (self._ascii if is_ascii else self._utf8 and not any(
+                lead in chunk for lead in SEPARATOR_LEAD_BYTES)):
+            text = self._decoder.decode(chunk)
+            if not text:
+                return
+            # '\r\n' is a single line break, a line doesn't need one if it's the last
+            lines = len(text.splitlines()) - (0 if text[-1] in LINE_BREAKS else 1)
+            words = len(text.split())
+            chars = len(text)
+            first, last = text[0], text[-1]
+        else:
+            if not is_ascii:
+                # a character split over two chunks is decoded with the next one
+                end = complete_utf8_end(chunk)
+                if end < len(chunk):
+                    self._decoder.decode(chunk[end:])
+                    chunk = chunk[:end]
+                    if not chunk:
+                        return
+            separated = chunk.translate(ASCII_SEPARATORS)
+            lines = separated.count(b'\n') - chunk.count(b'\r\n')
+            words = len(separated.split())
+            if is_ascii:
+                chars = len(chunk)
+                first, last = chr(chunk[0]), chr(chunk[-1])
+            else:
+                chars = len(chunk) - len(chunk.translate(None, NOT_CONTINUATION_BYTES))
+                first, last = chunk[:4].decode('utf-8', 'replace')[0], chunk[-4:].decode('utf-8', 'replace')[-1]
+
+        if self._last_char is not None:
+            if self._last_char == '\r' and first == '\n':
+                # '\r\n' split over the two chunks
+                lines -= 1
+            if words and not self._last_char.isspace() and not first.isspace():
+                # word split over the two chunks
+                words -= 1
+        self.lines += lines
+        self.words += words
+        self.chars += chars
+        self._last_char = last
+
+    @property
+    def length_in_lines(self) -> int:
+        # like str.splitlines: the last line doesn't need a line break
+        return self.lines + (1 if self._last_char is not None and self._last_char not in LINE_BREAKS else 0)
+
+    @classmethod
+    def from_content(cls, content: bytes, encoding: str = 'utf-8') -> 'ResponseMetrics':
+        metrics = cls(encoding)
+        metrics.update(content)
+        return metrics
+
+    @classmethod
+    def of_response(cls, response: httpx.Response) -> 'ResponseMetrics':
+        """
+        Metrics of the response body, computed on the first call and cached in the response
+        :param response: read response
+        :return: ResponseMetrics
+        """
+        metrics = response.extensions.get(METRICS_EXTENSION)
+        if metrics is None:
+            metrics = cls.from_content(response.content, response.encoding)
+            response.extensions[METRICS_EXTENSION] = metrics
+        return metrics
+
+    def __getstate__(self):
+        # the incremental decoders of some codecs can't be pickled (results sent by the shard processes)
+        return {slot: getattr(self, slot) for slot in self.__slots__ if slot != '_decoder'}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        self._decoder = self.create_decoder()
+
+    def as_dict(self) -> dict:
+        return {'length-in-bytes': self.bytes, 'length-in-lines': self.length_in_lines,
+                'length-in-words': self.words, 'length-in-chars': self.chars}
+
+    def __repr__(self):
+        return f"<ResponseMetrics {self.as_dict()}>"
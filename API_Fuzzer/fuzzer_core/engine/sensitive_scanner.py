@@ -0,0 +1,98 @@
+import re
+
+"""
+NOTES:
+
+- every pattern is compiled once (when the scanner is created), each one is run over the content with finditer
+- the patterns aren't combined into a single alternation of named groups: sre only uses its fast prefix / first
+  character scan for a pattern on its own, a combined alternation tries every branch at every position and is about
+  twice slower than the separate scans (1 MB of HTML: ~0.5 s against ~0.25 s for the default patterns)
+- patterns are byte patterns, the raw response content is scanned as it is (never decoded), offsets are byte offsets
+- categories can overlap (a 16 digits number is also a credit card number), matches of a category don't
+- repetitions are bounded, so a failed match attempt costs a bounded amount of work whatever the content (the
+  international phone pattern used to backtrack exponentially on long digit runs)
+- max_scan_bytes bounds the worst case cost of a response: only its first bytes are scanned
+"""
+
+DEFAULT_SENSITIVE_PATTERNS = {
+    # Credit Card Numbers
+    "16 digits credit card numbers": r'\b\d{16}\b',
+    "Credit card numbers": r'\b\d{4}[ -]?\d{4}[ -]?\d{4}[ -]?\d{4}\b',
+    "Social Security Numbers": r'\b\d{3}[ -]?\d{2}[ -]?\d{4}\b',
+    # local part and domain limited to their max lengths
+    "Email Addresses": r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,255}\.[A-Za-z]{2,}\b',
+    # country code then groups split by separators, or E.164 digits only
+    "International phone numbers": r'\+(?:\d{1,3}(?:[ .-]\d{1,4}){2,5}|\d{7,15})\b',
+    "Common password patterns": r'\b(?:password|pass|pwd)[A-Za-z0-9._%+-]{0,64}[:=]?[A-Za-z0-9._%+-]{1,128}\b',
+    "API Keys": r'\b(?:api[-_]?key|access[-_]?token)[:=]?[A-Za-z0-9._%+-]{1,256}\b',
+    "Date of birth": r'\b\d{1,2}[ /-]\d{1,2}[ /-]\d{2,4}\b',
+    # "us_phone_number": r'\b\d{3}[ -]?\d{3}[ -]?\d{4}\b',
+    # "PIN codes": r'\b\d{4}\b',
+    # "URLs": r'\bhttps?://[A-Za-z0-9.-]{1,255}\.[A-Za-z]{2,}\b'
+}
+
+# max number of bytes of a response that are scanned
+DEFAULT_MAX_SCAN_BYTES = 1024 * 1024
+
+# max number of offsets kept for each category (they're all counted)
+DEFAULT_MAX_OFFSETS = 100
+
+
+class SensitiveInfoScanner:
+    def __init__(self, patterns: dict = None, extra_patterns: dict = None,
+                 max_scan_bytes: int | None = DEFAULT_MAX_SCAN_BYTES, max_offsets: int = DEFAULT_MAX_OFFSETS):
+        """
+        :param patterns: category name: regex (str or bytes), replaces the default patterns
+        :param extra_patterns: user patterns added after the default ones
+        :param max_scan_bytes: only the first bytes of the content are scanned (None: everything)
+        :param max_offsets: max number of match offsets kept for each category
+        """
+        patterns = dict(DEFAULT_SENSITIVE_PATTERNS if patterns is None else patterns)
+        patterns.update(extra_patterns or {})
+        if not patterns:
+            raise ValueError('at least one sensitive information pattern is needed')
+
+        self.patterns = patterns
+        self.max_scan_bytes = max_scan_bytes
+        self.max_offsets = max_offsets
+
+        self.compiled = {}
+        for category, pattern in patterns.items():
+            try:
+                compiled = re.compile(pattern.encode('utf-8') if isinstance(pattern, str) else pattern)
+            except re.error as e:
+                raise ValueError(f"invalid pattern for {category!r}: {e}") from e
+            if compiled.fullmatch(b''):
+                raise ValueError(f"pattern for {category!r} matches an empty string")
+            self.compiled[category] = compiled
+
+    def scan(self, content: bytes | str) -> dict:
+        """
+        :param content: response content (str is scanned as UTF-8)
+        :return: dict of the categories found: {category: {'count': matches, 'offsets': [(start, end), ...]}}
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8', errors='replace')
+        if self.max_scan_bytes is not None and len(content) > self.max_scan_bytes:
+            content = content[:self.max_scan_bytes]
+
+        found = {}
+        for category, pattern in self.compiled.items():
+            count, offsets = 0, []
+            for match in pattern.finditer(content):
+                count += 1
+                if count <= self.max_offsets:
+                    offsets.append(match.span())
+            if count:
+                found[category] = {'count': count, 'offsets': offsets}
+        return found
+
+    def categories(self, content: bytes | str) -> list:
+        """
+        :param content: response content
+        :return: names of the categories found
+        """
+        return list(self.scan(content))
+
+    def __repr__(self):
+        return f"SensitiveInfoScanner(categories={list(self.patterns)}, max_scan_bytes={self.max_scan_bytes})"
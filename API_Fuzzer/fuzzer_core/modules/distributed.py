@@ -0,0 +1,420 @@
+import argparse
+import asyncio
+import itertools
+import json
+import socket
+import time
+from collections import deque
+
+import httpx
+
+from fuzzer_core.engine.fuzz_result import FuzzResult
+from fuzzer_core.engine.queues.response_queue import ResponseQueue
+from fuzzer_core.engine.response_metrics import ResponseMetrics, is_truncated
+from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
+
+"""
+NOTES:
+
+- the coordinator splits the index range of a fuzz job (over its combination space) in chunks and leases them to the
+  worker nodes that connect to it, each node runs a headless FuzzBaseModule on the ranges it's given
+- protocol: one JSON object per line over a plain TCP connection (no broker)
+    node -> coordinator: hello {worker} / lease / heartbeat {lease} / results {lease, results} / complete {lease,
+                         requests} / failed {lease, error}
+    coordinator -> node: job {module, run_method, run_kwargs} / lease {lease, start, stop, ttl} / wait {delay} / done
+- a lease expires if its node sends nothing for it during ttl seconds (results count as heartbeats), the range of an
+  expired lease, of a failed one or of a node that disconnected is leased again (up to max_attempts times)
+- the results of a lease are only merged once it's complete: a range that's leased again never has duplicates
+- results are sent as summaries (url, method, status, headers, elapsed, length, truncated) with their analysis, responses
+  themselves aren't serializable
+"""
+
+# max size of one message (a batch of results)
+MAX_MESSAGE_SIZE = 2 ** 24
+
+
+def write_message(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message, default=str).encode() + b"\n")
+
+
+async def read_message(reader: asyncio.StreamReader) -> dict | None:
+    """
+    :param reader: stream of the connection
+    :return: next message or None once the connection is closed
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def result_record(response: httpx.Response | None, analysis) -> list:
+    """
+    Serializable summary of a result
+    :param response: response received or its FuzzResult record (None if the request failed)
+    :param analysis: analysis of the response
+    :return: [summary dict or None, analysis]
+    """
+    if response is None:
+        return [None, analysis]
+    if isinstance(response, FuzzResult):
+        return [response.as_dict(), analysis]
+
+    try:
+        elapsed = response.elapsed.total_seconds()
+    except RuntimeError:
+        elapsed = None
+    try:
+        # length of the whole body, even if only its first bytes were kept
+        length = ResponseMetrics.of_response(response).bytes
+    except httpx.ResponseNotRead:
+        # body discarded (streamed responses without keep_body)
+        length = None
+    return [{'url': str(response.request.url),
+             'method': response.request.method,
+             'status_code': response.status_code,
+             'reason_phrase': response.reason_phrase,
+             'http_version': response.http_version,
+             'headers': response.headers.multi_items(),
+             'elapsed': elapsed,
+             'length': length,
+             'truncated': is_truncated(response)}, analysis]
+
+
+class Lease:
+    __slots__ = ('lease_id', 'start', 'stop', 'worker', 'expires_at', 'results')
+
+    def __init__(self, lease_id: int, start: int, stop: int, worker: str, expires_at: float):
+        self.lease_id = lease_id
+        self.start = start
+        self.stop = stop
+        self.worker = worker
+        self.expires_at = expires_at
+        self.results = []
+
+    @property
+    def size(self) -> int:
+        return self.stop - self.start
+
+
+class Coordinator:
+    def __init__(self, module_kwargs: dict, run_method: str, run_kwargs: dict, size: int, start: int = 0,
+                 stop: int = None, chunk_size: int = 500, lease_ttl: float = 30.0, max_attempts: int = 3,
+                 host: str = '127.0.0.1', port: int = 0, clock=time.monotonic):
+        """
+        :param module_kwargs: FuzzBaseModule arguments of the worker nodes (serializable)
+        :param run_method: run method called by the nodes (run_fuzz or run_raw_fuzz)
+        :param run_kwargs: its arguments (serializable), without start / stop
+        :param size: size of the combination space of the job
+        :param start: index of the first combination to send
+        :param stop: index after the last combination to send (None: until the end)
+        :param chunk_size: number of combinations of a lease
+        :param lease_ttl: seconds without news from the node after which its lease is given to another node
+        :param max_attempts: times a range is leased before it's given up
+        :param host: listening address
+        :param port: listening port (0: any free port, see self.port once started)
+        :param clock: monotonic clock in seconds
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk size must be a non zero positive number')
+
+        self.module_kwargs = module_kwargs
+        self.run_method = run_method
+        self.run_kwargs = run_kwargs
+        self.chunk_size = chunk_size
+        self.lease_ttl = lease_ttl
+        self.max_attempts = max_attempts
+        self.host = host
+        self.port = port
+        self.clock = clock
+
+        indexes = range(size)[start:stop]
+        # from the bounds: len() overflows on a range bigger than sys.maxsize (and its chunks are never listed)
+        self.total = max(indexes.stop - indexes.start, 0)
+        # ranges taken back from their nodes, leased again before the next chunks
+        self.ranges = deque()
+        self._next_chunk = indexes.start
+        self._range_stop = max(indexes.stop, indexes.start)
+        self.attempts: dict[int, int] = {}
+        self.leases: dict[int, Lease] = {}
+        self.completed = 0
+        self.retried = 0
+        self.failed: list[tuple] = []
+        self.workers: dict[str, dict] = {}
+        self.response_queue = ResponseQueue()
+
+        self.started_at = None
+        self.finished_at = None
+        self._lease_ids = itertools.count()
+        self._worker_ids = itertools.count()
+        self._writers = set()
+        self._server = None
+        self._expiry = None
+        self._done = asyncio.Event()
+
+    @classmethod
+    def for_fuzz(cls, module: FuzzBaseModule, req_details, iterator, **kwargs):
+        """
+        Coordinator of a run_fuzz job, the nodes create the same module as the given one
+        :param module: FuzzBaseModule (its constructor arguments are sent to the nodes)
+        :param req_details: request contents with fuzz points
+        :param iterator: how fuzzwords are combined
+        :param kwargs: Coordinator arguments
+        :return: Coordinator
+        """
+        return cls(module_kwargs=module.init_kwargs, run_method='run_fuzz',
+                   run_kwargs={'req_details': req_details, 'iterator': iterator},
+                   size=module.fuzz_size(req_details, iterator), **kwargs)
+
+    async def start(self):
+        self.started_at = time.perf_counter()
+        self._server = await asyncio.start_server(self._serve_worker, self.host, self.port, limit=MAX_MESSAGE_SIZE)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._expiry = asyncio.create_task(self._expire_leases())
+        self._check_finished()
+        return self
+
+    async def wait(self):
+        """
+        Waits until every range is complete (or given up), then stops listening and closes the node connections
+        :return:
+        """
+        await self._done.wait()
+        self.response_queue.close()
+        self._expiry.cancel()
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        while self._writers:
+            await asyncio.sleep(0.01)
+
+    async def run(self):
+        await self.start()
+        await self.wait()
+
+    def results(self, response: bool = False, analysis: bool = True):
+        """
+        Merged results of every node, same as FuzzBaseModule.base_fuzz_results (with result summaries as responses)
+        """
+        for record, anal in self.response_queue.dump():
+            yield record if response else None, anal if analysis else None
+
+    def progress(self) -> dict:
+        """
+        :return: dict with the combinations completed / leased / pending / given up, retries, throughput and the
+        stats of each node
+        """
+        elapsed = ((self.finished_at or time.perf_counter()) - self.started_at) if self.started_at else 0.0
+        return {'total': self.total,
+                'completed': self.completed,
+                'leased': sum(lease.size for lease in self.leases.values()),
+                'pending': sum(stop - start for start, stop in self.ranges) + self._range_stop - self._next_chunk,
+                'failed': sum(stop - start for start, stop in self.failed),
+                'retried': self.retried,
+                'elapsed': elapsed,
+                'combinations_per_second': self.completed / elapsed if elapsed else 0.0,
+                'done': self._done.is_set(),
+                'workers': self.workers}
+
+    async def _serve_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        worker = None
+        self._writers.add(writer)
+        try:
+            hello = await read_message(reader)
+            if not hello or hello.get('type') != 'hello':
+                return
+            worker = f"{hello.get('worker') or 'worker'}-{next(self._worker_ids)}"
+            self.workers[worker] = {'connected': True, 'leases': 0, 'requests': 0, 'results': 0}
+            write_message(writer, {'type': 'job', 'module': self.module_kwargs, 'run_method': self.run_method,
+                                   'run_kwargs': self.run_kwargs})
+            await writer.drain()
+
+            while (message := await read_message(reader)) is not None:
+                self._handle(worker, message, writer)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            if worker is not None:
+                self.workers[worker]['connected'] = False
+                # the ranges of a node that's gone are leased again
+                for lease in [lease for lease in self.leases.values() if lease.worker == worker]:
+                    self._release(lease)
+            self._writers.discard(writer)
+            writer.close()
+
+    def _handle(self, worker: str, message: dict, writer: asyncio.StreamWriter):
+        match message.get('type'):
+            case 'lease':
+                if self._has_ranges():
+                    start, stop = self._take_range()
+                    self.attempts[start] = self.attempts.get(start, 0) + 1
+                    lease = Lease(next(self._lease_ids), start, stop, worker, self.clock() + self.lease_ttl)
+                    self.leases[lease.lease_id] = lease
+                    self.workers[worker]['leases'] += 1
+                    write_message(writer, {'type': 'lease', 'lease': lease.lease_id, 'start': start, 'stop': stop,
+                                           'ttl': self.lease_ttl})
+                elif self.leases:
+                    # everything is leased: a range can still come back if its node is lost
+                    write_message(writer, {'type': 'wait', 'delay': min(self.lease_ttl / 4, 1.0)})
+                else:
+                    write_message(writer, {'type': 'done'})
+                return
+
+        # messages about a lease are ignored once it's expired (its range belongs to another node)
+        lease = self.leases.get(message.get('lease'))
+        if lease is None or lease.worker != worker:
+            return
+        lease.expires_at = self.clock() + self.lease_ttl
+
+        match message.get('type'):
+            case 'results':
+                lease.results.extend(tuple(result) for result in message['results'])
+            case 'complete':
+                del self.leases[lease.lease_id]
+                self.response_queue.put_batch(lease.results)
+                self.completed += lease.size
+                self.workers[worker]['requests'] += message.get('requests', 0)
+                self.workers[worker]['results'] += len(lease.results)
+                self._check_finished()
+            case 'failed':
+                self.workers[worker]['error'] = message.get('error')
+                self._release(lease)
+
+    def _has_ranges(self) -> bool:
+        return bool(self.ranges) or self._next_chunk < self._range_stop
+
+    def _take_range(self) -> tuple:
+        """
+        :return: next range to lease, a range taken back first
+        """
+        if self.ranges:
+            return self.ranges.popleft()
+        start = self._next_chunk
+        self._next_chunk = min(start + self.chunk_size, self._range_stop)
+        return start, self._next_chunk
+
+    def _release(self, lease: Lease):
+        """
+        Takes a lease back, its range is leased again unless it was already tried max_attempts times
+        :param lease: expired, failed or lost lease
+        :return:
+        """
+        del self.leases[lease.lease_id]
+        if self.attempts[lease.start] >= self.max_attempts:
+            self.failed.append((lease.start, lease.stop))
+        else:
+            self.retried += 1
+            self.ranges.appendleft((lease.start, lease.stop))
+        self._check_finished()
+
+    async def _expire_leases(self):
+        while True:
+            await asyncio.sleep(self.lease_ttl / 4)
+            now = self.clock()
+            for lease in [lease for lease in self.leases.values() if lease.expires_at <= now]:
+                self._release(lease)
+
+    def _check_finished(self):
+        if not self._has_ranges() and not self.leases and not self._done.is_set():
+            self.finished_at = time.perf_counter()
+            self._done.set()
+
+
+class WorkerNode:
+    def __init__(self, host: str, port: int, name: str = None, batch_size: int = 100):
+        """
+        :param host: coordinator address
+        :param port: coordinator port
+        :param name: name of the node in the progress view (default: hostname)
+        :param batch_size: max number of results sent at once
+        """
+        self.host = host
+        self.port = port
+        self.name = name or socket.gethostname()
+        self.batch_size = batch_size
+        self.leases = 0
+
+    async def run(self):
+        """
+        Connects to the coordinator and runs the ranges it leases until the job is done
+        :return:
+        """
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=MAX_MESSAGE_SIZE)
+        try:
+            write_message(writer, {'type': 'hello', 'worker': self.name})
+            await writer.drain()
+            job = await read_message(reader)
+            if job is None:
+                return
+            module = FuzzBaseModule(**job['module'])
+
+            while True:
+                write_message(writer, {'type': 'lease'})
+                await writer.drain()
+                message = await read_message(reader)
+                if message is None or message['type'] == 'done':
+                    break
+                if message['type'] == 'wait':
+                    await asyncio.sleep(message['delay'])
+                    continue
+                await self.run_lease(module, job, message, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # coordinator gone: its leases are lost anyway
+            pass
+        finally:
+            writer.close()
+
+    async def run_lease(self, module: FuzzBaseModule, job: dict, lease: dict, writer: asyncio.StreamWriter):
+        lease_id = lease['lease']
+        run = getattr(module, job['run_method'])(**job['run_kwargs'], start=lease['start'], stop=lease['stop'])
+
+        def requests_sent() -> int:
+            # the raw requester is only created by the first raw run
+            client = module.raw_requester_client if job['run_method'] == 'run_raw_fuzz' else module.requester_client
+            return client.pool_stats.requests if client is not None else 0
+
+        sent_before = requests_sent()
+
+        async def send(batch):
+            # drained before the next batch: results never pile up in the write buffer of a slow connection
+            write_message(writer, {'type': 'results', 'lease': lease_id,
+                                   'results': [result_record(resp, analysis) for resp, analysis in batch]})
+            await writer.drain()
+
+        heartbeat = asyncio.create_task(self._heartbeat(writer, lease_id, lease['ttl'] / 3))
+        try:
+            await module.stream_results(run, send, self.batch_size)
+        except Exception as e:
+            write_message(writer, {'type': 'failed', 'lease': lease_id, 'error': repr(e)})
+            await writer.drain()
+            return
+        finally:
+            heartbeat.cancel()
+
+        self.leases += 1
+        write_message(writer, {'type': 'complete', 'lease': lease_id, 'requests': requests_sent() - sent_before})
+        await writer.drain()
+
+    @staticmethod
+    async def _heartbeat(writer: asyncio.StreamWriter, lease_id: int, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            write_message(writer, {'type': 'heartbeat', 'lease': lease_id})
+            await writer.drain()
+
+
+def run_worker_node(host: str, port: int, name: str = None):
+    """
+    Process entry point of a worker node
+    """
+    asyncio.run(WorkerNode(host, port, name).run())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='API fuzzer worker node: runs the ranges leased by a coordinator')
+    parser.add_argument('host', help='coordinator address')
+    parser.add_argument('port', type=int, help='coordinator port')
+    parser.add_argument('--name', default=None, help='name of the node in the progress view')
+    args = parser.parse_args()
+    run_worker_node(args.host, args.port, args.name)
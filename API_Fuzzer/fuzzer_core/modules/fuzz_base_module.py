@@ -1,17 +1,42 @@
-import ast
 import asyncio
-import re
-from typing import Callable
-
+import functools
+import inspect
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import time
+from typing import Awaitable, Callable, Iterable
+
+import httpx
+
+from fuzzer_core.engine.baseline import BaselineProfile, calibration_tuples, DEFAULT_CALIBRATION_REQUESTS, \
+    DEFAULT_Z_THRESHOLD
+from fuzzer_core.engine.fuzz_template import FuzzTemplate
 from fuzzer_core.engine.fuzzworker import FuzzWorker
-from fuzzer_core.engine.queues.request_queue import RequestQueue
+from fuzzer_core.engine.origin_scheduler import OriginScheduler
+from fuzzer_core.engine.queues.request_queue import RequestQueue, NoMoreItems
 from fuzzer_core.engine.queues.response_queue import ResponseQueue
-from fuzzer_core.engine.ratelimiter import RateLimiter
+from fuzzer_core.engine.queues.result_store import ResultStore
+from fuzzer_core.engine.ratelimiter import RateLimiter, AdaptiveRateLimiter, SharedRateLimiter
 from fuzzer_core.engine.request_builder import RequestBuilder
-from fuzzer_core.engine.requester.requester import Requester
-from fuzzer_core.engine.response_analyser import ResponseAnalyser
+from fuzzer_core.engine.requester.raw_requester import RawRequester, RawTemplate
+from fuzzer_core.engine.requester.requester import Requester, pool_limits_from_config
+from fuzzer_core.engine.response_analyser import ResponseAnalyser, AnalysisOptions
+from fuzzer_core.engine.response_clusters import ClusterIndex, DEFAULT_MAX_DISTANCE
+from fuzzer_core.engine.response_hasher import ResponseHasher, DEFAULT_HASH_ALGORITHM, VOLATILE_HEADERS
+from fuzzer_core.engine.sensitive_scanner import DEFAULT_MAX_SCAN_BYTES
+from utils.combination_space import CombinationSpace, sequence_size
 from utils.wordlist_wrapper import Wordlist
 
+# stats of each run (pool, rate limiter, origins, processes, baseline) are logged at debug level, the stats methods of
+# the module give them to the callers
+logger = logging.getLogger(__name__)
+
+
+# control message sent by a shard process once it's done (shard results are sent as lists)
+SHARD_DONE = '__shard_done__'
 
 # TODO: make sure you can pause fuzzing and stop it
 
@@ -27,6 +52,11 @@ class FuzzBaseModule:
                  rate_limiting: dict = None, common_fields: dict = None, config: dict = None, proxy: str = None,
                  http_version: dict = {'v1': True, 'v2': False}):
 
+        # kept to create the same module in the processes of a multi-process run
+        self.init_kwargs = {'num_workers': num_workers, 'response_analysis': response_analysis,
+                            'wordlists': wordlists, 'rate_limiting': rate_limiting, 'common_fields': common_fields,
+                            'config': config, 'proxy': proxy, 'http_version': http_version}
+
         self.rate_limiter = None
         self.num_workers = num_workers
 
@@ -40,17 +70,64 @@ class FuzzBaseModule:
         #        self.wordlists.append(Wordlist(wordlist))
 
         # initialize  request / response queues
-        self.request_queue = RequestQueue(request_builder=RequestBuilder(common_fields=common_fields, config=config))
-        self.response_queue = ResponseQueue()
+        # the request queue is bounded: the producer only builds requests as fast as the workers consume them
+        engine_conf = (config or {}).get('fuzz_engine', {}) or {}
+        self.request_queue = RequestQueue(request_builder=RequestBuilder(common_fields=common_fields, config=config),
+                                          maxsize=engine_conf.get('queue_size', 1000))
+        # hashes the responses for the response-hash analysis and the body_hash of the result records
+        hash_options = response_analysis or {}
+        self.response_hasher = ResponseHasher(algorithm=hash_options.get('hash_algorithm', DEFAULT_HASH_ALGORITHM),
+                                              exclude_headers=hash_options.get('hash_exclude_headers',
+                                                                               VOLATILE_HEADERS),
+                                              include_headers=hash_options.get('hash_headers', True))
+        # results written to an on-disk store instead of being kept in memory (if a store file is configured)
+        self.result_store = None
+        if engine_conf.get('result_store'):
+            self.result_store = ResultStore(engine_conf['result_store'],
+                                            batch_size=engine_conf.get('store_batch_size', 500),
+                                            keep_bodies=engine_conf.get('store_bodies', False),
+                                            hasher=self.response_hasher)
+        self.response_queue = ResponseQueue(store=self.result_store)
 
         # initialize ratelimiter
         self.rate_limit = rate_limiting.get('rate_limit', None) if rate_limiting else None
         self.concurrency_limit = rate_limiting.get('concurrency_limit', None) if rate_limiting else None
+        self.burst = rate_limiting.get('burst', None) if rate_limiting else None
+        # adaptive: the rate of each host follows its 429/503 responses, throttled requests are sent again
+        self.adaptive_rate = rate_limiting.get('adaptive', False) if rate_limiting else False
+        self.adaptive_options = {key: rate_limiting[key] for key in ('min_rate', 'max_rate')
+                                 if rate_limiting and rate_limiting.get(key) is not None}
+        self.max_retries = rate_limiting.get('max_retries', 3) if rate_limiting else 3
+        # the response queue keeps compact FuzzResult records instead of the responses
+        # (the store keeps bodies from the responses themselves)
+        self.result_records = engine_conf.get('result_records', False) and not engine_conf.get('store_bodies', False)
         # if rate_limit and concurrency_limit:
         #    self.rate_limiter = RateLimiter(rate_limit=rate_limit, concurrency_limit=concurrency_limit)
 
-        # create requester Client
-        self.requester_client = Requester(proxy=proxy, http1=http_version['v1'], http2=http_version['v2'])
+        # create requester Client (its keep-alive connection pool is shared by all the workers)
+        limits = pool_limits_from_config(config)
+        keep_alive = engine_conf.get('keep_alive', True)
+        self.requester_factory = functools.partial(Requester, proxy=proxy, http1=http_version['v1'],
+                                                   http2=http_version['v2'], limits=limits, keep_alive=keep_alive,
+                                                   stream_responses=engine_conf.get('stream_responses', False),
+                                                   keep_body=engine_conf.get('keep_body', True),
+                                                   max_body_size=engine_conf.get('max_body_size', None))
+        # a per origin run gives each origin its own requester: the shared one is never created
+        self.requester_client = None if engine_conf.get('per_origin', False) else self.requester_factory()
+        # raw mode client: created on the first raw run
+        self.raw_requester_factory = functools.partial(RawRequester, max_connections=limits.max_connections or 100,
+                                                       keep_alive=keep_alive, proxy=proxy)
+        self.raw_requester_client = None
+
+        # per origin scheduling: each origin gets its own requester, rate limiter and worker slots
+        self.per_origin = engine_conf.get('per_origin', False)
+        self.workers_per_origin = engine_conf.get('workers_per_origin', None) or num_workers
+        self.origin_queue_size = engine_conf.get('queue_size', 1000)
+        self.origin_scheduler = None
+
+        # multi-process runs: theoretical arrival time shared by the processes (set in the shard processes only)
+        self.shared_tat = None
+        self.shard_stats = {}
 
         # create response analyser
         self.response_analyser = None
@@ -58,40 +135,363 @@ class FuzzBaseModule:
             matching_requirements = response_analysis.get('matching_requirements', None)
             analysis_parameters = response_analysis.get('analysis_parameters', None)
             if matching_requirements or analysis_parameters:
-                self.response_analyser = ResponseAnalyser(match_hide=matching_requirements,
-                                                          analysis=analysis_parameters)
+                self.response_analyser = ResponseAnalyser(
+                    match_hide=matching_requirements, analysis=analysis_parameters,
+                    sensitive_patterns=response_analysis.get('sensitive_patterns', None),
+                    max_scan_bytes=response_analysis.get('sensitive_scan_limit', DEFAULT_MAX_SCAN_BYTES),
+                    hasher=self.response_hasher,
+                    clusters=ClusterIndex(max_distance=response_analysis.get('cluster_distance',
+                                                                             DEFAULT_MAX_DISTANCE)))
+        # calibration: a baseline of the target's answers to noise is made before each run, only the responses
+        # deviating from it are kept
+        self.calibrate = engine_conf.get('calibrate', False)
+        self.calibration_requests = engine_conf.get('calibration_requests', DEFAULT_CALIBRATION_REQUESTS)
+        self.anomaly_z_threshold = engine_conf.get('anomaly_z_threshold', DEFAULT_Z_THRESHOLD)
+        if self.calibrate and self.response_analyser is None:
+            self.response_analyser = ResponseAnalyser(match_hide=None,
+                                                      analysis=[AnalysisOptions.RESP_ANOMALY.value])
         print(self.response_analyser)
         self.is_paused = None
 
     def toggle_is_paused(self):
         self.is_paused = not self.is_paused
 
-    async def run_workers(self, plugin_func: Callable = None):
+    async def run_workers(self, plugin_func: Callable = None, requester_client=None):
+        requester_client = requester_client or self.requester_client
         fuzz_worker = FuzzWorker(request_queue=self.request_queue, response_queue=self.response_queue,
-                                 requester_client=self.requester_client, rate_limiter=self.rate_limiter,
-                                 response_analyser=self.response_analyser, plugin_func=plugin_func)
+                                 requester_client=requester_client, rate_limiter=self.rate_limiter,
+                                 response_analyser=self.response_analyser, plugin_func=plugin_func,
+                                 max_retries=self.max_retries, result_records=self.result_records)
+        self.response_queue.loading_start()
         tasks = [fuzz_worker.work() for _ in range(self.num_workers)]
-        await asyncio.gather(*tasks)
-        #await fuzz_worker.work()
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # every worker is done: lets the consumers of the response queue stop
+            self.response_queue.close()
+        logger.debug("connection pool: %s", requester_client.pool_stats)
+        if self.rate_limiter is not None:
+            logger.debug("rate limiter: %s", self.rate_stats())
+
+    def pool_stats(self) -> dict:
+        """
+        Connection reuse stats of the shared requester pool (to confirm handshakes are being amortised)
+        :return: dict or None if the run is scheduled per origin (see origin_stats)
+        """
+        if self.requester_client is None:
+            return None
+        return self.requester_client.pool_stats.as_dict()
+
+    def rate_stats(self) -> dict | None:
+        """
+        Live state of the rate limiter: current rate of each host, acquisitions, throttled and requeued requests
+        :return: dict or None if there's no rate limiting
+        """
+        if self.rate_limiter is None:
+            return None
+        return {**self.rate_limiter.as_dict(), 'requeued': self.request_queue.requeued}
+
+    def origin_stats(self) -> dict | None:
+        """
+        Stats of each origin of a per origin run: requests sent and pending, throughput, pool and rate limiter
+        :return: dict or None if the run isn't scheduled per origin
+        """
+        if self.origin_scheduler is None:
+            return None
+        return self.origin_scheduler.stats()
+
+    def match_stats(self) -> dict | None:
+        """
+        Counters of the match / hide rules: responses evaluated, matched and filtered out by each rule
+        :return: dict or None if there's no response analyser
+        """
+        if self.response_analyser is None:
+            return None
+        return self.response_analyser.rule_stats()
 
-    async def populate_req_queue(self, req_list: list[dict]):
-        await self.request_queue.populate(req_list)
+    def cluster_summary(self) -> list[dict]:
+        """
+        Clusters of near duplicate responses (response-cluster option): representative and count of each cluster
+        :return: list of dicts, the biggest cluster first (empty if the responses weren't clustered)
+        """
+        if self.response_analyser is None:
+            return []
+        return self.response_analyser.clusters.summary()
+
+    def process_stats(self) -> dict:
+        """
+        Stats of each shard of a multi-process run: index range, requests, time spent, pool and rate limiter stats
+        :return: dict (shard index: stats), a shard that failed has its error instead
+        """
+        return self.shard_stats
+
+    def create_rate_limiter(self) -> RateLimiter | None:
+        if self.rate_limit is None:
+            return None
+        if self.shared_tat is not None and not self.adaptive_rate:
+            return SharedRateLimiter(rate_limit=self.rate_limit, shared_tat=self.shared_tat,
+                                     concurrency_limit=self.concurrency_limit or None, burst=self.burst or 1)
+        if self.adaptive_rate:
+            return AdaptiveRateLimiter(rate_limit=self.rate_limit, concurrency_limit=self.concurrency_limit or None,
+                                       burst=self.burst or 1, **self.adaptive_options)
+        return RateLimiter(rate_limit=self.rate_limit, concurrency_limit=self.concurrency_limit or None,
+                           burst=self.burst or 1)
+
+    async def run_origin_workers(self, plugin_func: Callable = None):
+        self.origin_scheduler = OriginScheduler(request_queue=self.request_queue, response_queue=self.response_queue,
+                                                requester_factory=self.requester_factory,
+                                                rate_limiter_factory=self.create_rate_limiter,
+                                                workers_per_origin=self.workers_per_origin,
+                                                queue_size=self.origin_queue_size,
+                                                response_analyser=self.response_analyser, plugin_func=plugin_func,
+                                                max_retries=self.max_retries, result_records=self.result_records)
+        await self.origin_scheduler.run()
+        logger.debug("origins: %s", self.origin_stats())
+
+    async def populate_req_queue(self, req_list: Iterable[dict] | Iterable[tuple], built: bool = False,
+                                 first_index: int = None):
+        await self.request_queue.populate(req_list, built=built, first_index=first_index)
         print("Request queue populated.")
 
-    async def run_fuzz(self, req_details, iterator):
+    def fuzz_size(self, req_details, iterator) -> int:
+        """
+        Number of requests of a fuzz run (to split it with the start / stop indexes of run_fuzz)
+        :param req_details: request contents with fuzz points
+        :param iterator: how fuzzwords are combined
+        :return: int
+        """
+        return create_fuzz_space(input_param=req_details, wordlists_dict=self.wordlists, iterator=iterator).size
+
+    async def run_fuzz(self, req_details, iterator, start: int = 0, stop: int = None):
+        """
+        :param req_details: request contents with fuzz points
+        :param iterator: how fuzzwords are combined
+        :param start: index of the first combination to send (to resume a run or run a shard of it)
+        :param stop: index after the last combination to send (None: until the end)
+        :return:
+        """
         self.is_paused = False
-        if self.rate_limit is not None:
-            self.rate_limiter = RateLimiter(rate_limit=self.rate_limit, concurrency_limit=self.concurrency_limit or None)
-        loaded_contents = load_fuzzwords(input_param=req_details,
-                                         wordlists_dict=self.wordlists,
-                                         iterator=iterator)
+        # a per origin run creates a rate limiter for each origin instead
+        self.rate_limiter = None if self.per_origin else self.create_rate_limiter()
+        if self.calibrate:
+            await self.calibrate_baseline(req_details, iterator)
+        # requests are generated lazily, the whole fuzz product is never held in memory
+        loaded_contents = load_fuzzwords_yields(input_param=req_details,
+                                                wordlists_dict=self.wordlists,
+                                                iterator=iterator, start=start, stop=stop)
+
+        # The producer runs alongside the workers and suspends whenever the request queue is full
+        run_workers = self.run_origin_workers() if self.per_origin else self.run_workers()
+        await asyncio.gather(self.populate_req_queue(req_list=loaded_contents, first_index=start), run_workers)
+
+    async def calibrate_baseline(self, req_details, iterator) -> BaselineProfile | None:
+        """
+        Sends noise in each fuzz point of the request and makes the baseline profile of the responses, the response
+        analyser then only keeps the responses deviating from it
+        :param req_details: request contents with fuzz points
+        :param iterator: how fuzzwords are combined
+        :return: BaselineProfile (None if the fuzz space is empty)
+        """
+        template, fuzz_tuples = compile_fuzz_template(req_details, self.wordlists, iterator)
+        # the size of a combination space can be above sys.maxsize (len() would overflow)
+        if not sequence_size(fuzz_tuples):
+            return None
+        builder = self.request_queue.request_builder
+        # per origin runs have no shared requester: the calibration gets its own
+        requester_client = self.requester_client or self.requester_factory()
+
+        async def send(words):
+            request, auth = builder.build_request(req_dict=template.render(words))
+            if self.rate_limiter is None:
+                return await requester_client.send_request(request, auth)
+            async with self.rate_limiter.throttle(host=request.url.host):
+                return await requester_client.send_request(request, auth)
+
+        profile = BaselineProfile(z_threshold=self.anomaly_z_threshold)
+        try:
+            for response in await asyncio.gather(*(send(words) for words in
+                                                   calibration_tuples(fuzz_tuples[0], self.calibration_requests))):
+                profile.add(response)
+        finally:
+            if requester_client is not self.requester_client:
+                await requester_client.aclose()
+        self.response_analyser.baseline = profile
+        logger.debug("baseline: %s", profile)
+        return profile
+
+    async def run_raw_fuzz(self, raw_request: str | bytes, target: str, iterator, start: int = 0, stop: int = None,
+                           crlf: bool = True, update_content_length: bool = True):
+        """
+        Raw mode: the raw request is compiled once into byte chunks, each fuzz tuple is injected at its byte offsets and
+        the bytes are written as they are to pooled sockets (no httpx request is built, malformed requests are kept)
+        :param raw_request: raw HTTP request with fuzz points
+        :param target: origin the requests are sent to (scheme://host[:port])
+        :param iterator: how fuzzwords are combined
+        :param start: index of the first combination to send
+        :param stop: index after the last combination to send (None: until the end)
+        :param crlf: turn the bare LF line endings of the request line and headers into CRLF
+        :param update_content_length: recompute Content-Length when the body has fuzz points
+        :return:
+        """
+        self.is_paused = False
+        template = RawTemplate(raw_request, target, crlf=crlf, update_content_length=update_content_length)
+        if not check_fuzz_point_matches(template.matches, len(self.wordlists)):
+            raise BadInputException
 
-        await self.populate_req_queue(req_list=loaded_contents)
+        raw_input = raw_request if isinstance(raw_request, str) else raw_request.decode('latin-1')
+        tuples_list = create_fuzz_tuples(iterator=iterator,
+                                         wordlists_list=extract_ordered_wordlists_list(input_str=raw_input,
+                                                                                       wordlists_dict=self.wordlists))
+        if start or stop is not None:
+            tuples_list = tuples_list[start:stop]
+
+        if self.raw_requester_client is None:
+            self.raw_requester_client = self.raw_requester_factory()
+
+        # raw requests all go to the same origin
+        self.rate_limiter = self.create_rate_limiter()
+
+        await asyncio.gather(self.populate_req_queue(req_list=template.render_all(tuples_list), built=True,
+                                                     first_index=start),
+                             self.run_workers(requester_client=self.raw_requester_client))
+
+    async def run_fuzz_processes(self, req_details, iterator, processes: int = None, start: int = 0, stop: int = None):
+        """
+        Multi-process run: the combination space is split in contiguous shards, each one is sent by its own process
+        (event loop, requester and analyser), the results of every process are merged in the response queue
+        :param req_details: request contents with fuzz points
+        :param iterator: how fuzzwords are combined
+        :param processes: number of processes (None: number of CPUs)
+        :param start: index of the first combination to send
+        :param stop: index after the last combination to send (None: until the end)
+        :return:
+        """
+        size = self.fuzz_size(req_details, iterator)
+        await self.run_shards('run_fuzz', {'req_details': req_details, 'iterator': iterator}, size,
+                              processes, start, stop)
+
+    async def run_raw_fuzz_processes(self, raw_request: str | bytes, target: str, iterator, processes: int = None,
+                                     start: int = 0, stop: int = None, crlf: bool = True,
+                                     update_content_length: bool = True):
+        """
+        Multi-process raw mode run (see run_raw_fuzz and run_fuzz_processes)
+        """
+        raw_input = raw_request if isinstance(raw_request, str) else raw_request.decode('latin-1')
+        size = self.fuzz_size(raw_input, iterator)
+        await self.run_shards('run_raw_fuzz', {'raw_request': raw_request, 'target': target, 'iterator': iterator,
+                                               'crlf': crlf, 'update_content_length': update_content_length},
+                              size, processes, start, stop)
+
+    async def run_shards(self, run_method: str, run_kwargs: dict, size: int, processes: int = None, start: int = 0,
+                         stop: int = None, batch_size: int = 100):
+        """
+        Starts one process per shard of the [start, stop) range and puts the results they send in the response queue
+        - the processes reserve their send slots from a shared rate limiter, the rate limit is global
+        - the concurrency limit is split between the processes
+        - adaptive rate limiting can't be shared: each process adapts its own buckets, starting from its part of the rate
+        :param run_method: name of the run method called in each process (run_fuzz or run_raw_fuzz)
+        :param run_kwargs: its arguments (picklable), without start / stop
+        :param size: size of the combination space
+        :param processes: number of processes (None: number of CPUs)
+        :param start: index of the first combination to send
+        :param stop: index after the last combination to send (None: until the end)
+        :param batch_size: max number of results sent at once by a process
+        :return:
+        """
+        bounds = shard_bounds(size, processes or os.cpu_count() or 1, start, stop)
+        processes = len(bounds)
+
+        shard_kwargs = dict(self.init_kwargs)
+        if self.init_kwargs['rate_limiting']:
+            rate_limiting = dict(self.init_kwargs['rate_limiting'])
+            if rate_limiting.get('concurrency_limit'):
+                rate_limiting['concurrency_limit'] = math.ceil(rate_limiting['concurrency_limit'] / processes)
+            if self.adaptive_rate and self.rate_limit:
+                rate_limiting['rate_limit'] = self.rate_limit / processes
+                # the min rate (1 rps by default) can't be above the part of a process
+                rate_limiting['min_rate'] = min(rate_limiting.get('min_rate') or 1.0, rate_limiting['rate_limit'])
+            shard_kwargs['rate_limiting'] = rate_limiting
+
+        # spawn: the processes never inherit the state of the running event loop
+        context = multiprocessing.get_context('spawn')
+        result_queue = context.Queue()
+        shared_tat = SharedRateLimiter.create_shared_tat(context)
+        workers = {shard: context.Process(target=run_fuzz_shard, daemon=True,
+                                          args=(shard, shard_kwargs, run_method,
+                                                {**run_kwargs, 'start': shard_start, 'stop': shard_stop},
+                                                result_queue, shared_tat, batch_size))
+                   for shard, (shard_start, shard_stop) in enumerate(bounds)}
 
-        print("QSIZE run_fuzz: ", str(self.request_queue.qsize()))
-        # Wait for all tasks to complete
-        # await asyncio.gather(self.populate_req_queue(req_list=loaded_contents),self.run_workers())
-        await self.run_workers()
+        self.is_paused = False
+        self.shard_stats = {}
+        self.response_queue.loading_start()
+        try:
+            for process in workers.values():
+                process.start()
+
+            pending = set(workers)
+            while pending:
+                try:
+                    message = await asyncio.to_thread(result_queue.get, True, 0.5)
+                except queue.Empty:
+                    for shard in [shard for shard in pending if not workers[shard].is_alive()]:
+                        # killed before it could report
+                        pending.discard(shard)
+                        self.shard_stats[shard] = {'start': bounds[shard][0], 'stop': bounds[shard][1],
+                                                   'error': f"process exited with code {workers[shard].exitcode}"}
+                    continue
+
+                if isinstance(message, list):
+                    self.response_queue.put_batch(message)
+                    continue
+                _, shard, stats = message
+                pending.discard(shard)
+                self.shard_stats[shard] = {'start': bounds[shard][0], 'stop': bounds[shard][1], **stats}
+        finally:
+            self.response_queue.close()
+            for process in workers.values():
+                if process.is_alive():
+                    process.terminate()
+                await asyncio.to_thread(process.join)
+        logger.debug("processes: %s", self.process_stats())
+
+    async def stream_results(self, run, send: Callable[[list], None | Awaitable], batch_size: int = 100):
+        """
+        Runs a fuzz run and sends its results as they come, out of the process (shard process or worker node side)
+        :param run: coroutine of the run
+        :param send: called with each batch of (response, analysis) tuples (multiprocessing queue put, socket write),
+            awaited if it's a coroutine function (the next batch waits until the socket is drained)
+        :param batch_size: max number of results sent at once
+        :return:
+        """
+        # a module can stream several runs: the end marker of the previous one must not stop this one
+        self.response_queue.loading_start()
+        # the results are sent away: they're never written to this module's store
+        self.response_queue.store = None
+
+        async def sent(batch):
+            if inspect.isawaitable(result := send(batch)):
+                await result
+
+        async def forward():
+            batch = []
+            while True:
+                try:
+                    resp, analysis = await self.response_queue.get()
+                except NoMoreItems:
+                    break
+                if isinstance(resp, httpx.Response) and resp._request is not None:
+                    # the pool stats callback stays in this process
+                    resp.request.extensions.pop('trace', None)
+                batch.append((resp, analysis))
+                # batches only build up when results come faster than they're sent
+                if len(batch) >= batch_size or self.response_queue.empty():
+                    await sent(batch)
+                    batch = []
+            if batch:
+                await sent(batch)
+
+        await asyncio.gather(run, forward())
 
     def base_fuzz_results(self, response: bool = False, analysis: bool = True):
         for resp, anal in self.response_queue.dump():
@@ -121,6 +521,64 @@ class FuzzBaseModule:
     '''
 
 
+def shard_bounds(size: int, processes: int, start: int = 0, stop: int = None) -> list[tuple]:
+    """
+    Splits the [start, stop) range of a combination space in contiguous shards of (almost) the same size
+    :param size: size of the combination space (can be above sys.maxsize)
+    :param processes: max number of shards
+    :param start: index of the first combination
+    :param stop: index after the last combination (None: until the end)
+    :return: list of (start, stop) tuples, at least one (empty if the range is)
+    """
+    indexes = range(size)[start:stop]
+    # from the bounds: len() overflows on a range bigger than sys.maxsize
+    count = max(indexes.stop - indexes.start, 0)
+    processes = max(min(processes, count), 1)
+    base, extra = divmod(count, processes)
+    bounds, shard_start = [], indexes.start
+    for shard in range(processes):
+        shard_stop = shard_start + base + (1 if shard < extra else 0)
+        bounds.append((shard_start, shard_stop))
+        shard_start = shard_stop
+    return bounds
+
+
+def run_fuzz_shard(shard: int, module_kwargs: dict, run_method: str, run_kwargs: dict, result_queue, shared_tat,
+                   batch_size: int = 100):
+    """
+    Entry point of a shard process of a multi-process run: creates the module, runs its shard and sends its results
+    :param shard: index of the shard
+    :param module_kwargs: FuzzBaseModule arguments
+    :param run_method: name of the run method (run_fuzz or run_raw_fuzz)
+    :param run_kwargs: arguments of the run method, start / stop included
+    :param result_queue: multiprocessing queue of the parent process
+    :param shared_tat: theoretical arrival time of the shared rate limiter
+    :param batch_size: max number of results sent at once
+    :return:
+    """
+    stats = {}
+    started_at = time.perf_counter()
+    try:
+        module = FuzzBaseModule(**module_kwargs)
+        module.shared_tat = shared_tat
+        asyncio.run(module.stream_results(getattr(module, run_method)(**run_kwargs), result_queue.put, batch_size))
+
+        requester_client = module.raw_requester_client if run_method == 'run_raw_fuzz' else module.requester_client
+        if requester_client is None:
+            # per origin shard: one pool per origin
+            origins = module.origin_stats() or {}
+            stats = {'requests': sum(origin['requests'] for origin in origins.values()), 'origins': origins,
+                     'rate_limiter': None}
+        else:
+            stats = {'requests': requester_client.pool_stats.requests, 'pool': requester_client.pool_stats.as_dict(),
+                     'rate_limiter': module.rate_stats()}
+    except Exception as e:
+        stats = {'error': repr(e)}
+    finally:
+        stats['elapsed'] = time.perf_counter() - started_at
+        result_queue.put((SHARD_DONE, shard, stats))
+
+
 #######################################
 class BadInputException(Exception):
     def __init__(self):
@@ -141,12 +599,12 @@ def check_fuzz_point_matches(matches, dict_len):
     return True
 
 
-def create_fuzz_tuples(wordlists_list: list[list | tuple], iterator=None) -> list:
+def create_fuzz_tuples(wordlists_list: list[list | tuple], iterator=None) -> CombinationSpace:
     """
-    Creates a list of tuples from a list of lists/tuples based on the passed iterator
+    Creates the lazy space of tuples from a list of lists/tuples based on the passed iterator
     :param iterator: str for how to combine fuzzwords for each iteration
     :param wordlists_list: list of lists or tuples
-    :return: list
+    :return: CombinationSpace (len, index access and slicing, nothing is materialised)
     """
     match iterator:
         case 'zip':
@@ -177,97 +635,81 @@ def extract_ordered_wordlists_list(input_str, wordlists_dict):
     return list(ordered_dict.values())
 
 
-def load_fuzzwords(input_param: str | dict, wordlists_dict: dict, iterator: str = None,
-                   fuzz_tuples: list[tuple] = None) -> list:
+def create_fuzz_space(input_param: str | dict, wordlists_dict: dict, iterator: str = None) -> CombinationSpace:
     """
-    Loads fuzzwords from wordlists into the request raw string or dictionary of values
-    with defined iteration of wordlist items
+    Lazy space of the fuzzwords combinations loaded into the request raw string or dictionary of values
     :param input_param: request content raw string or dict
     :param wordlists_dict: dict of fuzzpoint value (key) and tuple of wordlist items (value)
     :param iterator: string indicating how to combine fuzzwords for each iteration
-    :param fuzz_tuples: either provide fuzz tuples or will be created
-    :return: list of input string or dict loaded with fuzzwords
+    :return: CombinationSpace
     """
+    return compile_fuzz_template(input_param, wordlists_dict, iterator)[1]
 
-    # Define the regex pattern for the new format: $word$
-    fuzz_pattern = r'\$\w+\$'
 
-    input_var = str(input_param) if isinstance(input_param, dict) else input_param
-
-    # Find all matches in the input string
-    matches = re.findall(fuzz_pattern, input_var)
+def compile_fuzz_template(input_param: str | dict, wordlists_dict: dict, iterator: str = None,
+                          fuzz_tuples: list[tuple] | CombinationSpace = None) -> tuple:
+    """
+    Parses the request raw string or dictionary of values once into a template, checks its fuzz points
+    and combines the wordlists in the order the fuzz points appear in
+    :param input_param: request content raw string or dict
+    :param wordlists_dict: dict of fuzzpoint value (key) and tuple of wordlist items (value)
+    :param iterator: string indicating how to combine fuzzwords for each iteration
+    :param fuzz_tuples: either provide fuzz tuples or will be created
+    :return: tuple (FuzzTemplate, fuzz tuples)
+    """
+    template = FuzzTemplate(input_param)
 
-    # Check if input string is valid to load fuzz into it
-    if not check_fuzz_point_matches(matches, len(wordlists_dict)):
+    # Check if input is valid to load fuzz into it
+    if not check_fuzz_point_matches(template.matches, len(wordlists_dict)):
         raise BadInputException
 
     # Combine fuzzwords from the wordlists into tuples
-    tuples_list = fuzz_tuples if fuzz_tuples else create_fuzz_tuples(iterator=iterator,
-                                                                     wordlists_list=extract_ordered_wordlists_list(
-                                                                         input_str=input_var, wordlists_dict=wordlists_dict))
-
-    vals_loaded = []
-    # Replace each unique $word$ with values from the replacement lists
-    for fuzzwords_tuple in tuples_list:
-        replaced_string = input_var
-        for i, match in enumerate(matches):
-            # Replace only unique occurrences and keep track of replacements to avoid duplicates
-            if match in replaced_string:
-                replaced_string = replaced_string.replace(match, str(fuzzwords_tuple[i]), 1)
-
-        if isinstance(input_param, dict):
-            vals_loaded.append(ast.literal_eval(replaced_string))
-        else:
-            vals_loaded.append(replaced_string)
-    return vals_loaded
+    if fuzz_tuples is None:
+        input_var = str(input_param) if isinstance(input_param, dict) else input_param
+        fuzz_tuples = create_fuzz_tuples(iterator=iterator,
+                                         wordlists_list=extract_ordered_wordlists_list(input_str=input_var,
+                                                                                       wordlists_dict=wordlists_dict))
+    return template, fuzz_tuples
 
 
-def load_fuzzwords_yields(input_param: str | dict, wordlists_dict: dict, iterator: str = None,
-                          fuzz_tuples: list[tuple] = None):
+def load_fuzzwords(input_param: str | dict, wordlists_dict: dict, iterator: str = None,
+                   fuzz_tuples: list[tuple] = None) -> list:
     """
     Loads fuzzwords from wordlists into the request raw string or dictionary of values
     with defined iteration of wordlist items
     :param input_param: request content raw string or dict
-    :param wordlists_dict: list of lists or tuples
+    :param wordlists_dict: dict of fuzzpoint value (key) and tuple of wordlist items (value)
     :param iterator: string indicating how to combine fuzzwords for each iteration
     :param fuzz_tuples: either provide fuzz tuples or will be created
     :return: list of input string or dict loaded with fuzzwords
     """
+    template, tuples_list = compile_fuzz_template(input_param, wordlists_dict, iterator, fuzz_tuples)
 
-    # Define the regex pattern for the new format: $word$
-    fuzz_pattern = r'\$\w+\$'
+    return list(template.render_all(tuples_list))
 
-    input_var = str(input_param) if isinstance(input_param, dict) else input_param
 
-    # Find all matches in the input string
-    matches = re.findall(fuzz_pattern, input_var)
-    print("Matches found:", matches)
+def load_fuzzwords_yields(input_param: str | dict, wordlists_dict: dict, iterator: str = None,
+                          fuzz_tuples: list[tuple] | CombinationSpace = None, start: int = 0, stop: int = None):
+    """
+    Loads fuzzwords from wordlists into the request raw string or dictionary of values
+    with defined iteration of wordlist items
+    :param input_param: request content raw string or dict
+    :param wordlists_dict: list of lists or tuples
+    :param iterator: string indicating how to combine fuzzwords for each iteration
+    :param fuzz_tuples: either provide fuzz tuples or will be created
+    :param start: index of the first combination to load
+    :param stop: index after the last combination to load (None: until the end)
+    :return: generator of input string or dict loaded with fuzzwords
+    """
+    template, tuples_list = compile_fuzz_template(input_param, wordlists_dict, iterator, fuzz_tuples)
+    print("Matches found:", template.matches)
 
-    # Check if input string is valid to load fuzz into it
-    if not check_fuzz_point_matches(matches, len(wordlists_dict)):
-        raise BadInputException
+    if start or stop is not None:
+        # lazy view: the combinations before start are never generated
+        tuples_list = tuples_list[start:stop]
 
-    # Combine fuzzwords from the wordlists into tuples
-    tuples_list = fuzz_tuples if fuzz_tuples else create_fuzz_tuples(
-        iterator=iterator, wordlists_list=extract_ordered_wordlists_list(input_str=input_var, wordlists_dict=wordlists_dict))
-
-    # Define a generator for processing fuzzwords
-    def process_fuzzwords():
-        # Replace each unique $word$ with values from the replacement lists
-        for fuzzwords_tuple in tuples_list:
-            replaced_string = input_var
-            for i, match in enumerate(matches):
-                # Replace only the first occurrence of each match to avoid duplicate replacements
-                if match in replaced_string:
-                    replaced_string = replaced_string.replace(match, str(fuzzwords_tuple[i]), 1)
-
-            if isinstance(input_param, dict):
-                yield ast.literal_eval(replaced_string)
-            else:
-                yield replaced_string
-
-    # Yield from the generator
-    yield from process_fuzzwords()
+    # each request is rendered by filling the template slots (the request is never parsed again)
+    yield from template.render_all(tuples_list)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,180 @@
+import bisect
+import itertools
+import math
+from typing import Sequence
+
+"""
+Lazy combinations of wordlists: nothing is materialised, the item at any index is computed from the wordlists
+
+- ProductSpace: cartesian product (same order as itertools.product), index decoded as a mixed-radix number
+- ZipSpace: items of the same index of each wordlist (stops at the shortest one like zip)
+- ChainSpace: wordlists one after the other (like itertools.chain)
+
+every space supports len(), space[index] in O(1) (O(log n) for chain), slicing (space[start:stop:step] returns a
+lazy view) and shards(n) to split a run in contiguous parts. the wordlists only need to support len() and indexing
+"""
+
+
+def sequence_size(sequence: Sequence) -> int:
+    """
+    :return: number of items of a wordlist, or of a space (its size can be bigger than what len() allows)
+    """
+    return sequence.size if isinstance(sequence, CombinationSpace) else len(sequence)
+
+
+class CombinationSpace:
+    """
+    Base class of the lazy combination spaces, subclasses define size and item(index)
+    """
+
+    @property
+    def size(self) -> int:
+        """
+        number of items (can be bigger than what len() allows)
+        """
+        raise NotImplementedError
+
+    def item(self, index: int):
+        """
+        :param index: 0 <= index < size
+        :return: item at index
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+    def __getitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            return SpaceSlice(self, range(self.size)[index])
+
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('combination space index out of range')
+        return self.item(index)
+
+    def __iter__(self):
+        return (self.item(index) for index in range(self.size))
+
+    def shards(self, count: int) -> list:
+        """
+        Splits the space in count contiguous slices of (almost) the same size
+        :param count: number of shards
+        :return: list of SpaceSlice
+        """
+        if count < 1:
+            raise ValueError('shards count must be a non zero positive number')
+
+        base, extra = divmod(self.size, count)
+        shards, start = [], 0
+        for shard in range(count):
+            stop = start + base + (1 if shard < extra else 0)
+            shards.append(self[start:stop])
+            start = stop
+        return shards
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(size={self.size})"
+
+
+class ProductSpace(CombinationSpace):
+    def __init__(self, lists: Sequence[Sequence]):
+        """
+        :param lists: wordlists, the last one changes the fastest
+        """
+        self.lists = list(lists)
+        self.radixes = [sequence_size(lst) for lst in self.lists]
+
+    @property
+    def size(self) -> int:
+        return math.prod(self.radixes) if self.lists else 0
+
+    def item(self, index: int) -> tuple:
+        words = []
+        for lst, radix in zip(reversed(self.lists), reversed(self.radixes)):
+            index, digit = divmod(index, radix)
+            words.append(lst[digit])
+        return tuple(reversed(words))
+
+    def __iter__(self):
+        return itertools.product(*self.lists)
+
+
+class ZipSpace(CombinationSpace):
+    def __init__(self, lists: Sequence[Sequence]):
+        """
+        :param lists: wordlists, paired by index
+        """
+        self.lists = list(lists)
+
+    @property
+    def size(self) -> int:
+        return min(sequence_size(lst) for lst in self.lists) if self.lists else 0
+
+    def item(self, index: int) -> tuple:
+        return tuple(lst[index] for lst in self.lists)
+
+    def __iter__(self):
+        return zip(*self.lists)
+
+
+class ChainSpace(CombinationSpace):
+    def __init__(self, lists: Sequence[Sequence]):
+        """
+        :param lists: wordlists, one after the other
+        """
+        self.lists = list(lists)
+        # index of the first item of each wordlist
+        self.offsets = list(itertools.accumulate((sequence_size(lst) for lst in self.lists), initial=0))
+
+    @property
+    def size(self) -> int:
+        return self.offsets[-1]
+
+    def item(self, index: int):
+        position = bisect.bisect_right(self.offsets, index) - 1
+        return self.lists[position][index - self.offsets[position]]
+
+    def __iter__(self):
+        return itertools.chain(*self.lists)
+
+
+class SpaceSlice(CombinationSpace):
+    def __init__(self, space: CombinationSpace, indexes: range):
+        """
+        Lazy view on a part of a space
+        :param space: sliced space
+        :param indexes: indexes of the space in the view
+        """
+        self.space = space
+        self.indexes = indexes
+
+    @property
+    def size(self) -> int:
+        # len() of a range is limited to sys.maxsize
+        step = self.indexes.step
+        span = self.indexes.stop - self.indexes.start
+        return max((span + step - (1 if step > 0 else -1)) // step, 0)
+
+    @property
+    def start(self) -> int:
+        """
+        index of the first item of the view in the sliced space
+        """
+        return self.indexes.start
+
+    def item(self, index: int):
+        return self.space.item(self.indexes[index])
+
+    def __getitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            # slicing a view stays a single view on the sliced space
+            return SpaceSlice(self.space, self.indexes[index])
+        return super().__getitem__(index)
+
+    def __repr__(self):
+        return f"SpaceSlice({self.space!r}, {self.indexes})"
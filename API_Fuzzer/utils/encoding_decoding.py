@@ -7,6 +7,14 @@ from urllib.parse import quote, unquote
 
 import httpx
 
+from fuzzer_core.engine.response_hasher import ResponseHasher
+
+# methods of encode_content
+ENCODING_METHODS = ('base64', 'urlencode', 'md5', 'sha1', 'gzip', 'deflate', 'brotli', 'html_entities')
+
+# status code, headers and body, nothing left out
+MD5_RESPONSE_HASHER = ResponseHasher('md5', exclude_headers=())
+
 
 class EncDecException(Exception):
     def __init__(self):
@@ -112,12 +120,7 @@ def decode_content(content: str, decoding_method: str | list[str]):
 
 
 def hash_response_md5(response: httpx.Response):
-    from fuzzer_core.engine.requester.requester import Requester
-
-    # Convert the HTTP response to a string
-    response_str = Requester.reconstruct_response(response)
-
-    # Encode the response string to bytes and hash it
-    md5_hash = hashlib.md5(response_str.encode('utf-8')).hexdigest()
-
-    return md5_hash
+    """
+    md5 of the status code, every header and the raw body of the response (ResponseHasher)
+    """
+    return MD5_RESPONSE_HASHER.hexdigest(response)
@@ -8,6 +8,9 @@ from urllib.parse import urlparse
 import httpx
 from httpx import RequestError
 
+from utils.mapped_wordlist import MappedWordlist
+from utils.wordlist_cache import WordlistCache
+
 
 # TODO: handle exceptions raised in this module where the functions are called from
 
@@ -40,7 +43,7 @@ def load_from_file(path: str, mode: str = None):
     :raises
     """
     try:
-        if os.path.exists(path):
+        if not os.path.exists(path):
             raise FileNotFoundError(f'File not found: {path}')
 
         file_mode = 'r' if mode is None else mode
@@ -74,28 +77,33 @@ def load_from_url(url):
         raise err
 
 
-def load_wordlist(wordlist_source):
+def load_wordlist(wordlist_source, separator: str = None, cache: WordlistCache = None):
     """
 
-    :param wordlist_source:
-    :return: list of words for test
+    :param wordlist_source: url or path of the wordlist (one word per line, or a csv file: first column)
+    :param separator: if set, each line is split into a tuple of words on it (read into a list)
+    :param cache: a wordlist loaded from a url is cached in it (and returned from it: a MappedWordlist)
+    :return: words for test: a list, or a MappedWordlist for a plain file (words read from the file when accessed)
+    :raises FileNotFoundError: if the file doesn't exist
+    :raises httpx.RequestError: if the wordlist can't be loaded from the url
     """
-    try:
-        content = load_from_url(wordlist_source)
-        if content is not None:
-            return [line.strip() for line in content.split('\n')]
-
+    content = load_from_url(wordlist_source)
+    if content is not None and cache is not None and separator is None:
+        return cache.load(content, name=wordlist_source)
+    if content is not None:
+        lines = [line.strip() for line in content.split('\n')]
+    elif wordlist_source.endswith('.csv'):
         with load_from_file(path=wordlist_source) as file:
-            if wordlist_source.endswith('.csv'):
-                reader = csv.reader(file)
-                return [row[0] for row in reader]
+            return [row[0] for row in csv.reader(file)]
+    elif separator is None:
+        return MappedWordlist(wordlist_source)
+    else:
+        with load_from_file(path=wordlist_source) as file:
+            lines = [line.rstrip('\r\n') for line in file]
 
-            return [tuple(line.split(":")) if ":" in line else line.strip() for line in file]
-    except httpx.RequestError as req_err:
-        print(f"Could not load wordlist from url: {wordlist_source}")
-        raise
-    except:
-        print("Could not load wordlist from file")
+    if separator is None:
+        return lines
+    return [tuple(line.split(separator)) if separator in line else line for line in lines]
 
 
 def load_config_file(path):
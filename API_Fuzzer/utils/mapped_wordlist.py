@@ -0,0 +1,195 @@
+import itertools
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+"""
+Memory-mapped wordlist: the file is never read into python strings, a word is decoded when it's accessed
+
+- the file is mapped read-only, the index holds the offset of the start of each line (array('Q'), one more offset
+  than lines: a line ends one byte before the start of the next one, at its \\n). len() and wordlist[i] are O(1)
+- the index is built once, chunk by chunk with bytes.split (the lines are counted in C, no python loop per line), and
+  cached next to the file (<file>.idx) with the size and mtime of the file it was built from. The cached index is
+  mapped too: opening a wordlist indexed before costs nothing and the index pages are shared with the page cache, the
+  process RSS doesn't grow with the size of the wordlist
+- lines end with \\n or \\r\\n, a last line without \\n is a word, the empty line after a last \\n isn't (like
+  str.splitlines), blank lines in the middle of the file are words
+- a wordlist is sent to other processes (shards) as its path: it's mapped again there, with the cached index
+- if the index can't be written next to the file (read-only directory), it's kept in memory
+"""
+
+INDEX_SUFFIX = '.idx'
+# magic, size and mtime of the indexed file, number of lines
+INDEX_HEADER = struct.Struct('<8sQQQ')
+INDEX_MAGIC = b'FZWLIDX1'
+
+# bytes of the file split at once while indexing it
+INDEX_CHUNK_SIZE = 16 * 1024 * 1024
+# lines split at once while iterating
+ITER_BATCH_SIZE = 4096
+
+
+def index_lines(mapped, chunk_size: int = INDEX_CHUNK_SIZE) -> array:
+    """
+    :param mapped: content of the file (mmap or bytes)
+    :param chunk_size: bytes split at once
+    :return: array('Q') of the offsets of the start of each line, followed by the offset after the last line + 1
+    """
+    size = len(mapped)
+    starts = array('Q', [0])
+    position = 0
+    while position < size:
+        end = min(position + chunk_size, size)
+        lines = mapped[position:end].split(b'\n')
+        if len(lines) > 1:
+            # the last piece is the beginning of the next line: it's split again with the next chunk
+            lines.pop()
+            # position is the last start: accumulated again from it
+            starts.pop()
+            starts.extend(itertools.accumulate(map((1).__add__, map(len, lines)), initial=position))
+            position = starts[-1]
+            if end < size:
+                continue
+            if position < size:
+                # last line without a newline
+                starts.append(size + 1)
+            break
+
+        # no newline in the chunk: a line longer than a chunk
+        newline = -1 if end == size else mapped.find(b'\n', end)
+        if newline == -1:
+            starts.append(size + 1)
+            break
+        position = newline + 1
+        starts.append(position)
+    return starts
+
+
+class MappedWordlist:
+    def __init__(self, path: str, encoding: str = 'utf-8', errors: str = 'replace', cache_index: bool = True):
+        """
+        :param path: path of the wordlist file (one word per line)
+        :param encoding: encoding of the words
+        :param errors: how words that can't be decoded are handled (str.decode errors)
+        :param cache_index: the line index is cached next to the file (<path>.idx)
+        :raises FileNotFoundError: if the file doesn't exist
+        """
+        self.path = path
+        self.encoding = encoding
+        self.errors = errors
+        self.cache_index = cache_index
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            # an empty file can't be mapped
+            self._mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+        self._index_mapped = None
+        self._starts = self._load_index(stat) if self.cache_index else None
+        if self._starts is None:
+            self._starts = index_lines(self._mapped)
+            if self.cache_index:
+                self._save_index(stat)
+        self._count = len(self._starts) - 1
+
+    @property
+    def index_path(self) -> str:
+        return self.path + INDEX_SUFFIX
+
+    def _load_index(self, stat):
+        try:
+            with open(self.index_path, 'rb') as file:
+                header = file.read(INDEX_HEADER.size)
+                if len(header) < INDEX_HEADER.size:
+                    return None
+                magic, size, mtime, count = INDEX_HEADER.unpack(header)
+                if (magic, size, mtime) != (INDEX_MAGIC, stat.st_size, stat.st_mtime_ns) or \
+                        os.fstat(file.fileno()).st_size != INDEX_HEADER.size + (count + 1) * 8:
+                    return None
+                self._index_mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+        with memoryview(self._index_mapped) as view:
+            starts = view[INDEX_HEADER.size:].cast('Q')
+        if sys.byteorder != 'little':
+            starts = array('Q', starts)
+            starts.byteswap()
+        return starts
+
+    def _save_index(self, stat):
+        starts = self._starts
+        if sys.byteorder != 'little':
+            starts = array('Q', starts)
+            starts.byteswap()
+        temporary = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'wb') as file:
+                file.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, len(self._starts) - 1))
+                starts.tofile(file)
+            # another process indexing the same file at the same time replaces it with the same content
+            os.replace(temporary, self.index_path)
+        except OSError:
+            # read-only directory: the index stays in memory
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+    def line_bytes(self, index: int) -> bytes:
+        """
+        :param index: index of the line (negative from the end)
+        :return: raw bytes of the line, without its line ending
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('wordlist index out of range')
+        return self._mapped[self._starts[index]:self._starts[index + 1] - 1].removesuffix(b'\r')
+
+    def __getitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            return [self[i] for i in range(self._count)[index]]
+        return self.line_bytes(index).decode(self.encoding, self.errors)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        # streamed in batches of lines decoded and split at once (\n is never part of a multi-byte utf-8 character)
+        starts, count = self._starts, self._count
+        for first in range(0, count, ITER_BATCH_SIZE):
+            last = min(first + ITER_BATCH_SIZE, count)
+            text = self._mapped[starts[first]:starts[last] - 1].decode(self.encoding, self.errors)
+            if '\r' in text:
+                yield from (line.removesuffix('\r') for line in text.split('\n'))
+            else:
+                yield from text.split('\n')
+
+    def close(self):
+        if isinstance(self._starts, memoryview):
+            # the view of the cached index has to be released before its map is closed
+            self._starts.release()
+        for mapped in (self._mapped, self._index_mapped):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._mapped, self._index_mapped, self._starts, self._count = b'', None, array('Q', [0]), 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self):
+        # sent as its path: mapped again (with its cached index) by the process receiving it
+        return {'path': self.path, 'encoding': self.encoding, 'errors': self.errors, 'cache_index': self.cache_index}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __repr__(self):
+        return f"MappedWordlist({self.path!r}, words={self._count})"
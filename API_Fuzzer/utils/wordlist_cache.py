@@ -0,0 +1,256 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+from utils.mapped_wordlist import MappedWordlist, INDEX_SUFFIX
+
+"""
+NOTES:
+
+- local cache of wordlists keyed by the SHA-256 of their raw content: the id of a wordlist sent once is given back to
+  the interface (wordlist_cached), which references it by its id afterwards, loading it again doesn't parse anything
+- the wordlists got from the cache are mapped: they're closed (close_wordlists) once the fuzz using them is done
+- a cached wordlist is stored normalised (utf-8 BOM removed, \\r\\n line endings made \\n, every word kept: zip
+  pairs words by position, duplicates and blank lines count) as <id>.txt with its line index (<id>.txt.idx, see
+  MappedWordlist): getting it maps both files
+- dedupe is explicit: a wordlist added with dedupe=True is stored without its duplicate words (first occurrences
+  kept, in order), under its own id (the content hashed with a prefix), next to the one stored as it is
+- a SQLite manifest (manifest.db, in the cache directory) holds the name, number of words, size on disk and last use
+  of each wordlist. Several processes can share a cache directory
+- merge results are adopted: moved into the cache as they are, in the stored form already (\\n ended lines, no BOM,
+  see wordlist_merge). Nothing is removed from them: they're only deduplicated if the merge was asked to
+- once the cache holds more than max_bytes on disk, the least recently used wordlists are removed (never the one just
+  added). A removed wordlist still mapped by a running fuzz stays readable until it's closed (the file is unlinked)
+"""
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'api_fuzzer', 'wordlists')
+DEFAULT_CACHE_MAX_BYTES = 1024 ** 3
+
+MANIFEST = 'manifest.db'
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wordlists (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    words INTEGER,
+    size INTEGER,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS wordlists_last_used ON wordlists (last_used);
+"""
+
+UTF8_BOM = b'\xef\xbb\xbf'
+# hashed before the content of a wordlist stored without its duplicates (another id than the one stored as it is)
+DEDUPE_ID_PREFIX = b'dedupe\0'
+# bytes read at once while an adopted file is hashed
+ADOPT_CHUNK_SIZE = 1024 * 1024
+
+
+def content_id(content: str | bytes, dedupe: bool = False) -> str:
+    """
+    :param content: raw content of a wordlist (str encoded as utf-8)
+    :param dedupe: id of the wordlist stored without its duplicate words
+    :return: id of the wordlist in the cache (hex SHA-256 of the content)
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    digest = hashlib.sha256(DEDUPE_ID_PREFIX if dedupe else b'')
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def normalise_wordlist(content: bytes, dedupe: bool = False) -> bytes:
+    """
+    :param content: raw content of a wordlist
+    :param dedupe: duplicate words are removed (first occurrences kept)
+    :return: one word per line, \\n line endings (last line included)
+    """
+    content = content.removeprefix(UTF8_BOM).replace(b'\r\n', b'\n')
+    if not dedupe:
+        return content if not content or content.endswith(b'\n') else content + b'\n'
+
+    lines = content.split(b'\n')
+    if lines[-1] == b'':
+        lines.pop()
+    # dict keeps the order of the first occurrences
+    words = dict.fromkeys(lines)
+    return b'\n'.join(words) + b'\n' if words else b''
+
+
+class WordlistCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        """
+        :param directory: cache directory (created if needed)
+        :param max_bytes: size on disk of the cached wordlists (and their indexes) over which the least recently used
+            ones are removed
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._connection = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(self.directory, exist_ok=True)
+            # autocommit: each statement is its own transaction
+            self._connection = sqlite3.connect(os.path.join(self.directory, MANIFEST), timeout=30,
+                                               isolation_level=None, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def path_of(self, wordlist_id: str) -> str:
+        # the id is a hex digest: it can't point outside of the cache directory
+        if len(wordlist_id) != 64 or not all(char in '0123456789abcdef' for char in wordlist_id):
+            raise ValueError(f"invalid wordlist id: {wordlist_id!r}")
+        return os.path.join(self.directory, wordlist_id + '.txt')
+
+    def __contains__(self, wordlist_id: str) -> bool:
+        return self.connection.execute('SELECT 1 FROM wordlists WHERE id = ?', (wordlist_id,)).fetchone() is not None
+
+    def add(self, content: str | bytes, name: str = None, dedupe: bool = False) -> str:
+        """
+        Caches a wordlist (only touched if it's cached already)
+        :param content: raw content of the wordlist
+        :param name: name of the wordlist (file name)
+        :param dedupe: the wordlist is stored without its duplicate words
+        :return: id of the wordlist
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        wordlist_id = content_id(content, dedupe)
+        if self.touch(wordlist_id):
+            return wordlist_id
+
+        path = self.path_of(wordlist_id)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(normalise_wordlist(content, dedupe))
+        os.replace(temporary, path)
+        self._register(wordlist_id, name)
+        return wordlist_id
+
+    def add_file(self, path: str) -> str:
+        """
+        :param path: wordlist file
+        :return: id of the wordlist (named after the file)
+        """
+        with open(path, 'rb') as file:
+            return self.add(file.read(), name=os.path.basename(path))
+
+    def adopt(self, path: str, name: str = None) -> str:
+        """
+        Moves a wordlist file already in the stored form (one word per \\n ended line, no BOM: merge results) into the
+        cache, as it is (duplicates included): it's hashed by chunks, never read into memory
+        :param path: wordlist file (on the file system of the cache directory, removed if it's cached already)
+        :param name: name of the wordlist
+        :return: id of the wordlist
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            while chunk := file.read(ADOPT_CHUNK_SIZE):
+                digest.update(chunk)
+        wordlist_id = digest.hexdigest()
+        if self.touch(wordlist_id):
+            os.remove(path)
+            return wordlist_id
+
+        cached = self.path_of(wordlist_id)
+        os.replace(path, cached)
+        self._register(wordlist_id, name)
+        return wordlist_id
+
+    def _register(self, wordlist_id: str, name: str | None):
+        path = self.path_of(wordlist_id)
+        # builds the line index next to the file
+        with MappedWordlist(path) as wordlist:
+            words = len(wordlist)
+        size = os.path.getsize(path) + os.path.getsize(path + INDEX_SUFFIX)
+        self.connection.execute('INSERT OR REPLACE INTO wordlists VALUES (?, ?, ?, ?, ?)',
+                                (wordlist_id, name, words, size, time.time()))
+        self.evict(keep=wordlist_id)
+
+    def touch(self, wordlist_id: str) -> bool:
+        """
+        :return: True if the wordlist is cached (its last use is now)
+        """
+        cursor = self.connection.execute('UPDATE wordlists SET last_used = ? WHERE id = ?', (time.time(), wordlist_id))
+        if not cursor.rowcount:
+            return False
+        if not os.path.exists(self.path_of(wordlist_id)):
+            # removed from the directory by hand
+            self.connection.execute('DELETE FROM wordlists WHERE id = ?', (wordlist_id,))
+            return False
+        return True
+
+    def get(self, wordlist_id: str) -> MappedWordlist:
+        """
+        :param wordlist_id: id returned by add
+        :return: the cached wordlist
+        :raises KeyError: if the wordlist isn't (or isn't anymore) in the cache
+        """
+        if not self.touch(wordlist_id):
+            raise KeyError(wordlist_id)
+        return MappedWordlist(self.path_of(wordlist_id))
+
+    def load(self, content: str | bytes, name: str = None, dedupe: bool = False) -> MappedWordlist:
+        """
+        :param content: raw content of a wordlist
+        :param name: name of the wordlist
+        :param dedupe: the wordlist is stored without its duplicate words
+        :return: the cached wordlist (cached first if needed)
+        """
+        return self.get(self.add(content, name, dedupe))
+
+    def remove(self, wordlist_id: str):
+        self.connection.execute('DELETE FROM wordlists WHERE id = ?', (wordlist_id,))
+        path = self.path_of(wordlist_id)
+        for file in (path, path + INDEX_SUFFIX):
+            try:
+                os.remove(file)
+            except OSError:
+                pass
+
+    @property
+    def size(self) -> int:
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM wordlists').fetchone()[0]
+
+    def evict(self, keep: str = None) -> list[str]:
+        """
+        Removes the least recently used wordlists until the cache holds at most max_bytes
+        :param keep: id of a wordlist never removed
+        :return: ids of the removed wordlists
+        """
+        excess = self.size - self.max_bytes
+        removed = []
+        if excess <= 0:
+            return removed
+        for wordlist_id, size in self.connection.execute('SELECT id, size FROM wordlists ORDER BY last_used')\
+                .fetchall():
+            if excess <= 0:
+                break
+            if wordlist_id == keep:
+                continue
+            self.remove(wordlist_id)
+            removed.append(wordlist_id)
+            excess -= size
+        return removed
+
+    def entries(self) -> list[dict]:
+        """
+        :return: cached wordlists, most recently used first
+        """
+        rows = self.connection.execute('SELECT id, name, words, size, last_used FROM wordlists '
+                                       'ORDER BY last_used DESC').fetchall()
+        return [dict(zip(('id', 'name', 'words', 'size', 'last_used'), row)) for row in rows]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,186 @@
+import heapq
+import itertools
+import os
+import sys
+import tempfile
+from typing import Callable, Iterable, Iterator, Sequence
+
+from utils.combination_space import ChainSpace, ProductSpace, ZipSpace
+
+"""
+NOTES:
+
+- out-of-core merge of wordlists: the chain / zip / product is a lazy combination space, its lines are formatted and
+  written to the output file in batches, nothing but a batch is held in memory whatever the size of the result
+- sort: the lines are sorted byte-wise (utf-8) with an external merge sort. Lines are buffered until run_bytes, each
+  run is sorted in memory and written to a temporary file, the sorted runs are then merged (heapq.merge) into the output
+- dedupe alone keeps the first occurrence of each line, in the order of the merge: a first external sort on
+  (line, position) keeps the first position of each line, a second one on the position puts them back in order.
+  With sort, dedupe drops the equal lines next to each other in the sorted output (one sort). Words are expected
+  without \\0 (a line with one can be kept twice by the order preserving dedupe)
+- the memory used is bounded by run_bytes (and a read buffer per run while merging), the temporary runs take about
+  the size of the result on disk
+- progress(done, total) is called after each batch with the number of combinations merged and the size of the space
+"""
+
+MERGE_TYPES = {'chain': ChainSpace, 'zip': ZipSpace, 'product': ProductSpace}
+
+# lines formatted and written at once
+WRITE_BATCH_SIZE = 65536
+# memory held by the lines sorted in one run of the external sort
+DEFAULT_RUN_BYTES = 64 * 1024 * 1024
+# memory of a line besides its bytes (bytes object header and its pointer in the run list)
+LINE_OVERHEAD = sys.getsizeof(b'') + 8
+# read buffer of each run while the runs are merged
+RUN_BUFFER_SIZE = 256 * 1024
+
+
+def merge_space(wordlists: Sequence[Sequence], merge_type: str):
+    """
+    :param wordlists: wordlists (lists of words, MappedWordlist...)
+    :param merge_type: chain, zip or product
+    :return: lazy combination space of the wordlists
+    """
+    if merge_type not in MERGE_TYPES:
+        raise ValueError(f"unknown merge type: {merge_type} (expected one of {', '.join(MERGE_TYPES)})")
+    return MERGE_TYPES[merge_type](wordlists)
+
+
+class ExternalSorter:
+    def __init__(self, directory: str = None, run_bytes: int = DEFAULT_RUN_BYTES):
+        """
+        Sorts more lines than fit in memory
+        :param directory: directory of the temporary runs (default temporary directory if None)
+        :param run_bytes: memory held by the lines sorted in one run
+        """
+        self.directory = directory
+        self.run_bytes = run_bytes
+        self._runs = []
+        self._lines = []
+        self._size = 0
+
+    def add_lines(self, lines: Iterable[bytes]):
+        """
+        :param lines: lines ending with \\n
+        """
+        for line in lines:
+            self._lines.append(line)
+            self._size += len(line) + LINE_OVERHEAD
+            if self._size >= self.run_bytes:
+                self._write_run()
+
+    def _write_run(self):
+        self._lines.sort()
+        run = tempfile.TemporaryFile(dir=self.directory)
+        run.writelines(self._lines)
+        run.seek(0)
+        self._runs.append(run)
+        self._lines, self._size = [], 0
+
+    def sorted_lines(self) -> Iterator[bytes]:
+        """
+        :return: the lines in order (the runs are closed once they're merged)
+        """
+        if not self._runs:
+            # fits in one run: no temporary file
+            self._lines.sort()
+            lines, self._lines, self._size = self._lines, [], 0
+            yield from lines
+            return
+
+        if self._lines:
+            self._write_run()
+        runs, self._runs = self._runs, []
+        try:
+            readers = [open(run.fileno(), 'rb', buffering=RUN_BUFFER_SIZE, closefd=False) for run in runs]
+            yield from heapq.merge(*readers)
+        finally:
+            for run in runs:
+                run.close()
+
+
+def unique_sorted(lines: Iterable[bytes]) -> Iterator[bytes]:
+    return (line for line, _ in itertools.groupby(lines))
+
+
+def first_occurrences(lines: Iterable[bytes], directory: str = None,
+                      run_bytes: int = DEFAULT_RUN_BYTES) -> Iterator[bytes]:
+    """
+    :param lines: lines ending with \\n
+    :return: first occurrence of each line, in their order
+    """
+    # line \0 position: the positions of a line follow each other, the first one first (fixed width hex)
+    by_line = ExternalSorter(directory, run_bytes)
+    by_line.add_lines(b'%s\0%016x\n' % (line[:-1], position) for position, line in enumerate(lines))
+
+    by_position = ExternalSorter(directory, run_bytes)
+    previous = None
+    firsts = []
+    for record in by_line.sorted_lines():
+        line, position = record.rsplit(b'\0', 1)
+        if line != previous:
+            firsts.append(b'%s%s\n' % (position[:-1], line))
+            previous = line
+            if len(firsts) >= WRITE_BATCH_SIZE:
+                by_position.add_lines(firsts)
+                firsts = []
+    by_position.add_lines(firsts)
+    return (record[16:] for record in by_position.sorted_lines())
+
+
+def merge_wordlists(wordlists: Sequence[Sequence], merge_type: str, output: str, separator: str = '',
+                    dedupe: bool = False, sort: bool = False, progress: Callable[[int, int], None] = None,
+                    run_bytes: int = DEFAULT_RUN_BYTES, temporary_directory: str = None) -> int:
+    """
+    Merges wordlists into a file, one merged word per line
+    :param wordlists: wordlists to merge (lists of words, MappedWordlist...)
+    :param merge_type: chain, zip or product
+    :param output: path of the merged wordlist
+    :param separator: joins the words of a zip / product combination
+    :param dedupe: duplicate lines are removed (the first one is kept)
+    :param sort: lines are sorted (byte-wise)
+    :param progress: called with the number of combinations merged and the size of the merge space
+    :param run_bytes: memory used to sort (lines held in a run)
+    :param temporary_directory: directory of the runs of the external sort
+    :return: number of lines written
+    """
+    if separator == '\\t':
+        separator = '\t'
+    space = merge_space(wordlists, merge_type)
+    # len() overflows on a space bigger than sys.maxsize
+    total = space.size
+    lines = map(str, space) if merge_type == 'chain' else map(separator.join, space)
+
+    def encoded_batches() -> Iterator[list[bytes]]:
+        done = 0
+        while batch := list(itertools.islice(lines, WRITE_BATCH_SIZE)):
+            yield [(line + '\n').encode('utf-8') for line in batch]
+            done += len(batch)
+            if progress is not None:
+                progress(done, total)
+
+    if sort:
+        sorter = ExternalSorter(temporary_directory, run_bytes)
+        for batch in encoded_batches():
+            sorter.add_lines(batch)
+        merged = sorter.sorted_lines()
+        if dedupe:
+            merged = unique_sorted(merged)
+    elif dedupe:
+        merged = first_occurrences(itertools.chain.from_iterable(encoded_batches()), temporary_directory, run_bytes)
+    else:
+        merged = itertools.chain.from_iterable(encoded_batches())
+
+    written = 0
+    temporary = f"{output}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, 'wb') as file:
+            while batch := list(itertools.islice(merged, WRITE_BATCH_SIZE)):
+                file.writelines(batch)
+                written += len(batch)
+        os.replace(temporary, output)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return written
@@ -0,0 +1,295 @@
+import math
+from typing import Callable, Sequence
+
+from utils.combination_space import CombinationSpace, sequence_size
+from utils.encoding_decoding import ENCODING_METHODS, encode_content
+
+"""
+NOTES:
+
+- a transform turns a word into a fixed number of variants (variant 0..variants-1), whatever the word: the size of a
+  transformed wordlist is len(wordlist) * the product of the variants of its transforms, computed without expanding
+  anything (duplicate variants, a rule that doesn't change a word, are still counted: the space stays arithmetic)
+- TransformedWordlist is a lazy combination space (len, O(1) index access, slicing, shards): variant index decoded as
+  a mixed-radix number, the word changes the slowest and the last transform the fastest. It can be used as a wordlist
+  in a product / zip / chain space and fuzzed without being materialised
+- transforms are applied in their order: rules, then case, then affixes, then encodings is a different space than
+  encodings first
+- rules: hashcat rule syntax (subset), one variant per rule, each rule a chain of functions (spaces between functions
+  are ignored, ':' leaves the word as it is). Positions are 0-9 then A-Z (10-35) like hashcat
+- pipelines are declared as a list of dicts (JSON from the interface or the config):
+  [{'rules': [':', 'c', 'u $1']}, {'case': ['keep', 'upper']}, {'prefixes': ['', '../'], 'suffixes': ['', '.bak']},
+   {'encodings': [[], ['urlencode'], ['urlencode', 'urlencode']]}]
+  a numeric range of affixes ({'suffixes': {'range': [0, 1000]}}) is a range(), not a list
+"""
+
+CASE_MODES = {
+    'keep': lambda word: word,
+    'lower': str.lower,
+    'upper': str.upper,
+    'capitalize': str.capitalize,
+    'swapcase': str.swapcase,
+    'title': str.title,
+}
+
+
+def rule_position(char: str) -> int:
+    """
+    :param char: hashcat position (0-9, A-Z)
+    :return: position
+    """
+    if char.isdigit():
+        return int(char)
+    if 'A' <= char <= 'Z':
+        return ord(char) - ord('A') + 10
+    raise ValueError(f"invalid rule position: {char!r}")
+
+
+def toggle_at(word: str, position: int) -> str:
+    if position >= len(word):
+        return word
+    return word[:position] + word[position].swapcase() + word[position + 1:]
+
+
+# function: (kind of each parameter: 'N' position, 'X' character; implementation)
+RULE_FUNCTIONS = {
+    ':': ('', lambda word: word),
+    'l': ('', str.lower),
+    'u': ('', str.upper),
+    'c': ('', str.capitalize),
+    'C': ('', lambda word: word[:1].lower() + word[1:].upper()),
+    't': ('', str.swapcase),
+    'T': ('N', toggle_at),
+    'r': ('', lambda word: word[::-1]),
+    'd': ('', lambda word: word + word),
+    'p': ('N', lambda word, count: word * (count + 1)),
+    'f': ('', lambda word: word + word[::-1]),
+    '{': ('', lambda word: word[1:] + word[:1]),
+    '}': ('', lambda word: word[-1:] + word[:-1]),
+    '$': ('X', lambda word, char: word + char),
+    '^': ('X', lambda word, char: char + word),
+    '[': ('', lambda word: word[1:]),
+    ']': ('', lambda word: word[:-1]),
+    'D': ('N', lambda word, position: word[:position] + word[position + 1:]),
+    'x': ('NN', lambda word, position, length: word[position:position + length]),
+    'O': ('NN', lambda word, position, length: word[:position] + word[position + length:]),
+    'i': ('NX', lambda word, position, char: word[:position] + char + word[position:]
+          if position <= len(word) else word),
+    'o': ('NX', lambda word, position, char: word[:position] + char + word[position + 1:]
+          if position < len(word) else word),
+    "'": ('N', lambda word, position: word[:position]),
+    's': ('XX', lambda word, old, new: word.replace(old, new)),
+    '@': ('X', lambda word, char: word.replace(char, '')),
+    'z': ('N', lambda word, count: word[:1] * count + word),
+    'Z': ('N', lambda word, count: word + word[-1:] * count),
+    'q': ('', lambda word: ''.join(char * 2 for char in word)),
+}
+
+
+def compile_rule(rule: str) -> Callable[[str], str]:
+    """
+    :param rule: hashcat rule (chain of functions, e.g. 'c $1 $2')
+    :return: function word -> transformed word
+    :raises ValueError: if the rule uses an unsupported function or misses a parameter
+    """
+    functions = []
+    index = 0
+    while index < len(rule):
+        name = rule[index]
+        index += 1
+        if name == ' ':
+            continue
+        if name not in RULE_FUNCTIONS:
+            raise ValueError(f"unsupported rule function {name!r} in rule {rule!r}")
+        kinds, function = RULE_FUNCTIONS[name]
+        if index + len(kinds) > len(rule):
+            raise ValueError(f"missing parameter of {name!r} in rule {rule!r}")
+        parameters = [rule_position(rule[index + offset]) if kind == 'N' else rule[index + offset]
+                      for offset, kind in enumerate(kinds)]
+        index += len(kinds)
+        if name != ':':
+            functions.append((function, parameters))
+
+    def apply(word: str) -> str:
+        for function, parameters in functions:
+            word = function(word, *parameters)
+        return word
+    return apply
+
+
+class Transform:
+    """
+    Base class of the transforms, subclasses define variants and apply(word, variant)
+    """
+    variants = 1
+
+    def apply(self, word: str, variant: int) -> str:
+        """
+        :param word: word to transform
+        :param variant: 0 <= variant < variants
+        :return: the variant of the word
+        """
+        raise NotImplementedError
+
+    def expand(self, word: str) -> list[str]:
+        """
+        :return: every variant of the word, in order
+        """
+        return [self.apply(word, variant) for variant in range(self.variants)]
+
+
+class RuleTransform(Transform):
+    def __init__(self, rules: Sequence[str]):
+        """
+        :param rules: hashcat rules, one variant each
+        """
+        self.rules = list(rules)
+        self._compiled = [compile_rule(rule) for rule in self.rules]
+        self.variants = len(self._compiled)
+
+    def apply(self, word: str, variant: int) -> str:
+        return self._compiled[variant](word)
+
+    def __reduce__(self):
+        # compiled again (lambdas don't pickle) in the processes of a multi-process run
+        return RuleTransform, (self.rules,)
+
+    def __repr__(self):
+        return f"RuleTransform({self.variants} rules)"
+
+
+class CaseTransform(Transform):
+    def __init__(self, modes: Sequence[str] = ('keep', 'lower', 'upper', 'capitalize')):
+        """
+        :param modes: case of each variant (keep, lower, upper, capitalize, swapcase, title)
+        """
+        unknown = [mode for mode in modes if mode not in CASE_MODES]
+        if unknown:
+            raise ValueError(f"unknown case modes: {unknown} (expected {', '.join(CASE_MODES)})")
+        self.modes = list(modes)
+        self._functions = [CASE_MODES[mode] for mode in self.modes]
+        self.variants = len(self._functions)
+
+    def apply(self, word: str, variant: int) -> str:
+        return self._functions[variant](word)
+
+    def __reduce__(self):
+        return CaseTransform, (self.modes,)
+
+    def __repr__(self):
+        return f"CaseTransform({self.modes})"
+
+
+class AffixTransform(Transform):
+    def __init__(self, prefixes: Sequence = ('',), suffixes: Sequence = ('',)):
+        """
+        :param prefixes: prefixes (any sequence: a list, a range of numbers, a wordlist)
+        :param suffixes: suffixes, the suffix changes the fastest
+        """
+        self.prefixes = prefixes
+        self.suffixes = suffixes
+        self._suffix_count = len(suffixes)
+        self.variants = len(prefixes) * self._suffix_count
+
+    def apply(self, word: str, variant: int) -> str:
+        prefix, suffix = divmod(variant, self._suffix_count)
+        return f"{self.prefixes[prefix]}{word}{self.suffixes[suffix]}"
+
+    def expand(self, word: str) -> list[str]:
+        return [f"{prefix}{word}{suffix}" for prefix in self.prefixes for suffix in self.suffixes]
+
+    def __repr__(self):
+        return f"AffixTransform({len(self.prefixes)} prefixes, {self._suffix_count} suffixes)"
+
+
+class EncodingTransform(Transform):
+    def __init__(self, chains: Sequence[str | Sequence[str]]):
+        """
+        :param chains: encoding chains (see encode_content), one variant each, [] leaves the word as it is
+        """
+        self.chains = [[chain] if isinstance(chain, str) else list(chain) for chain in chains]
+        unknown = {method for chain in self.chains for method in chain if method not in ENCODING_METHODS}
+        if unknown:
+            raise ValueError(f"unknown encodings: {sorted(unknown)} (expected {', '.join(ENCODING_METHODS)})")
+        self.variants = len(self.chains)
+
+    def apply(self, word: str, variant: int) -> str:
+        chain = self.chains[variant]
+        return encode_content(word, chain) if chain else word
+
+    def __repr__(self):
+        return f"EncodingTransform({self.chains})"
+
+
+def affixes(spec) -> Sequence:
+    # {'range': [start, stop(, step)]}: numbers, never expanded
+    if isinstance(spec, dict):
+        return range(*spec['range'])
+    return list(spec)
+
+
+def build_pipeline(spec: Sequence[dict | Transform]) -> list[Transform]:
+    """
+    :param spec: transforms as dicts ({'rules': [...]}, {'case': [...]}, {'prefixes': [...], 'suffixes': [...]},
+        {'encodings': [[...], ...]}) or Transform objects
+    :return: list of Transform
+    :raises ValueError: if a transform isn't known
+    """
+    pipeline = []
+    for step in spec:
+        if isinstance(step, Transform):
+            pipeline.append(step)
+        elif 'rules' in step:
+            pipeline.append(RuleTransform(step['rules']))
+        elif 'case' in step:
+            pipeline.append(CaseTransform(step['case']))
+        elif 'prefixes' in step or 'suffixes' in step:
+            pipeline.append(AffixTransform(affixes(step.get('prefixes', [''])), affixes(step.get('suffixes', ['']))))
+        elif 'encodings' in step:
+            pipeline.append(EncodingTransform(step['encodings']))
+        else:
+            raise ValueError(f"unknown transform: {step}")
+    return pipeline
+
+
+class TransformedWordlist(CombinationSpace):
+    def __init__(self, wordlist: Sequence, transforms: Sequence[dict | Transform]):
+        """
+        Lazy expansion of a wordlist through a pipeline of transforms
+        :param wordlist: words (list, MappedWordlist, another space...)
+        :param transforms: pipeline (see build_pipeline)
+        """
+        self.wordlist = wordlist
+        self.transforms = build_pipeline(transforms)
+        self.radixes = [transform.variants for transform in self.transforms]
+        # variants of each word
+        self.variants = math.prod(self.radixes)
+
+    @property
+    def size(self) -> int:
+        return sequence_size(self.wordlist) * self.variants
+
+    def item(self, index: int) -> str:
+        index, variant = divmod(index, self.variants)
+        digits = []
+        for radix in reversed(self.radixes):
+            variant, digit = divmod(variant, radix)
+            digits.append(digit)
+        word = self.wordlist[index]
+        for transform, digit in zip(self.transforms, reversed(digits)):
+            word = transform.apply(word, digit)
+        return word
+
+    def __iter__(self):
+        # the variants of a word are expanded transform by transform: the result of a transform is computed once for
+        # all the variants of the next ones
+        if not self.variants:
+            return
+        for word in self.wordlist:
+            words = [word]
+            for transform in self.transforms:
+                words = [variant for partial in words for variant in transform.expand(partial)]
+            yield from words
+
+    def __repr__(self):
+        return f"TransformedWordlist(size={self.size}, transforms={self.transforms})"
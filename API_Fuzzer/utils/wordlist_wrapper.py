@@ -1,6 +1,12 @@
+import os
 from typing import List
+
+from utils.combination_space import ProductSpace, ZipSpace, ChainSpace
 from utils.loaders import load_wordlist
-import itertools
+from utils.mapped_wordlist import MappedWordlist
+from utils.wordlist_cache import WordlistCache
+from utils.wordlist_merge import merge_wordlists
+from utils.wordlist_transforms import TransformedWordlist
 
 
 class Wordlist:
@@ -8,11 +14,18 @@ class Wordlist:
     Wrapper class for Wordlists of endpoints and payloads
     """
 
-    def __init__(self, source: str | list):
+    def __init__(self, source: str | list, separator: str = None, transforms: list = None):
+        """
+        :param source: list of words, or url / path of the wordlist (a plain file is memory-mapped, see MappedWordlist)
+        :param separator: lines of a wordlist file are split into tuples of words on it
+        :param transforms: pipeline of transforms applied lazily to the words (see TransformedWordlist)
+        """
         if isinstance(source, list):
             self.wordlist = source
         else:
-            self.wordlist = load_wordlist(source)
+            self.wordlist = load_wordlist(source, separator)
+        if transforms:
+            self.wordlist = TransformedWordlist(self.wordlist, transforms)
         self.index = 0
 
     def next(self):
@@ -36,16 +49,30 @@ class Wordlist:
     def wordlist_length(self):
         return len(self.wordlist)
 
+    def __len__(self):
+        return len(self.wordlist)
+
+    def __getitem__(self, index):
+        return self.wordlist[index]
+
+    def __iter__(self):
+        return iter(self.wordlist)
+
+    def close(self):
+        wordlist = self.wordlist.wordlist if isinstance(self.wordlist, TransformedWordlist) else self.wordlist
+        if isinstance(wordlist, MappedWordlist):
+            wordlist.close()
+
     @staticmethod
     def create_product_list(lists: list[list]):
         """
-        Takes a list of lists and returns the cartesian product of items in a list of tuples
+        Takes a list of lists and returns the cartesian product of items as a lazy sequence of tuples
         [[1, 2], ['a', 'b']] ==> [(1, 'a'), (1, 'b'), (2, 'a'), (2, 'b')]
         :param self:
         :param lists:
-        :return: list containing the product of all lists (in tuples)
+        :return: ProductSpace of all lists (len, index access and slicing without materialising the product)
         """
-        return list(itertools.product(*lists))
+        return ProductSpace(lists)
 
     @staticmethod
     def create_zip_list(lists: list[list]):
@@ -57,19 +84,41 @@ class Wordlist:
         [[1, 2], ['a', 'b'], ['x', 'y']] ==> [(1, 'a', 'x'), (2, 'b', 'y')]
         :param self:
         :param lists: list of lists
-        :return: list containing the zip of all lists (in tuples)
+        :return: ZipSpace of all lists (lazy sequence of tuples)
         """
-        return list(zip(*lists))
+        return ZipSpace(lists)
 
     @staticmethod
     def create_chain_list(lists: list[list]):
         """
-        Takes a list of lists and returns a list of chained values
+        Takes a list of lists and returns the chained values
         :param self:
         :param lists: list of lists
-        :return: list containing tha values of all lists (in tuples)
+        :return: ChainSpace of all lists (lazy sequence of values)
+        """
+        return ChainSpace(lists)
+
+    @staticmethod
+    def merge_to_cache(wordlists: list, merge_type: str, cache: WordlistCache, separator: str = '',
+                       dedupe: bool = False, sort: bool = False, progress=None, name: str = None) -> str:
+        """
+        Merges wordlists into a file (streamed, see wordlist_merge) added to the wordlist cache
+        :param wordlists: wordlists (lists of words, MappedWordlist...)
+        :param merge_type: chain, zip or product
+        :param cache: wordlist cache the merged wordlist is added to
+        :param separator: joins the words of a zip / product combination
+        :param dedupe: duplicate lines are removed
+        :param sort: lines are sorted
+        :param progress: called with the number of combinations merged and the size of the merge space
+        :param name: name of the merged wordlist
+        :return: id of the merged wordlist in the cache
         """
-        return list(itertools.chain(*lists))
+        os.makedirs(cache.directory, exist_ok=True)
+        # written next to the cached wordlists: moved into the cache without a copy
+        output = os.path.join(cache.directory, f"merge-{os.getpid()}-{id(wordlists):x}.txt")
+        merge_wordlists(wordlists, merge_type, output, separator=separator, dedupe=dedupe, sort=sort,
+                        progress=progress, temporary_directory=cache.directory)
+        return cache.adopt(output, name=name or f"{merge_type}.txt")
 
     @staticmethod
     def merge_into_wordlist(wordlists, merge_type, separator=''):
@@ -126,14 +175,53 @@ def format_wordlist(wordlist: list, separator: str):
     return "\n".join(formatted_lines)
 
 
-def process_wordlists_dict(wordlists):
+def process_wordlists_dict(wordlists, cache: WordlistCache = None):
+    """
+    :param wordlists: fuzz marker -> {'filename': ..., 'content': ...} or {'id': ...} (id of a wordlist in the cache),
+        with an optional 'transforms' pipeline (see TransformedWordlist) and an optional 'dedupe' (duplicate words of
+        a content removed, every word kept otherwise: zip pairs words by position)
+    :param cache: wordlists sent with their content are cached in it, the ones sent as an id are taken from it
+    :return: fuzz marker -> wordlist (MappedWordlist from the cache, TransformedWordlist if it has transforms)
+    :raises KeyError: if a wordlist sent as an id isn't in the cache
+    :raises ValueError: if a transform isn't valid
+    """
     proc_wlist = {}
-    for key, value in wordlists.items():
-        proc_wlist[key] = value['content'].splitlines()
+    try:
+        for key, value in wordlists.items():
+            if cache is None:
+                if 'content' not in value:
+                    raise KeyError(f"wordlist {key} sent as an id without a wordlist cache")
+                proc_wlist[key] = value['content'].splitlines()
+                if value.get('dedupe'):
+                    proc_wlist[key] = list(dict.fromkeys(proc_wlist[key]))
+            elif 'content' in value:
+                proc_wlist[key] = cache.load(value['content'], name=value.get('filename'),
+                                             dedupe=value.get('dedupe', False))
+            else:
+                proc_wlist[key] = cache.get(value['id'])
+            if value.get('transforms'):
+                proc_wlist[key] = TransformedWordlist(proc_wlist[key], value['transforms'])
+    except (KeyError, ValueError):
+        # the wordlists already mapped aren't used
+        close_wordlists(proc_wlist)
+        raise
 
     return proc_wlist
 
 
+def close_wordlists(wordlists: dict):
+    """
+    Closes the wordlists mapped from the cache (their map and file), once the fuzz using them is done
+    :param wordlists: fuzz marker -> wordlist, as returned by process_wordlists_dict
+    :return:
+    """
+    for wordlist in wordlists.values():
+        if isinstance(wordlist, TransformedWordlist):
+            wordlist = wordlist.wordlist
+        if isinstance(wordlist, MappedWordlist):
+            wordlist.close()
+
+
 if __name__ == '__main__':
     '''print(Wordlist.create_chain_list([[1, 2], [3, 4], [5, 6], [7, 8]]))
     print(Wordlist.create_zip_list([[1, 2], [3, 4], [5, 6], [7, 8]]))
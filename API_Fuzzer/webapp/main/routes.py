@@ -1,6 +1,6 @@
 import json
 
-from flask import render_template, Blueprint, request, url_for, jsonify
+from flask import render_template, Blueprint, request, url_for, jsonify, send_file, abort
 
 from fuzzer_core.engine.request_builder import RequestBuilder
 from fuzzer_core.engine.requester.requester import Requester
@@ -15,6 +15,20 @@ def index():
     return render_template('contents/index.html')
 
 
+@main.route('/wordlists/<wordlist_id>')
+def download_wordlist(wordlist_id):
+    from .socket_routes import wordlist_cache
+    cache = wordlist_cache()
+    try:
+        if not cache.touch(wordlist_id):
+            abort(404)
+        path = cache.path_of(wordlist_id)
+    except ValueError:
+        abort(404)
+    return send_file(path, mimetype='text/plain', as_attachment=True,
+                     download_name=request.args.get('name', 'wordlist.txt'))
+
+
 @main.route('/requester')
 def requester():
     from .socket_routes import temps
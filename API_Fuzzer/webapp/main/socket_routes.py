@@ -5,6 +5,7 @@ import time
 import httpx
 from flask_socketio import emit
 
+from fuzzer_core.engine.fuzz_result import FuzzResult
 from fuzzer_core.modules.endpoint_discovery_module import EndpointDiscoveryModule
 from fuzzer_core.modules.fuzz_base_module import FuzzBaseModule
 from session import Session
@@ -12,12 +13,18 @@ from utils.loaders import load_string_to_dict
 from webapp import socketio
 
 from utils.encoding_decoding import encode_content, decode_content
-from fuzzer_core.engine.response_analyser import ResponseAnalyser
-from utils.wordlist_wrapper import Wordlist, process_wordlists_dict
+from fuzzer_core.engine.response_analyser import ResponseAnalyser, AnalysisOptions
+from utils.wordlist_cache import WordlistCache, DEFAULT_CACHE_DIRECTORY, DEFAULT_CACHE_MAX_BYTES
+from utils.wordlist_wrapper import Wordlist, process_wordlists_dict, close_wordlists
 from webapp import fuzzer_conf, session
 
 temps = {}
 
+# words of a merged wordlist shown in the interface (the whole wordlist is downloaded from /wordlists/<id>)
+MERGE_PREVIEW_WORDS = 1000
+# seconds between two merge progress events
+MERGE_PROGRESS_INTERVAL = 0.5
+
 evt_loop = asyncio.new_event_loop()
 asyncio.set_event_loop(evt_loop)
 
@@ -35,10 +42,32 @@ def start_merge(data):
              namespace='/merge-wordlists')
         return
 
-    resul_wordlist = Wordlist.merge_into_wordlist(
-        wordlists, merge_type, separator)
+    # the merge is streamed to a file added to the wordlist cache, the interface gets its first words and its id
+    cache = wordlist_cache()
+    # loaded with every word (zip pairs them by position), duplicates are only removed from the merge, if asked
+    sources = [cache.load(content, dedupe=False) for content in wordlists]
+    last_emit = [0.0]
+
+    def progress(done, total):
+        if time.time() - last_emit[0] >= MERGE_PROGRESS_INTERVAL or done == total:
+            emit('merge_progress', {'done': done, 'total': total}, namespace='/merge-wordlists')
+            last_emit[0] = time.time()
 
-    merge_result_data = {"result": resul_wordlist}
+    try:
+        wordlist_id = Wordlist.merge_to_cache(sources, merge_type, cache, separator=separator or '',
+                                              dedupe=bool(data.get('dedupe', False)),
+                                              sort=bool(data.get('sort', False)), progress=progress)
+    except ValueError as error:
+        emit('merge_result', {'error': str(error)}, namespace='/merge-wordlists')
+        return
+    finally:
+        for source in sources:
+            source.close()
+
+    with cache.get(wordlist_id) as merged:
+        preview = merged[:MERGE_PREVIEW_WORDS]
+        merge_result_data = {"result": "\n".join(preview), "id": wordlist_id, "words": len(merged),
+                             "truncated": len(merged) > len(preview)}
     emit('merge_result', merge_result_data, namespace='/merge-wordlists')
 
 
@@ -266,7 +295,8 @@ def send_request(data):
 
     requester = temps.get('requester', None)
     if requester is None:
-        requester = Requester(config=fuzzer_conf, follow_redirects=True, proxy=proxy)
+        # each request runs in its own event loop (asyncio.run), pooled connections can't be reused across loops
+        requester = Requester(config=fuzzer_conf, follow_redirects=True, proxy=proxy, keep_alive=False)
         temps['requester'] = requester
     try:
         response = asyncio.run(requester.prepare_and_send(request_data))
@@ -318,6 +348,59 @@ def backgound_fuzz(fuzz_base_module, request_details, iterator):
     asyncio.run(fuzz_base_module.run_fuzz(req_details=request_details, iterator=iterator))
 
 
+def wordlist_cache():
+    # wordlists sent once are cached (fuzz_engine.wordlist_cache directory), the interface then sends their id
+    engine_conf = fuzzer_conf.get('fuzz_engine', {}) or {}
+    directory = engine_conf.get('wordlist_cache', DEFAULT_CACHE_DIRECTORY)
+    max_bytes = engine_conf.get('wordlist_cache_size', DEFAULT_CACHE_MAX_BYTES)
+    cache = temps.get('wordlist_cache', None)
+    if cache is None or (cache.directory, cache.max_bytes) != (directory, max_bytes):
+        cache = WordlistCache(directory=directory, max_bytes=max_bytes)
+        temps['wordlist_cache'] = cache
+    return cache
+
+
+def is_origin(target) -> bool:
+    """
+    :param target: target of a raw mode fuzz, sent by the interface
+    :return: True if it's an http(s) origin (scheme://host[:port])
+    """
+    if not isinstance(target, str) or not target:
+        return False
+    try:
+        url = httpx.URL(target)
+    except httpx.InvalidURL:
+        return False
+    return url.scheme in ('http', 'https') and bool(url.host)
+
+
+def is_near_duplicate(analysis: dict, sent_clusters: set) -> bool:
+    """
+    With the response-cluster option, only the first response of each cluster (its representative) and the outliers
+    (responses deviating from the baseline) are sent to the interface, the others are only counted in fuzz_clusters
+    :param analysis: analysis of a response
+    :param sent_clusters: clusters a response was already sent for (updated)
+    :return: True if the response doesn't have to be sent
+    """
+    cluster = analysis.get(AnalysisOptions.RESP_CLUSTER.value, None)
+    if cluster is None or analysis.get(AnalysisOptions.RESP_ANOMALY.value, None):
+        return False
+    if cluster in sent_clusters:
+        return True
+    sent_clusters.add(cluster)
+    return False
+
+
+@socketio.on('cache_wordlist', namespace='/fuzzer')
+def cache_wordlist(data):
+    marker = data.get('marker', None)
+    cache = wordlist_cache()
+    wordlist_id = cache.add(data.get('content', ''), name=data.get('filename', None))
+    with cache.get(wordlist_id) as wordlist:
+        words = len(wordlist)
+    emit('wordlist_cached', {'marker': marker, 'id': wordlist_id, 'words': words})
+
+
 @socketio.on('start_fuzz', namespace='/fuzzer')
 def start_fuzz(data):
     print(data)
@@ -329,7 +412,19 @@ def start_fuzz(data):
     print(response_analysis)
 
     rate_limiting = data.get('rate_conc_limit', None)
-    wordlists = process_wordlists_dict(data.get('wordlists', None))
+
+    raw_request = data.get('raw_request', None)
+    target = data.get('target', None)
+    if raw_request and not is_origin(target):
+        emit('fuzz_error', {'error': 'Raw mode needs the target origin the request is sent to (scheme://host[:port])'})
+        return
+
+    try:
+        wordlists = process_wordlists_dict(data.get('wordlists', None), cache=wordlist_cache())
+    except KeyError as error:
+        # evicted from the cache since the interface sent it: it has to be sent again with its content
+        emit('wordlist_missing', {'id': error.args[0]})
+        return
 
     request_details = data.get('request_details', None)
     iterator = data.get('iterator', None)
@@ -341,10 +436,19 @@ def start_fuzz(data):
     if version is not None and version in ('HTTP/1.1', 'HTTP/2'):
         http_version = {'v1': version == 'HTTP/1.1', 'v2': version == 'HTTP/2'}
 
-    fuzz_base_module = FuzzBaseModule(num_workers=num_workers, response_analysis=response_analysis, wordlists=wordlists,
-                                      rate_limiting=rate_limiting, config=fuzzer_conf, proxy=proxy, http_version=http_version)
+    try:
+        fuzz_base_module = FuzzBaseModule(num_workers=num_workers, response_analysis=response_analysis,
+                                          wordlists=wordlists, rate_limiting=rate_limiting, config=fuzzer_conf,
+                                          proxy=proxy, http_version=http_version)
 
-    asyncio.run(fuzz_base_module.run_fuzz(req_details=request_details, iterator=iterator))
+        if raw_request:
+            # raw mode: the request is sent as written to the target origin
+            asyncio.run(fuzz_base_module.run_raw_fuzz(raw_request=raw_request, target=target, iterator=iterator))
+        else:
+            asyncio.run(fuzz_base_module.run_fuzz(req_details=request_details, iterator=iterator))
+    finally:
+        # the results don't need the wordlists: their maps and files are released once the run is over
+        close_wordlists(wordlists)
     # Thread(target=backgound_fuzz, args=(request_details, iterator,response_analysis,rate_limiting,fuzzer_conf,proxy,http_version,num_workers,wordlists))
     # socketio.start_background_task(backgound_fuzz, fuzz_base_module, request_details, iterator)
 
@@ -358,11 +462,16 @@ def start_fuzz(data):
 
     responses = []
     start_time = time.time()
+    # clusters of near duplicates a response was already sent for
+    sent_clusters = set()
 
     # Use the generator to collect items from the queue
-    for _, analysis in fuzz_base_module.base_fuzz_results():
+    for result, analysis in fuzz_base_module.base_fuzz_results(response=True):
         print('BEFORE IF ANALYSIS')
-        if analysis:
+        if analysis and not is_near_duplicate(analysis, sent_clusters):
+            if isinstance(result, FuzzResult):
+                # the fuzz index and url tell which combination the analysis belongs to
+                analysis = {'fuzz_index': result.fuzz_index, 'url': result.url, **analysis}
             responses.append(analysis)
         # Check if 1 seconds have passed to emit the current batch
         if time.time() - start_time >= 1:
@@ -374,6 +483,10 @@ def start_fuzz(data):
     # Final emit in case there are any leftover responses after finishing the loop
     if responses:
         emit('fuzz_responses', {'responses': responses})
+    # size of each cluster of near duplicates (only its representative was sent)
+    clusters = fuzz_base_module.cluster_summary()
+    if clusters:
+        emit('fuzz_clusters', {'clusters': clusters})
 
 
 @socketio.on('pause_resume', namespace='/fuzzer')
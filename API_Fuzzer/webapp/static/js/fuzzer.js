@@ -3,6 +3,60 @@ const fuzzerSocket = new Socket('/fuzzer');
 
 let wordlists = {};
 
+// id of each wordlist in the core wordlist cache
+fuzzerSocket.onMessage('wordlist_cached', function (data) {
+  if (wordlists[data.marker] !== undefined) {
+    wordlists[data.marker].id = data.id;
+  }
+});
+
+// evicted from the cache: the wordlist is sent with its content next time
+fuzzerSocket.onMessage('wordlist_missing', function (data) {
+  Object.values(wordlists).forEach((wordlist) => {
+    if (wordlist.id === data.id) {
+      delete wordlist.id;
+    }
+  });
+});
+
+// cached wordlists are sent as their id instead of their content
+function wordlistsToSend() {
+  let sent = {};
+  for (const [marker, wordlist] of Object.entries(wordlists)) {
+    sent[marker] =
+      wordlist.id !== undefined
+        ? { filename: wordlist.filename, id: wordlist.id }
+        : wordlist;
+  }
+  return sent;
+}
+
+// the fuzz wasn't started (missing or wrong options)
+fuzzerSocket.onMessage('fuzz_error', function (data) {
+  console.log(data.error);
+  alert(data.error);
+});
+
+// near duplicates of a row aren't sent: once the fuzz is done, the row of each cluster gets its size
+fuzzerSocket.onMessage('fuzz_clusters', function (data) {
+  showClusterCounts('responsesTable', data.clusters || []);
+});
+
+function showClusterCounts(tableId, clusters) {
+  const counts = {};
+  clusters.forEach((cluster) => {
+    counts[cluster.cluster] = cluster.count;
+  });
+  document
+    .querySelectorAll(`#${tableId} td[data-column="response-cluster"]`)
+    .forEach((cell) => {
+      const count = counts[cell.dataset.value];
+      if (count !== undefined) {
+        cell.textContent = `${cell.dataset.value} (${count} responses)`;
+      }
+    });
+}
+
 /** MATCH HIDE MODAL CODE**/
 let matchHideGroupCount = 0; // Counter to track the number of form groups
 
@@ -247,7 +301,7 @@ function collectFuzzData(rateLimitData, matchHideData, proxyData) {
   );
   data.num_workers = document.getElementsByTagName('numWorkersInput').value;
   //fuzzing values information
-  data.wordlists = wordlists;
+  data.wordlists = wordlistsToSend();
   data.iterator = document.getElementById('iteratorTypeSelect').value;
 
   // analysis information
@@ -263,5 +317,11 @@ function collectFuzzData(rateLimitData, matchHideData, proxyData) {
 
   data.proxy = proxyData;
 
+  // raw mode: the request is sent as written (malformed ones included) to the target origin
+  if (document.getElementById('rawModeCheckbox').checked) {
+    data.raw_request = document.getElementById('requestContentTextarea').value;
+    data.target = document.getElementById('rawTargetInput').value.trim();
+  }
+
   return data;
 }
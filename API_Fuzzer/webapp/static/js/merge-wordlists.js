@@ -2,6 +2,8 @@
 const mergeWordlistsSocket = new Socket('/merge-wordlists');
 
 let wordlistsList = [];
+// last merge result (id of the merged wordlist in the core wordlist cache)
+let mergedWordlist = null;
 
 // Emit the 'start_merge' event
 document.getElementById('mergeBtn').addEventListener('click', function (event) {
@@ -10,6 +12,8 @@ document.getElementById('mergeBtn').addEventListener('click', function (event) {
   data = {
     wordlists: wordlistsList.map((wordlist) => wordlist.content),
     merge_type: document.getElementById('mergeTypeSelect').value,
+    dedupe: document.getElementById('mergeDedupeCheck').checked,
+    sort: document.getElementById('mergeSortCheck').checked,
   };
   if (
     ['zip', 'product'].includes(
@@ -41,7 +45,12 @@ document
           'savedWordlistNameInput'
         ).value;
 
-        saveTextAsFile(mergedWordlistsContent, mergedWordlistsFilename);
+        if (mergedWordlist !== null && mergedWordlist.truncated) {
+          // only the first words are shown: the whole wordlist is downloaded from the core
+          window.location.href = `/wordlists/${mergedWordlist.id}?name=${encodeURIComponent(mergedWordlistsFilename)}`;
+        } else {
+          saveTextAsFile(mergedWordlistsContent, mergedWordlistsFilename);
+        }
 
         /*
         mergeWordlistsSocket.emitMessage('save_merged_wordlist', {
@@ -58,13 +67,21 @@ mergeWordlistsSocket.onMessage('merge_result', function (data) {
   console.log('Merge result received:', data);
   //check result
   if (data.hasOwnProperty('result') && data.result) {
+    mergedWordlist = { id: data.id, words: data.words, truncated: data.truncated };
     document.getElementById('mergedWordlistsResultTextarea').value =
       data.result;
+    if (data.truncated) {
+      console.log(`First words of ${data.words} merged words shown`);
+    }
   } else {
     console.log('The result is empty or does not exist.');
   }
 });
 
+mergeWordlistsSocket.onMessage('merge_progress', function (data) {
+  console.log(`Merged ${data.done} / ${data.total}`);
+});
+
 // Listen for 'wordlist_save' event and handle the response
 mergeWordlistsSocket.onMessage('wordlist_save_status', function (data) {
   console.log('Wordlist save result received:', data);